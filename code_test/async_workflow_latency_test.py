@@ -0,0 +1,125 @@
+import os
+import sys
+import time
+import types
+import asyncio
+
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(current_dir)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# 电机工具依赖buildhat，这里的命令由模拟执行函数处理，不会真正调用电机
+sys.modules.setdefault('buildhat', types.SimpleNamespace(Motor=None))
+
+from coze_stub_server import start_stub_server
+from utils.communication.coze_client import CozeStreamClient
+from utils.communication.async_workflow_runner import (
+    AsyncWorkflowRunner,
+    BARRIER_NONE,
+    BARRIER_BEFORE_RESUME,
+    BARRIER_EACH_COMMAND,
+)
+
+# 模拟电机：运动类命令耗时较长，查询类命令很快
+MOTION_SECONDS = 0.3
+QUERY_SECONDS = 0.005
+
+def simulated_motor_handler(command_data):
+    commands = command_data if isinstance(command_data, list) else [command_data]
+    duration = 0.0
+    for command in commands:
+        command_type = command.get('type', '')
+        duration += MOTION_SECONDS if command_type.startswith('run_') else QUERY_SECONDS
+    time.sleep(duration)
+    return {'success': True, 'message': f"模拟执行 {len(commands)} 条命令"}
+
+def run_once(base_url, server, barrier):
+    client = CozeStreamClient(base_url=base_url, token='test-token')
+    runner = AsyncWorkflowRunner(
+        '7492954257341513755',
+        client=client,
+        command_handler=simulated_motor_handler,
+        barrier=barrier,
+        verbose=False,
+    )
+    server.requests.clear()
+    server.request_times.clear()
+
+    start = time.perf_counter()
+    stats = asyncio.run(runner.run())
+    client.close()
+
+    resume_at = server.request_times[1] - start
+    return stats, resume_at
+
+class FakeStream:
+    """记录是否被关闭的事件流"""
+    def __init__(self, events):
+        self._events = iter(events)
+        self.closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._events)
+
+    def close(self):
+        self.closed = True
+
+def interrupt_event(event_id):
+    data = '{"interrupt_data": {"event_id": "%s", "type": 2}}' % event_id
+    return types.SimpleNamespace(event='Interrupt', data=data)
+
+class DoubleInterruptClient:
+    """第一个流中连续出现两个中断，恢复流为空"""
+    def __init__(self):
+        self.streams = []
+        self.resumed = []
+
+    def stream_run(self, workflow_id, parameters=None):
+        stream = FakeStream([interrupt_event('first'), interrupt_event('second')])
+        self.streams.append(stream)
+        return stream
+
+    def stream_resume(self, workflow_id, event_id, interrupt_type, resume_data='next'):
+        time.sleep(0.05)
+        self.resumed.append(event_id)
+        stream = FakeStream([])
+        self.streams.append(stream)
+        return stream
+
+def main():
+    # 每个事件间隔20毫秒，模拟大模型逐步输出
+    server, base_url = start_stub_server(event_delay=0.02)
+
+    print(f"模拟电机: 运动命令 {MOTION_SECONDS * 1000:.0f} ms, 查询命令 {QUERY_SECONDS * 1000:.0f} ms")
+    print(f"{'同步方式':<16}{'总耗时':>10}{'恢复请求发出':>14}{'命令最长等待':>14}")
+    try:
+        results = {}
+        for barrier in (BARRIER_EACH_COMMAND, BARRIER_BEFORE_RESUME, BARRIER_NONE):
+            stats, resume_at = run_once(base_url, server, barrier)
+            results[barrier] = (stats, resume_at)
+            assert stats['commands'] == 7 and stats['resumes'] == 1
+            assert all(result['success'] for result in stats['results'])
+            print(f"{barrier:<16}{stats['elapsed'] * 1000:>10.0f}ms{resume_at * 1000:>12.0f}ms"
+                  f"{stats['max_command_wait'] * 1000:>12.0f}ms")
+
+        # 不设同步点时，恢复请求应在电机命令执行完之前发出
+        assert results[BARRIER_NONE][1] < results[BARRIER_EACH_COMMAND][1]
+        assert results[BARRIER_NONE][0]['elapsed'] <= results[BARRIER_EACH_COMMAND][0]['elapsed']
+
+        # 同一个流中的两个中断：之前的恢复流被关闭，不会泄漏
+        client = DoubleInterruptClient()
+        runner = AsyncWorkflowRunner('7492954257341513755', client=client,
+                                     command_handler=simulated_motor_handler, verbose=False)
+        asyncio.run(runner.run())
+        print(f"同一流中两个中断: 恢复 {client.resumed}, 打开 {len(client.streams)} 个流, "
+              f"全部关闭 {all(stream.closed for stream in client.streams)}")
+        assert client.resumed == ['first', 'second'] and all(stream.closed for stream in client.streams)
+        print("\n测试通过！")
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
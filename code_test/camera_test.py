@@ -1,46 +1,84 @@
-from picamera2 import Picamera2
+import os
+import sys
 import time
 import numpy as np
 import cv2
 
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(current_dir)
+
+from utils.camera.frame_capture import FrameCapture, FakeFrameSource, Picamera2Source
+from utils.camera.motion_detector import MotionDetector
+from utils.camera.event_recorder import EventRecorder
+
+EVENTS_DIR = "motion_events"
+
 def main():
-    # 初始化摄像头
-    picam2 = Picamera2()
-    
-    # 配置摄像头
-    camera_config = picam2.create_preview_configuration(main={"size": (640, 480)})
-    picam2.configure(camera_config)
-    
-    # 启动摄像头
-    picam2.start()
-    
+    # 初始化摄像头，传入 --fake 参数时使用模拟帧源
+    if "--fake" in sys.argv:
+        source = FakeFrameSource(size=(640, 480), fps=30)
+    else:
+        source = Picamera2Source(size=(640, 480))
+
+    # 启动后台采集线程
+    capture = FrameCapture(source, capacity=8)
+    capture.start()
+
+    # 传入 --detect 参数时做运动检测，由事件录像在运动前后录制全分辨率帧
+    detector = MotionDetector() if "--detect" in sys.argv else None
+    recorder = None
+    if detector is not None:
+        recorder = EventRecorder(EVENTS_DIR, fps=30, capture=capture, detector=detector).start()
+    reported_clips = 0
+
     print("摄像头已启动，按 Ctrl+C 退出程序")
     print("按 'q' 键退出程序")
-    
+
+    last_report = time.time()
+    shown = 0
     try:
         while True:
-            # 捕获图像
-            frame = picam2.capture_array()
-            
-            # 显示图像
+            # 等待新的一帧（环形缓冲区中的视图，不复制）
+            frame, timestamp, seq = capture.next_frame(timeout=1.0)
+            if frame is None:
+                continue
+
+            # 显示图像，有运动时画出运动区域（帧是缓冲区中的只读视图，画在副本上）
+            if detector is not None and detector.boxes:
+                frame = frame.copy()
+                for x, y, w, h in detector.boxes:
+                    cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 0, 255), 2)
             cv2.imshow("Camera Feed", frame)
-            
+            shown += 1
+
             # 检查是否按下 'q' 键退出
             if cv2.waitKey(1) & 0xFF == ord('q'):
                 break
-            
-            # 打印图像形状
-            print(f"图像形状: {frame.shape}")
-            
-            # 短暂延时以减少CPU使用
-            time.sleep(0.03)
-                
+
+            # 每秒打印一次图像形状和帧率
+            now = time.time()
+            if now - last_report >= 1.0:
+                stats = capture.stats()
+                print(f"图像形状: {frame.shape} | 显示 {shown / (now - last_report):.1f} fps | "
+                      f"采集 {stats['captured']} 帧, 跳过 {stats['dropped']} 帧")
+                if detector is not None:
+                    d = detector.stats()
+                    print(f"运动检测: 单帧 {d['process_mean_ms']:.2f} ms (p99 {d['process_p99_ms']:.2f}, "
+                          f"预算 {d['budget_ms']} ms), 每 {d['stride']} 帧检测一次")
+                    for clip in recorder.clips[reported_clips:]:
+                        print(f"运动事件录像 {clip['frames']} 帧: {os.path.join(EVENTS_DIR, clip['path'])}")
+                    reported_clips = len(recorder.clips)
+                shown = 0
+                last_report = now
+
     except KeyboardInterrupt:
         print("\n程序被用户中断")
     finally:
         # 清理资源
-        picam2.stop()
+        if recorder is not None:
+            recorder.stop()
+        capture.stop()
         cv2.destroyAllWindows()
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -1,10 +1,14 @@
 import os
 import sys
-from buildhat import Motor
-import time
-import termios
-import tty
-import sys
+import argparse
+
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(current_dir)
+
+from utils.lego_motor.motor_backend import BACKEND_SIMULATED
+from utils.lego_motor.lego_motor_utils import create_multiple_motors
+from utils.lego_motor.mecanum import MecanumDrive, WHEEL_PORTS
+from utils.teleop.keyboard import KeyReader, run_teleop
 
 def check_permissions():
     """检查串口权限"""
@@ -16,127 +20,106 @@ def check_permissions():
         print("然后注销并重新登录使权限生效")
         sys.exit(1)
 
-def get_key():
-    """读取按键"""
-    try:
-        # 保存终端设置
-        old_settings = termios.tcgetattr(sys.stdin)
-        try:
-            # 设置终端为原始模式
-            tty.setraw(sys.stdin.fileno())
-            # 读取一个字符
-            ch = sys.stdin.read(1)
-            return ch
-        finally:
-            # 恢复终端设置
-            termios.tcsetattr(sys.stdin, termios.TCSADRAIN, old_settings)
-    except:
-        return None
-
-# 初始化电机
-motor_left_front = Motor('A')  # 左轮电机
-motor_right_front = Motor('B')  # 右轮电机
-motor_left_back = Motor('C')  # 左轮电机
-motor_right_back = Motor('D')  # 右轮电机
-
-
 # 设置默认速度
 DEFAULT_SPEED = 50  # 默认速度10%
 TURN_SPEED = 50    # 转弯时的速度
 
+# 麦克纳姆轮底盘，电机顺序为 左前(A)、右前(B)、左后(C)、右后(D)
+car = None
+
+def init_motors(backend=None):
+    """初始化电机"""
+    global car
+    motors = create_multiple_motors(list(WHEEL_PORTS), backend=backend)
+    car = MecanumDrive(motors)
+
 def stop_motors():
     """停止所有电机"""
-    motor_left_front.stop()
-    motor_right_front.stop()
-    motor_left_back.stop()
-    motor_right_back.stop()
+    car.stop()
 
 def move_forward():
     """向前移动"""
-    motor_left_front.start(-DEFAULT_SPEED)  # 左轮逆时针
-    motor_right_front.start(DEFAULT_SPEED)  # 右轮顺时针
-    motor_left_back.start(-DEFAULT_SPEED)  # 左轮逆时针
-    motor_right_back.start(DEFAULT_SPEED)  # 右轮顺时针
+    car.drive(vx=DEFAULT_SPEED)
 
 def move_backward():
     """向后移动"""
-    motor_left_front.start(DEFAULT_SPEED)   # 左轮顺时针
-    motor_right_front.start(-DEFAULT_SPEED) # 右轮逆时针
-    motor_left_back.start(DEFAULT_SPEED)   # 左轮顺时针
-    motor_right_back.start(-DEFAULT_SPEED) # 右轮逆时针
+    car.drive(vx=-DEFAULT_SPEED)
 
 def go_left():
     """左平移"""
-    motor_left_front.start(TURN_SPEED)     # 左轮顺时针
-    motor_right_front.start(TURN_SPEED)    # 右轮顺时针
-    motor_left_back.start(-TURN_SPEED)     # 左轮顺时针
-    motor_right_back.start(-TURN_SPEED)    # 右轮顺时针
+    car.drive(vy=TURN_SPEED)
 
 def go_right():
     """右平移"""
-    motor_left_front.start(-TURN_SPEED)    # 左轮逆时针
-    motor_right_front.start(-TURN_SPEED)   # 右轮逆时针
-    motor_left_back.start(TURN_SPEED)     # 左轮顺时针
-    motor_right_back.start(TURN_SPEED)    # 右轮顺时针
+    car.drive(vy=-TURN_SPEED)
 
 def turn_left():
     """左转"""
-    motor_left_front.start(TURN_SPEED)     # 左轮顺时针
-    motor_right_front.start(TURN_SPEED)   # 右轮逆时针
-    motor_left_back.start(TURN_SPEED)      # 左轮顺时针
-    motor_right_back.start(TURN_SPEED)    # 右轮逆时针
+    car.drive(omega=TURN_SPEED)
 
 def turn_right():
     """右转"""
-    motor_left_front.start(-TURN_SPEED)    # 左轮逆时针
-    motor_right_front.start(-TURN_SPEED)   # 右轮顺时针
-    motor_left_back.start(-TURN_SPEED)     # 左轮逆时针
-    motor_right_back.start(-TURN_SPEED)    # 右轮顺时针
-    
-
-print("小车控制程序已启动！")
-print("使用以下按键控制小车：")
-print("按住 w : 向前")
-print("按住 s : 向后")
-print("按住 a : 左平移")
-print("按住 d : 右平移")
-print("按住 q : 左转")
-print("按住 e : 右转")
-print("p : 退出程序")
-print("松开按键后小车会自动停止")
-
-try:
-    while True:
-        current_time = time.time()
-        
-        key = get_key()
-        
-        if key == 'w':
-            move_forward()
-        elif key == 's':
-            move_backward()
-        elif key == 'a':
-            go_left()
-        elif key == 'd':
-            go_right()
-        elif key == 'p':
-            print("程序已退出！")
+    car.drive(omega=-TURN_SPEED)
+
+KEY_ACTIONS = {
+    'w': move_forward,
+    's': move_backward,
+    'a': go_left,
+    'd': go_right,
+    'q': turn_left,
+    'e': turn_right,
+}
+
+class CarTeleop:
+    """按控制节拍把按住的按键转换为电机动作，只下发有变化的电机速度"""
+    def __init__(self, verbose=False):
+        self.current_key = None
+        self.verbose = verbose
+
+    def on_tick(self, key):
+        if key not in KEY_ACTIONS:
+            key = None
+        if key is None:
             stop_motors()
-            break
-        elif key == 'q':
-            turn_left()
-        elif key == 'e':
-            turn_right()
         else:
-            stop_motors()
+            KEY_ACTIONS[key]()
+        if self.verbose and key != self.current_key:
+            print(f"动作: {KEY_ACTIONS[key].__doc__ if key else '停止'}", flush=True)
+        self.current_key = key
+
+def main():
+    parser = argparse.ArgumentParser(description="键盘遥控小车")
+    parser.add_argument('--sim', action='store_true', help="使用模拟电机")
+    parser.add_argument('--rate', type=float, default=20, help="控制频率（Hz）")
+    parser.add_argument('--verbose', action='store_true', help="打印每次动作变化")
+    args = parser.parse_args()
+
+    if not args.sim:
+        check_permissions()
+    init_motors(BACKEND_SIMULATED if args.sim else None)
+
+    print("小车控制程序已启动！")
+    print("使用以下按键控制小车：")
+    print("按住 w : 向前")
+    print("按住 s : 向后")
+    print("按住 a : 左平移")
+    print("按住 d : 右平移")
+    print("按住 q : 左转")
+    print("按住 e : 右转")
+    print("p : 退出程序")
+    print("松开按键后小车会自动停止", flush=True)
+
+    teleop = CarTeleop(verbose=args.verbose)
+    try:
+        with KeyReader() as reader:
+            run_teleop(reader, teleop.on_tick, rate_hz=args.rate)
+        print("程序已退出！")
+    except KeyboardInterrupt:
+        print("程序已被用户中断！")
+    finally:
+        stop_motors()
+        stats = car.stats()
+        print(f"总线写入 {stats['sent']} 次, 缓存节省 {stats['saved']} 次 ({stats['saved_per_second']:.1f} 次/秒)")
 
-        next_time = time.time()
-        if next_time - current_time < 0.1:
-            time.sleep(0.1 - (next_time - current_time))
-            continue
-            
-except KeyboardInterrupt:
-    print("程序已被用户中断！")
-    stop_motors()
-finally:
-    stop_motors() 
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,415 @@
+import os
+import sys
+import json
+import time
+import types
+
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(current_dir)
+
+class MockMotor:
+    """无延迟的buildhat.Motor替身，只测量命令分发本身的开销"""
+    def __init__(self, port):
+        self.port = port
+        self.position = 0
+        self.speed = 0
+
+    def start(self, speed=None):
+        self.speed = speed
+
+    def stop(self):
+        self.speed = 0
+
+    def run_for_degrees(self, degrees, speed=None, blocking=True):
+        self.position += int(degrees)
+
+    def run_to_position(self, degrees, speed=None, blocking=True, direction="shortest"):
+        self.position = int(degrees)
+
+    def get_position(self):
+        return self.position
+
+    def get_speed(self):
+        return self.speed
+
+sys.modules['buildhat'] = types.SimpleNamespace(Motor=MockMotor)
+
+from utils.json_backend import BACKEND
+from utils.lego_motor import lego_motor_utils
+from utils.lego_motor.lego_motor_utils import (
+    execute_motor_command, shutdown_motor_workers,
+    # 以下函数在基准命令中不会调用，只为让旧实现的其它分支可以解析
+    create_motor, run_for_turns, run_to_position, run_for_distance, run_motors_for_turns,
+    run_motors_to_positions, stop_motors, run_motors_forever, run_motors_for_distances,
+)
+
+# 与新实现共用同一组电机
+_active_motors = lego_motor_utils._active_motors
+
+# ---- 以下为基线版本 lego_motor_utils.py 中的原样代码 ----
+
+def run_forever(motor, speed=50, direction=1):
+    """
+    让电机按照指定方向以指定速度一直运行
+    :param motor: MotorController实例
+    :param speed: 速度，范围 -100 到 100
+    :param direction: 方向，1表示正向，-1表示反向
+    :return: None
+    """
+    adjusted_speed = speed * direction
+    motor.motor.start(abs(adjusted_speed))
+
+def get_motors_speeds(motors, directions=None):
+    """
+    获取所有电机的速度
+    :param motors: MotorController实例列表
+    :param directions: 方向列表，1表示正向，-1表示反向
+    :return: 速度列表
+    """
+    if directions is None:
+        directions = [1] * len(motors)
+    return [motor.get_speed() * direction for motor, direction in zip(motors, directions)]
+
+def get_motors_positions(motors):
+    """
+    获取所有电机的位置
+    :param motors: MotorController实例列表
+    :return: 位置列表（度数）
+    """
+    return [motor.get_position() for motor in motors]
+
+def legacy_execute_motor_command(command_json):
+    """
+    执行从JSON接收到的电机控制命令
+    
+    参数:
+        command_json (str): JSON格式的命令字符串
+        
+    返回:
+        dict: 包含执行结果的字典
+    """
+    global _active_motors
+    
+    try:
+        # 解析JSON命令
+        command = json.loads(command_json)
+        
+        # 检查命令类型
+        command_type = command.get('type')
+        if not command_type:
+            return {'success': False, 'error': '缺少命令类型'}
+        
+        # 获取电机端口
+        port = command.get('port', 'A')
+        
+        # 根据命令类型执行相应操作
+        if command_type == 'create_motor':
+            # 检查电机是否已存在
+            if port in _active_motors:
+                return {'success': True, 'message': f'电机 {port} 已存在'}
+            
+            # 创建电机
+            motor = create_motor(port)
+            _active_motors[port] = motor
+            return {'success': True, 'message': f'电机 {port} 创建成功'}
+            
+        elif command_type == 'create_multiple_motors':
+            # 获取端口列表
+            ports = command.get('ports', ['A', 'B'])
+            wheel_circumferences = command.get('wheel_circumferences', None)
+            
+            # 检查是否所有电机都已存在
+            all_exist = all(p in _active_motors for p in ports)
+            if all_exist:
+                return {'success': True, 'message': f'电机 {ports} 已存在'}
+            
+            # 创建不存在的电机
+            created_ports = []
+            for p in ports:
+                if p not in _active_motors:
+                    motor = create_motor(p)
+                    _active_motors[p] = motor
+                    created_ports.append(p)
+            
+            if created_ports:
+                return {'success': True, 'message': f'电机 {created_ports} 创建成功'}
+            else:
+                return {'success': True, 'message': f'所有电机 {ports} 已存在'}
+            
+        elif command_type == 'run_for_turns':
+            # 按圈数运行
+            motor = _active_motors.get(port)
+            if not motor:
+                return {'success': False, 'error': f'电机 {port} 未创建'}
+                
+            turns = command.get('turns', 1)
+            speed = command.get('speed', 50)
+            direction = command.get('direction', 1)
+            run_for_turns(motor, turns, speed, direction)
+            return {'success': True, 'message': f'电机 {port} 运行 {turns} 圈'}
+            
+        elif command_type == 'run_to_position':
+            # 运行到指定位置
+            motor = _active_motors.get(port)
+            if not motor:
+                return {'success': False, 'error': f'电机 {port} 未创建'}
+                
+            position = command.get('position', 0)
+            speed = command.get('speed', 50)
+            direction = command.get('direction', 'shortest')
+            run_to_position(motor, position, speed, direction)
+            return {'success': True, 'message': f'电机 {port} 运行到位置 {position}'}
+            
+        elif command_type == 'run_forever':
+            # 一直运行
+            motor = _active_motors.get(port)
+            if not motor:
+                return {'success': False, 'error': f'电机 {port} 未创建'}
+                
+            speed = command.get('speed', 50)
+            direction = command.get('direction', 1)
+            run_forever(motor, speed, direction)
+            return {'success': True, 'message': f'电机 {port} 持续运行'}
+            
+        elif command_type == 'run_for_distance':
+            # 按距离运行
+            motor = _active_motors.get(port)
+            if not motor:
+                return {'success': False, 'error': f'电机 {port} 未创建'}
+                
+            distance = command.get('distance', 10)
+            speed = command.get('speed', 50)
+            direction = command.get('direction', 1)
+            run_for_distance(motor, distance, speed, direction)
+            return {'success': True, 'message': f'电机 {port} 运行 {distance} 厘米'}
+            
+        elif command_type == 'stop':
+            # 停止电机
+            motor = _active_motors.get(port)
+            if not motor:
+                return {'success': False, 'error': f'电机 {port} 未创建'}
+                
+            motor.stop()
+            return {'success': True, 'message': f'电机 {port} 已停止'}
+            
+        elif command_type == 'get_speed':
+            # 获取速度
+            motor = _active_motors.get(port)
+            if not motor:
+                return {'success': False, 'error': f'电机 {port} 未创建'}
+                
+            speed = motor.get_speed()
+            return {'success': True, 'speed': speed}
+            
+        elif command_type == 'get_position':
+            # 获取位置
+            motor = _active_motors.get(port)
+            if not motor:
+                return {'success': False, 'error': f'电机 {port} 未创建'}
+                
+            position = motor.get_position()
+            return {'success': True, 'position': position}
+            
+        elif command_type == 'release':
+            # 释放电机
+            motor = _active_motors.get(port)
+            if not motor:
+                return {'success': False, 'error': f'电机 {port} 未创建'}
+                
+            motor.release()
+            del _active_motors[port]
+            return {'success': True, 'message': f'电机 {port} 已释放'}
+            
+        elif command_type == 'run_motors_for_turns':
+            # 多电机按圈数运行
+            ports = command.get('ports', ['A', 'B'])
+            turns = command.get('turns', 1)
+            speeds = command.get('speeds', None)
+            directions = command.get('directions', None)
+            
+            # 检查所有电机是否已创建
+            motors = []
+            for p in ports:
+                motor = _active_motors.get(p)
+                if not motor:
+                    return {'success': False, 'error': f'电机 {p} 未创建'}
+                motors.append(motor)
+                
+            run_motors_for_turns(motors, turns, speeds, directions)
+            return {'success': True, 'message': f'电机 {ports} 运行 {turns} 圈'}
+            
+        elif command_type == 'run_motors_to_positions':
+            # 多电机运行到指定位置
+            ports = command.get('ports', ['A', 'B'])
+            positions = command.get('positions', [0, 0])
+            speeds = command.get('speeds', None)
+            direction = command.get('direction', 'shortest')
+            
+            # 检查所有电机是否已创建
+            motors = []
+            for p in ports:
+                motor = _active_motors.get(p)
+                if not motor:
+                    return {'success': False, 'error': f'电机 {p} 未创建'}
+                motors.append(motor)
+                
+            run_motors_to_positions(motors, positions, speeds, direction)
+            return {'success': True, 'message': f'电机 {ports} 运行到位置 {positions}'}
+            
+        elif command_type == 'stop_motors':
+            # 停止多个电机
+            ports = command.get('ports', ['A', 'B'])
+            
+            # 检查所有电机是否已创建
+            motors = []
+            for p in ports:
+                motor = _active_motors.get(p)
+                if not motor:
+                    return {'success': False, 'error': f'电机 {p} 未创建'}
+                motors.append(motor)
+                
+            stop_motors(motors)
+            return {'success': True, 'message': f'电机 {ports} 已停止'}
+            
+        elif command_type == 'run_motors_forever':
+            # 多电机持续运行
+            ports = command.get('ports', ['A', 'B'])
+            speeds = command.get('speeds', None)
+            directions = command.get('directions', None)
+            
+            # 检查所有电机是否已创建
+            motors = []
+            for p in ports:
+                motor = _active_motors.get(p)
+                if not motor:
+                    return {'success': False, 'error': f'电机 {p} 未创建'}
+                motors.append(motor)
+                
+            threads = run_motors_forever(motors, speeds, directions)
+            return {'success': True, 'message': f'电机 {ports} 持续运行', 'threads': len(threads)}
+            
+        elif command_type == 'run_motors_for_distances':
+            # 多电机按距离运行
+            ports = command.get('ports', ['A', 'B'])
+            distances = command.get('distances', [10, 10])
+            speeds = command.get('speeds', None)
+            directions = command.get('directions', None)
+            
+            # 检查所有电机是否已创建
+            motors = []
+            for p in ports:
+                motor = _active_motors.get(p)
+                if not motor:
+                    return {'success': False, 'error': f'电机 {p} 未创建'}
+                motors.append(motor)
+                
+            run_motors_for_distances(motors, distances, speeds, directions)
+            return {'success': True, 'message': f'电机 {ports} 运行距离 {distances}'}
+            
+        elif command_type == 'get_motors_speeds':
+            # 获取多个电机的速度
+            ports = command.get('ports', ['A', 'B'])
+            directions = command.get('directions', None)
+            
+            # 检查所有电机是否已创建
+            motors = []
+            for p in ports:
+                motor = _active_motors.get(p)
+                if not motor:
+                    return {'success': False, 'error': f'电机 {p} 未创建'}
+                motors.append(motor)
+                
+            speeds = get_motors_speeds(motors, directions)
+            return {'success': True, 'speeds': speeds}
+            
+        elif command_type == 'get_motors_positions':
+            # 获取多个电机的位置
+            ports = command.get('ports', ['A', 'B'])
+            
+            # 检查所有电机是否已创建
+            motors = []
+            for p in ports:
+                motor = _active_motors.get(p)
+                if not motor:
+                    return {'success': False, 'error': f'电机 {p} 未创建'}
+                motors.append(motor)
+                
+            positions = get_motors_positions(motors)
+            return {'success': True, 'positions': positions}
+            
+        elif command_type == 'release_all_ports':
+            # 释放所有端口
+            for port, motor in list(_active_motors.items()):
+                motor.release()
+                del _active_motors[port]
+            return {'success': True, 'message': '所有端口已释放'}
+            
+        else:
+            return {'success': False, 'error': f'未知命令类型: {command_type}'}
+            
+    except json.JSONDecodeError:
+        return {'success': False, 'error': 'JSON格式错误'}
+    except Exception as e:
+        return {'success': False, 'error': str(e)}
+
+# ---- 基线代码结束 ----
+
+BENCH_COMMANDS = [
+    json.dumps({'type': 'get_speed', 'port': 'A'}),
+    json.dumps({'type': 'run_forever', 'port': 'B', 'speed': 30}),
+    json.dumps({'type': 'get_motors_positions', 'ports': ['A', 'B', 'C', 'D']}),
+    json.dumps({'type': 'get_motors_speeds', 'ports': ['A', 'B', 'C', 'D'], 'directions': [1, -1, 1, -1]}),
+    json.dumps({'type': 'stop', 'port': 'B'}),
+]
+
+def measure(func, commands, iterations):
+    # 按进程CPU时间计算，不计入虚拟机被抢占的时间
+    start = time.process_time()
+    for _ in range(iterations):
+        for command in commands:
+            result = func(command)
+            if not result['success']:
+                raise RuntimeError(result)
+    elapsed = time.process_time() - start
+    return iterations * len(commands) / elapsed
+
+def best_of(funcs, commands, iterations, rounds=40):
+    """
+    两种实现交替各测 rounds 轮，每种取最快的一轮，减小机器负载波动的影响
+    :return: 每种实现的吞吐（条/秒）列表
+    """
+    best = [0.0] * len(funcs)
+    per_round = max(1, iterations // rounds)
+    for _ in range(rounds):
+        for i, func in enumerate(funcs):
+            best[i] = max(best[i], measure(func, commands, per_round))
+    return best
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    execute_motor_command(json.dumps({'type': 'create_multiple_motors', 'ports': ['A', 'B', 'C', 'D']}))
+
+    legacy, registry = best_of([legacy_execute_motor_command, execute_motor_command], BENCH_COMMANDS, iterations)
+
+    print(f"命令分发吞吐（{iterations * len(BENCH_COMMANDS)} 条命令，JSON解析: {BACKEND}）")
+    print(f"基线 if/elif 链: {legacy:,.0f} 条/秒")
+    print(f"命令注册表:      {registry:,.0f} 条/秒 ({registry / legacy:.2f}x)")
+
+    # 按命令拆开：run_forever、stop 在端口空闲时直接下发，只比基线多了端口队列的检查和运动句柄
+    loads_us = 1e6 / best_of([lambda command: {'success': bool(json.loads(command))}], BENCH_COMMANDS, iterations)[0]
+    print(f"\n单条命令耗时（微秒），json.loads 平均 {loads_us:.2f}")
+    for command in BENCH_COMMANDS:
+        legacy_us, registry_us = (1e6 / rate for rate in
+                                  best_of([legacy_execute_motor_command, execute_motor_command], [command], iterations))
+        print(f"  {json.loads(command)['type']:22s} 基线 {legacy_us:7.2f}  注册表 {registry_us:7.2f}")
+
+    execute_motor_command(json.dumps({'type': 'release_all_ports'}))
+    shutdown_motor_workers()
+
+    # 基线固定使用标准库json；未安装orjson时只输出对比，不做断言
+    if BACKEND == 'orjson':
+        assert registry >= legacy, f"命令注册表比基线慢: {registry:,.0f} < {legacy:,.0f} 条/秒"
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import os
+import sys
+import time
+
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(current_dir)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from coze_stub_server import start_stub_server
+from utils.communication.coze_client import CozeStreamClient, CozeAPIError
+from utils.json_backend import json_loads
+
+def main():
+    server, base_url = start_stub_server()
+    client = CozeStreamClient(base_url=base_url, token='test-token')
+
+    try:
+        print("1. 测试 stream_run")
+        start = time.perf_counter()
+        events = list(client.stream_run('7492954257341513755'))
+        print(f"收到 {len(events)} 个事件，用时 {(time.perf_counter() - start) * 1000:.2f} ms")
+        assert [event.event for event in events] == ['Message'] * 6 + ['Interrupt']
+        assert [event.id for event in events] == [str(i) for i in range(7)]
+
+        interrupt = json_loads(events[-1].data)['interrupt_data']
+        print(f"中断事件: {interrupt}")
+
+        print("2. 测试 stream_resume")
+        start = time.perf_counter()
+        events = list(client.stream_resume('7492954257341513755', interrupt['event_id'], interrupt['type']))
+        print(f"收到 {len(events)} 个事件，用时 {(time.perf_counter() - start) * 1000:.2f} ms")
+        assert events[-1].event == 'Done'
+
+        path, request = server.requests[-1]
+        assert path == '/v1/workflow/stream_resume'
+        assert request['event_id'] == interrupt['event_id']
+        assert request['resume_data'] == 'next'
+
+        print("3. 测试连接复用")
+        for _ in range(20):
+            list(client.stream_run('7492954257341513755'))
+        print(f"22 次请求共建立 {server.connections} 个TCP连接")
+        assert server.connections == 1
+
+        print("4. 测试中途放弃读取")
+        stream = client.stream_run('7492954257341513755')
+        next(stream)
+        stream.close()
+        list(client.stream_run('7492954257341513755'))
+        print(f"中途放弃后共建立 {server.connections} 个TCP连接")
+        assert server.connections == 2
+
+        print("5. 测试错误响应")
+        bad_client = CozeStreamClient(base_url=base_url + '/missing', token='test-token')
+        try:
+            list(bad_client.stream_run('7492954257341513755'))
+        except CozeAPIError as e:
+            print(f"收到预期的错误: {e}")
+        else:
+            raise AssertionError("应当抛出 CozeAPIError")
+
+        print("\n所有测试通过！")
+    finally:
+        client.close()
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
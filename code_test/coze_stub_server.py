@@ -0,0 +1,148 @@
+import os
+import sys
+import json
+import time
+import threading
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+# 默认回放的录制事件流
+DEFAULT_STREAMS = {
+    '/v1/workflow/stream_run': os.path.join(DATA_DIR, 'coze_event_stream.txt'),
+    '/v1/workflow/stream_resume': os.path.join(DATA_DIR, 'coze_resume_stream.txt'),
+}
+
+UPLOAD_PATH = '/v1/files/upload'
+
+class CozeStubHandler(BaseHTTPRequestHandler):
+    """模拟Coze流式接口：按事件回放录制的SSE流，使用分块传输并保持长连接"""
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.stats_lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length)
+
+        if self.path == UPLOAD_PATH:
+            self._handle_upload(body)
+            return
+
+        stream = self.server.streams.get(self.path)
+        if stream is None:
+            self._send_json(404, {'code': 4000, 'msg': f'unknown path {self.path}'})
+            return
+
+        try:
+            request = json.loads(body)
+        except json.JSONDecodeError:
+            self._send_json(400, {'code': 4000, 'msg': 'invalid json'})
+            return
+
+        with self.server.stats_lock:
+            self.server.requests.append((self.path, request))
+            self.server.request_times.append(time.perf_counter())
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        # 每个事件单独作为一个分块发送，模拟服务端逐步推送
+        try:
+            for event in stream:
+                if self.server.event_delay:
+                    time.sleep(self.server.event_delay)
+                self._write_chunk(event)
+            self._write_chunk(b'')
+        except (BrokenPipeError, ConnectionResetError):
+            # 客户端中途放弃读取
+            self.close_connection = True
+
+    def _handle_upload(self, body):
+        """模拟文件上传：解析 multipart/form-data 中的 file 字段，返回递增的文件ID"""
+        content_type = self.headers.get('Content-Type', '')
+        if not content_type.startswith('multipart/form-data'):
+            self._send_json(400, {'code': 4000, 'msg': 'expected multipart/form-data'})
+            return
+        message = BytesParser(policy=HTTP).parsebytes(b'Content-Type: ' + content_type.encode() + b'\r\n\r\n' + body)
+        part = next((p for p in message.iter_parts() if p.get_param('name', header='content-disposition') == 'file'), None)
+        if part is None:
+            self._send_json(400, {'code': 4000, 'msg': 'missing file field'})
+            return
+        data = part.get_payload(decode=True)
+        if self.server.upload_delay:
+            time.sleep(self.server.upload_delay)
+
+        with self.server.stats_lock:
+            file_id = f'file_{len(self.server.uploads) + 1:06d}'
+            self.server.uploads.append((file_id, part.get_filename(), data))
+        self._send_json(200, {'code': 0, 'msg': '', 'data': {
+            'id': file_id, 'bytes': len(data), 'file_name': part.get_filename(), 'created_at': int(time.time()),
+        }})
+
+    def _write_chunk(self, data):
+        self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+        self.wfile.flush()
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+def load_stream(path):
+    """读取录制的事件流文件，按空行切分为事件（字节串，保留结尾空行）"""
+    with open(path, 'rb') as f:
+        text = f.read()
+    return [event + b'\n\n' for event in text.split(b'\n\n') if event.strip()]
+
+def start_stub_server(host='127.0.0.1', port=0, streams=None, event_delay=0.0, upload_delay=0.0):
+    """
+    在后台线程启动模拟服务器
+    :param host: 监听地址
+    :param port: 监听端口，0表示自动分配
+    :param streams: 路径 -> 事件流文件路径，默认回放 code_test/data 中的录制流
+    :param event_delay: 每个事件发送前的延时（秒），用于模拟大模型逐步输出
+    :param upload_delay: 每次文件上传的延时（秒），用于模拟上行网络
+    :return: (服务器实例, 基础URL)
+    """
+    if streams is None:
+        streams = DEFAULT_STREAMS
+
+    server = ThreadingHTTPServer((host, port), CozeStubHandler)
+    server.daemon_threads = True
+    server.streams = {path: load_stream(file) for path, file in streams.items()}
+    server.event_delay = event_delay
+    server.upload_delay = upload_delay
+    server.uploads = []
+    server.stats_lock = threading.Lock()
+    server.connections = 0
+    server.requests = []
+    server.request_times = []
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f'http://{host}:{server.server_address[1]}'
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8000
+    server, base_url = start_stub_server(port=port)
+    print(f"Coze模拟服务器已启动: {base_url}，按 Ctrl+C 退出")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,82 @@
+import os
+import sys
+import time
+import argparse
+
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(current_dir)
+
+from utils.lego_motor.motor_backend import BACKEND_SIMULATED, get_serial_bus_writes, reset_serial_bus_writes
+from utils.lego_motor.lego_motor_utils import create_multiple_motors, release_all_ports, shutdown_motor_workers
+from utils.lego_motor.drive_state import DriveState
+
+SPEED = 50
+
+# 与 car_control.py 相同的轮速组合：左前、右前、左后、右后
+KEY_SPEEDS = {
+    'w': [-SPEED, SPEED, -SPEED, SPEED],
+    's': [SPEED, -SPEED, SPEED, -SPEED],
+    'a': [SPEED, SPEED, -SPEED, -SPEED],
+    'd': [-SPEED, -SPEED, SPEED, SPEED],
+    'q': [SPEED, SPEED, SPEED, SPEED],
+    'e': [-SPEED, -SPEED, -SPEED, -SPEED],
+    None: [0, 0, 0, 0],
+}
+
+# 一段典型的遥控操作：(按键, 持续秒数)
+KEY_SCRIPT = [('w', 3.0), (None, 1.0), ('a', 1.5), ('q', 1.0), ('w', 2.0), ('e', 0.5), (None, 2.0), ('s', 1.0)]
+
+def tick_keys(rate_hz):
+    for key, duration in KEY_SCRIPT:
+        for _ in range(int(duration * rate_hz)):
+            yield key
+
+def run_naive(motors, rate_hz):
+    """旧版 car_control.py 的做法：每个节拍对四个电机都调用一次 start()/stop()"""
+    reset_serial_bus_writes()
+    ticks = 0
+    start = time.perf_counter()
+    for key in tick_keys(rate_hz):
+        for motor, speed in zip(motors, KEY_SPEEDS[key]):
+            if speed == 0:
+                motor.motor.stop()
+            else:
+                motor.motor.start(speed)
+        ticks += 1
+    return ticks, get_serial_bus_writes(), time.perf_counter() - start
+
+def run_drive_state(motors, rate_hz):
+    reset_serial_bus_writes()
+    drive = DriveState(motors)
+    ticks = 0
+    start = time.perf_counter()
+    for key in tick_keys(rate_hz):
+        drive.set_speeds(KEY_SPEEDS[key], wait=True)
+        ticks += 1
+    return ticks, get_serial_bus_writes(), time.perf_counter() - start, drive.stats()
+
+def main():
+    parser = argparse.ArgumentParser(description="DriveState 只下发变化与每节拍全部下发的总线写入对比（模拟电机）")
+    parser.add_argument('--rate', type=float, default=20, help="控制频率（Hz）")
+    args = parser.parse_args()
+
+    motors = create_multiple_motors(['A', 'B', 'C', 'D'], backend=BACKEND_SIMULATED)
+    seconds = sum(duration for _, duration in KEY_SCRIPT)
+
+    try:
+        ticks, writes, elapsed = run_naive(motors, args.rate)
+        print(f"每节拍全部下发: {ticks} 个节拍, 总线写入 {writes} 次 ({writes / seconds:.1f} 次/秒), "
+              f"每节拍耗时 {elapsed / ticks * 1000:.2f} ms")
+
+        ticks, d_writes, d_elapsed, stats = run_drive_state(motors, args.rate)
+        print(f"DriveState:     {ticks} 个节拍, 总线写入 {d_writes} 次 ({d_writes / seconds:.1f} 次/秒), "
+              f"每节拍耗时 {d_elapsed / ticks * 1000:.2f} ms")
+        print(f"缓存统计: 请求 {stats['requested']}, 下发 {stats['sent']}, 节省 {stats['saved']} "
+              f"({stats['saved'] / seconds:.1f} 次/秒, 共 {seconds:.1f} 秒操作)")
+        assert stats['sent'] == d_writes, "下发计数与模拟总线写入次数不一致"
+    finally:
+        release_all_ports()
+        shutdown_motor_workers()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import argparse
+import numpy as np
+
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(current_dir)
+
+from utils.camera.frame_capture import FrameCapture, FakeFrameSource
+from utils.camera.motion_detector import MotionDetector
+from utils.camera.event_recorder import EventRecorder, EVENT_LOG
+from utils.camera.recording import FrameRecordingReader
+from utils.lego_motor.motor_backend import BACKEND_SIMULATED
+from utils.lego_motor.lego_motor_utils import execute_motor_command, release_all_ports, shutdown_motor_workers
+
+def synthetic_frames(seconds, fps, motion_windows, size=(640, 480), noise=6, seed=0):
+    """静止场景加传感器噪声，motion_windows 时间段内有方块从左向右移动；返回 (帧, 时间戳) 生成器"""
+    width, height = size
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width]
+    base = (np.sin(x / 23.0) * 40 + np.cos(y / 17.0) * 40 + 120).astype(np.int16)
+    scene = np.stack([base, base, base], axis=-1)
+    noise_frames = [rng.integers(-noise, noise + 1, scene.shape, dtype=np.int16) for _ in range(8)]
+    frame = np.empty(scene.shape, np.uint8)
+    for i in range(int(seconds * fps)):
+        t = i / fps
+        np.clip(scene + noise_frames[i % len(noise_frames)], 0, 255, out=frame, casting='unsafe')
+        for start, end in motion_windows:
+            if start <= t < end:
+                px = int((t - start) / (end - start) * (width - 80))
+                frame[height // 2 - 30:height // 2 + 30, px:px + 80] = (30, 200, 60)
+        yield frame, t
+
+def directory_bytes(directory):
+    return sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+
+def synthetic_case(args, quota_bytes=None):
+    """按合成时间线同步送入帧，运动检测触发，再加一次接口触发"""
+    directory = tempfile.mkdtemp(prefix='events_')
+    # 两段相隔很近的运动（触发窗口重叠，应合并为一段录像），一段单独的运动
+    motion = [(60.0, 62.0), (64.0, 66.0), (300.0, 302.0)]
+    api_trigger = 450.0
+    recorder = EventRecorder(directory, pre_roll=args.pre_roll, post_roll=args.post_roll, fps=args.fps,
+                             quota_bytes=quota_bytes, detector=MotionDetector(cooldown=0.5))
+    started = time.perf_counter()
+    for frame, t in synthetic_frames(args.seconds, args.fps, motion):
+        recorder.feed(frame, t)
+        if abs(t - api_trigger) < 0.5 / args.fps:
+            recorder.trigger('api', t)
+    recorder.flush()
+    elapsed = time.perf_counter() - started
+    return recorder, directory, elapsed
+
+def realtime_case(args):
+    """实时采集（模拟摄像头）+ 后台线程，由电机命令和接口调用触发"""
+    directory = tempfile.mkdtemp(prefix='events_')
+    capture = FrameCapture(FakeFrameSource(size=(640, 480), fps=args.fps), capacity=8).start()
+    recorder = EventRecorder(directory, pre_roll=1.0, post_roll=1.0, fps=args.fps, capture=capture).start()
+    recorder.attach_motor_commands()
+    try:
+        execute_motor_command({'type': 'create_motor', 'port': 'A', 'backend': BACKEND_SIMULATED})
+        time.sleep(1.5)
+        commanded_at = time.time()
+        execute_motor_command({'type': 'run_forever', 'port': 'A', 'speed': 30})
+        execute_motor_command({'type': 'get_speed', 'port': 'A'})  # 查询命令不触发
+        time.sleep(0.5)
+        execute_motor_command({'type': 'stop', 'port': 'A'})
+        time.sleep(3.5)
+        recorder.trigger()
+        api_at = time.time()
+        time.sleep(1.5)
+    finally:
+        recorder.stop()
+        capture.stop()
+        release_all_ports()
+        shutdown_motor_workers()
+    return recorder, directory, commanded_at, api_at
+
+def torn_read_case():
+    """写盘读取时帧已被覆盖（读取前或复制期间）：跳过这一帧并计入丢帧，不中断写盘"""
+    directory = tempfile.mkdtemp(prefix='events_')
+    recorder = EventRecorder(directory, pre_roll=1.0, post_roll=1.0, fps=10)
+    frames = [np.full((4, 4), i, np.uint8) for i in range(20)]
+    recorder.feed(frames[0], 0.0)
+    ring = recorder._ring
+    get, is_valid = ring.get, ring.is_valid
+    checks = {}
+
+    def patched_get(seq):
+        # 第5帧在检查之后、读取之前被覆盖
+        return (None, None) if seq == 5 else get(seq)
+
+    def patched_is_valid(seq):
+        # 第8帧在复制期间被覆盖：get() 内的检查通过，复制之后的检查失败
+        checks[seq] = checks.get(seq, 0) + 1
+        return False if seq == 8 and checks[seq] > 1 else is_valid(seq)
+
+    ring.get, ring.is_valid = patched_get, patched_is_valid
+    try:
+        recorder.trigger('api', 0.5)
+        for i in range(1, len(frames)):
+            recorder.feed(frames[i], i / 10)
+        recorder.flush()
+        with FrameRecordingReader(os.path.join(directory, recorder.clips[0]['path'])) as reader:
+            values = [int(reader.frames[i][0, 0]) for i in range(len(reader))]
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return recorder.frames_dropped, values
+
+def main():
+    parser = argparse.ArgumentParser(description="事件触发录像与连续录像的写盘量对比（合成场景）")
+    parser.add_argument('--seconds', type=float, default=600.0, help="合成时间线长度（秒）")
+    parser.add_argument('--fps', type=float, default=10.0, help="帧率（ssh_camera_test.py 连续保存约为10 fps）")
+    parser.add_argument('--pre-roll', type=float, default=3.0)
+    parser.add_argument('--post-roll', type=float, default=5.0)
+    args = parser.parse_args()
+
+    # 1. 合成时间线：写盘量对比
+    recorder, directory, elapsed = synthetic_case(args)
+    try:
+        s = recorder.stats()
+        print(f"合成场景 {args.seconds:.0f} 秒 @ {args.fps:.0f} fps, 640x480 原始帧, "
+              f"pre-roll {args.pre_roll} s, post-roll {args.post_roll} s（处理耗时 {elapsed:.1f} s）")
+        for clip in recorder.clips:
+            print(f"  {clip['path']}: {clip['first_frame']:7.1f} - {clip['last_frame']:7.1f} s, "
+                  f"{clip['frames']} 帧, 触发 {clip['triggers']}")
+        print(f"触发 {s['triggers']} 次（合并 {s['merged']} 次）-> {s['clips']} 段录像")
+        print(f"写入 {s['bytes_written'] / 1e6:.1f} MB, 连续录制 {s['continuous_bytes'] / 1e6:.1f} MB, "
+              f"比例 {s['ratio']:.2%}（减少 {1 / s['ratio']:.0f} 倍），目录实际 {directory_bytes(directory) / 1e6:.1f} MB")
+        with FrameRecordingReader(os.path.join(directory, recorder.clips[0]['path'])) as reader:
+            gaps = np.diff(reader.timestamps)
+            print(f"第一段录像可读取: {len(reader)} 帧, 最大帧间隔 {gaps.max():.3f} s（合并后无缺口）")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    # 2. 配额：只够存放约一段录像
+    quota = int(recorder.clips[0]['bytes'] * 1.2)
+    recorder, directory, _ = synthetic_case(args, quota_bytes=quota)
+    try:
+        s = recorder.stats()
+        remaining = sorted(name for name in os.listdir(directory) if name.endswith('.json'))
+        print(f"\n配额 {quota / 1e6:.1f} MB: 删除最早的录像 {s['evicted']} 段, 超出配额未写出 {s['frames_over_quota']} 帧, "
+              f"目录 {directory_bytes(directory) / 1e6:.1f} MB, 剩余录像 {remaining}")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    # 3. 实时采集，电机命令和接口触发
+    recorder, directory, commanded_at, api_at = realtime_case(args)
+    try:
+        s = recorder.stats()
+        with open(os.path.join(directory, EVENT_LOG)) as f:
+            entries = [json.loads(line) for line in f]
+        print(f"\n实时采集 {s['frames_seen']} 帧, 写入 {s['frames_written']} 帧, 环形缓冲区覆盖丢帧 {s['frames_dropped']}")
+        for entry, trigger_at in zip(entries, (commanded_at, api_at)):
+            print(f"  {entry['path']}: 触发 {entry['triggers']}, {entry['frames']} 帧, "
+                  f"触发前 {trigger_at - entry['first_frame']:.2f} s, 触发后 {entry['last_frame'] - trigger_at:.2f} s")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    # 4. 写盘时帧已被覆盖
+    dropped, values = torn_read_case()
+    passed = dropped == 2 and 5 not in values and 8 not in values and values == sorted(values)
+    print(f"\n读取时被覆盖的帧: 丢帧 {dropped}, 写入 {values} {'通过' if passed else '失败'}")
+    assert passed
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import os
+import sys
+import time
+import threading
+import numpy as np
+
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(current_dir)
+
+from utils.camera.frame_capture import FrameRingBuffer, FrameCapture
+
+def check(name, passed, detail=''):
+    print(f"{name}: {'通过' if passed else '失败'} {detail}")
+    return passed
+
+class SteppedSource:
+    """每调用一次 step() 才产生一帧的帧源，帧内容为帧序号"""
+    def __init__(self, shape=(2, 2)):
+        self.shape = shape
+        self.stopped = False
+        self._permits = threading.Semaphore(0)
+        self._finished = False
+        self._count = 0
+
+    def start(self):
+        pass
+
+    def stop(self):
+        self.stopped = True
+
+    def step(self, n=1):
+        for _ in range(n):
+            self._permits.release()
+
+    def finish(self):
+        """不再等待 step()，让采集线程可以退出"""
+        self._finished = True
+        self._permits.release()
+
+    def capture_into(self, out):
+        if self._finished:
+            time.sleep(0.001)
+        else:
+            self._permits.acquire()
+        out[...] = self._count
+        self._count += 1
+
+class BrokenSource:
+    """打不开的摄像头：第一帧就出错"""
+    def __init__(self):
+        self.stopped = False
+
+    def start(self):
+        pass
+
+    def stop(self):
+        self.stopped = True
+
+    def capture_array(self):
+        raise RuntimeError("摄像头不可用")
+
+def wait_captured(capture, n, timeout=1.0):
+    deadline = time.perf_counter() + timeout
+    while capture.frames_captured < n and time.perf_counter() < deadline:
+        time.sleep(0.001)
+    return capture.frames_captured >= n
+
+def main():
+    ok = True
+
+    # 1. 序号与时间戳：按写入顺序编号，读取得到对应的帧
+    ring = FrameRingBuffer(4, (2, 2))
+    seqs = [ring.write(np.full((2, 2), i, np.uint8), timestamp=i * 0.1) for i in range(3)]
+    frame, timestamp, latest = ring.latest()
+    values = [int(ring.get(seq)[0][0, 0]) for seq in seqs]
+    ok &= check("帧序号", seqs == [0, 1, 2] and values == [0, 1, 2] and latest == 2 and timestamp == 0.2
+                and not frame.flags.writeable, f"序号 {seqs}, 内容 {values}")
+
+    # 2. 覆盖：只有最近 capacity - 1 帧有效（正在写入的槽位不算），被覆盖的帧返回 None
+    for i in range(3, 10):
+        ring.write(np.full((2, 2), i, np.uint8), timestamp=i * 0.1)
+    valid = [seq for seq in range(10) if ring.is_valid(seq)]
+    frames, timestamps, start = ring.history(10)
+    ok &= check("覆盖", valid == [7, 8, 9] and ring.get(6) == (None, None) and start == 7
+                and [int(f[0, 0]) for f in frames] == [7, 8, 9] and np.allclose(timestamps, [0.7, 0.8, 0.9]),
+                f"有效序号 {valid}")
+
+    # 3. 跳帧统计：处理端没来得及读取的帧计入 dropped
+    source = SteppedSource()
+    capture = FrameCapture(source, capacity=8).start()
+    try:
+        source.step()
+        first = capture.next_frame(timeout=1.0)
+        source.step(3)
+        captured = wait_captured(capture, 4)
+        frame, _, seq = capture.next_frame(timeout=1.0)
+        stats = capture.stats()
+        ok &= check("跳帧统计", captured and first[2] == 0 and seq == 3 and int(frame[0, 0]) == 3
+                    and stats['dropped'] == 2 and stats['errors'] == 0, f"{stats}")
+    finally:
+        source.finish()
+        capture.stop()
+
+    # 4. 第一帧采集失败：start() 抛出采集线程中的异常，并关闭摄像头
+    source = BrokenSource()
+    capture = FrameCapture(source)
+    try:
+        capture.start()
+        error = None
+    except RuntimeError as e:
+        error = e
+    ok &= check("启动失败", error is not None and source.stopped and capture.buffer is None, f"{error!r}")
+
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import os
+import sys
+import time
+import socket
+import argparse
+import multiprocessing
+import numpy as np
+
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(current_dir)
+
+from utils.camera.frame_capture import FrameCapture, FakeFrameSource
+from utils.camera.frame_stream import FrameStreamServer, RawFrameClient
+
+def mjpeg_client(port, duration, delay, results):
+    """HTTP MJPEG 客户端：解析 multipart 帧头中的采集时间戳，统计端到端延迟"""
+    sock = socket.create_connection(('127.0.0.1', port))
+    sock.sendall(b'GET /stream HTTP/1.1\r\nHost: localhost\r\n\r\n')
+    stream = sock.makefile('rb')
+    while stream.readline() not in (b'\r\n', b''):
+        pass  # HTTP 响应头
+    latencies = []
+    end = time.time() + duration
+    while time.time() < end:
+        headers = {}
+        line = stream.readline()
+        while line not in (b'\r\n', b''):
+            if b':' in line:
+                key, value = line.split(b':', 1)
+                headers[key.strip().lower()] = value.strip()
+            line = stream.readline()
+        if b'content-length' not in headers:
+            continue
+        stream.read(int(headers[b'content-length']) + 2)
+        latencies.append(time.time() - float(headers[b'x-timestamp']))
+        if delay:
+            time.sleep(delay)
+    sock.close()
+    results.put(('mjpeg', latencies))
+
+def raw_client(port, duration, delay, results):
+    """原始帧客户端"""
+    latencies = []
+    with RawFrameClient('127.0.0.1', port) as client:
+        end = time.time() + duration
+        while time.time() < end:
+            frame, timestamp, seq = client.read_frame()
+            latencies.append(time.time() - timestamp)
+            if delay:
+                time.sleep(delay)
+    results.put(('raw', latencies))
+
+def run_case(server, capture, kind, count, duration, slow=0):
+    """启动 count 个客户端进程（其中 slow 个每帧后休眠0.3秒），返回各客户端结果和服务端CPU占用"""
+    port = server.ports['http' if kind == 'mjpeg' else 'raw']
+    target = mjpeg_client if kind == 'mjpeg' else raw_client
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=target, args=(port, duration, 0.3 if i < slow else 0.0, results))
+                 for i in range(count)]
+    for p in processes:
+        p.start()
+    time.sleep(0.3)  # 等客户端连上
+
+    encoded = server.frames_encoded
+    captured = capture.stats()['captured']
+    cpu = time.process_time()
+    wall = time.perf_counter()
+    time.sleep(duration - 0.6)
+    cpu = (time.process_time() - cpu) / (time.perf_counter() - wall)
+    capture_fps = (capture.stats()['captured'] - captured) / (time.perf_counter() - wall)
+    encode_fps = (server.frames_encoded - encoded) / (time.perf_counter() - wall)
+
+    collected = [results.get(timeout=duration + 5) for _ in processes]
+    for p in processes:
+        p.join()
+    return collected, cpu, capture_fps, encode_fps
+
+def main():
+    parser = argparse.ArgumentParser(description="推流服务器端到端延迟与CPU占用（模拟摄像头，本机回环）")
+    parser.add_argument('--duration', type=float, default=3.0)
+    parser.add_argument('--fps', type=float, default=30)
+    args = parser.parse_args()
+
+    capture = FrameCapture(FakeFrameSource(size=(640, 480), fps=args.fps), capacity=8).start()
+    server = FrameStreamServer(capture, host='127.0.0.1', http_port=0, raw_port=0, jpeg_quality=80).start()
+
+    try:
+        # 没有客户端时只有采集线程
+        cpu = time.process_time()
+        time.sleep(1.0)
+        idle_cpu = time.process_time() - cpu
+        print(f"无客户端: 服务进程CPU {idle_cpu:.1%}（采集 {args.fps:.0f} fps，不编码）")
+        print(f"{'模式':<8}{'客户端':>6}{'慢客户端':>8}{'采集fps':>9}{'编码fps':>9}{'每客户端fps':>12}"
+              f"{'延迟p50 ms':>12}{'p99 ms':>9}{'CPU':>8}{'每客户端CPU':>12}")
+        for kind, count, slow in (('mjpeg', 1, 0), ('mjpeg', 4, 0), ('mjpeg', 16, 0), ('mjpeg', 4, 1),
+                                  ('raw', 1, 0), ('raw', 4, 0)):
+            collected, cpu, capture_fps, encode_fps = run_case(server, capture, kind, count, args.duration, slow)
+            # 正常客户端的统计（慢客户端排在最前面）
+            fast = [np.array(latencies) for _, latencies in collected]
+            fast.sort(key=len)
+            fast = fast[slow:]
+            latencies = np.concatenate(fast) * 1000
+            client_fps = np.mean([len(l) for l in fast]) / args.duration
+            print(f"{kind:<8}{count:>6d}{slow:>8d}{capture_fps:>9.1f}{encode_fps:>9.1f}{client_fps:>12.1f}"
+                  f"{np.percentile(latencies, 50):>12.1f}{np.percentile(latencies, 99):>9.1f}"
+                  f"{cpu:>8.1%}{(cpu - idle_cpu) / count:>12.1%}")
+            if slow:
+                slow_frames = min(len(l) for _, l in collected)
+                print(f"          慢客户端收到 {slow_frames} 帧，其余帧被最新帧替换")
+    finally:
+        server.stop()
+        capture.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+import os
+import sys
+import json
+import time
+
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(current_dir)
+
+from utils.json_backend import BACKEND, json_loads
+
+STREAM_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'coze_event_stream.txt')
+
+def load_data_lines(path):
+    """读取录制的事件流，返回所有 data: 行的JSON部分"""
+    with open(path, encoding='utf-8') as f:
+        return [line[len('data: '):].strip() for line in f if line.startswith('data: ')]
+
+def parse_old(lines, loads, dumps):
+    """旧流程：解析事件 -> 解析content -> 重新序列化 -> 电机接口再次解析"""
+    for line in lines:
+        data = loads(line)
+        content = data.get('content')
+        if content and 'type' in content:
+            command = loads(content)
+            loads(dumps(command))
+
+def parse_new(lines, loads):
+    """新流程：解析事件 -> 解析content，命令字典直接交给电机接口"""
+    for line in lines:
+        data = loads(line)
+        content = data.get('content')
+        if content and 'type' in content:
+            loads(content)
+
+def measure(func, lines, iterations, *args):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(lines, *args)
+    elapsed = time.perf_counter() - start
+    return iterations * len(lines) / elapsed
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    lines = load_data_lines(STREAM_PATH)
+
+    print(f"事件流解析吞吐（{len(lines)} 个事件 x {iterations} 次，当前后端: {BACKEND}）")
+    baseline = measure(parse_old, lines, iterations, json.loads, json.dumps)
+    print(f"标准库json + 二次序列化: {baseline:,.0f} 事件/秒")
+    stdlib = measure(parse_new, lines, iterations, json.loads)
+    print(f"标准库json + 字典直传:   {stdlib:,.0f} 事件/秒 ({stdlib / baseline:.2f}x)")
+    if BACKEND != 'json':
+        fast = measure(parse_new, lines, iterations, json_loads)
+        print(f"{BACKEND} + 字典直传:       {fast:,.0f} 事件/秒 ({fast / baseline:.2f}x)")
+
+if __name__ == "__main__":
+    main()
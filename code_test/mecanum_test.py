@@ -0,0 +1,99 @@
+import os
+import sys
+import time
+import numpy as np
+
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(current_dir)
+
+from utils.lego_motor.mecanum import mix_wheel_speeds, MecanumDrive, WHEEL_PORTS
+from utils.lego_motor.motor_backend import BACKEND_SIMULATED, configure_simulated_motors, sim_sleep
+from utils.lego_motor.lego_motor_utils import (create_multiple_motors, execute_motor_command_dict,
+                                               release_all_ports, shutdown_motor_workers)
+
+# 旧版 car_control.py 中六个动作的轮速（左前、右前、左后、右后）
+LEGACY_PATTERNS = {
+    'move_forward': ((50, 0, 0), [-50, 50, -50, 50]),
+    'move_backward': ((-50, 0, 0), [50, -50, 50, -50]),
+    'go_left': ((0, 50, 0), [50, 50, -50, -50]),
+    'go_right': ((0, -50, 0), [-50, -50, 50, 50]),
+    'turn_left': ((0, 0, 50), [50, 50, 50, 50]),
+    'turn_right': ((0, 0, -50), [-50, -50, -50, -50]),
+}
+
+def python_mix(vx, vy, omega, max_speed=100):
+    """逐个计算的对照实现"""
+    wheels = [-vx + vy + omega, vx + vy + omega, -vx - vy + omega, vx - vy + omega]
+    peak = max(abs(w) for w in wheels)
+    if peak > max_speed:
+        wheels = [w * max_speed / peak for w in wheels]
+    return [round(w) for w in wheels]
+
+def main():
+    ok = True
+
+    # 与旧版离散动作一致
+    for name, (velocity, expected) in LEGACY_PATTERNS.items():
+        speeds = mix_wheel_speeds(*velocity).tolist()
+        passed = speeds == expected
+        ok = ok and passed
+        print(f"{name:14s} {velocity} -> {speeds} {'通过' if passed else '失败，期望 ' + str(expected)}")
+
+    # 饱和归一化：斜向加旋转，最大轮速被限制且比例不变
+    speeds = mix_wheel_speeds(80, 80, 40)
+    raw = np.array([40, 200, -120, 40])
+    passed = np.abs(speeds).max() == 100 and np.allclose(speeds, raw / 2)
+    ok = ok and passed
+    print(f"饱和归一化 (80, 80, 40) -> {speeds.tolist()} {'通过' if passed else '失败'}")
+
+    # 向量化与逐个计算一致，并对比耗时
+    rng = np.random.default_rng(0)
+    commands = rng.uniform(-100, 100, size=(20000, 3))
+    start = time.perf_counter()
+    vectorized = mix_wheel_speeds(commands[:, 0], commands[:, 1], commands[:, 2])
+    t_vec = time.perf_counter() - start
+    start = time.perf_counter()
+    reference = np.array([python_mix(*c) for c in commands])
+    t_py = time.perf_counter() - start
+    max_diff = np.abs(vectorized - reference).max()
+    passed = max_diff <= 1
+    ok = ok and passed
+    print(f"{len(commands)} 组速度: 向量化 {t_vec * 1000:.2f} ms, 逐个计算 {t_py * 1000:.2f} ms, "
+          f"最大差异 {max_diff} {'通过' if passed else '失败'}")
+
+    # 模拟电机上运行一段斜向运动
+    configure_simulated_motors(time_scale=10)
+    motors = create_multiple_motors(list(WHEEL_PORTS), backend=BACKEND_SIMULATED)
+    try:
+        car = MecanumDrive(motors)
+        for vx, vy, omega in [(50, 50, 0), (50, 50, 0), (40, 40, 10), (0, 0, 0)]:
+            speeds = car.drive(vx, vy, omega, wait=True)
+            sim_sleep(0.5)
+            print(f"驱动 ({vx}, {vy}, {omega}) -> 轮速 {speeds}, 实测 {[m.get_speed() for m in motors]}")
+        stats = car.stats()
+        print(f"总线写入 {stats['sent']} 次, 节省 {stats['saved']} 次")
+    finally:
+        release_all_ports()
+
+    # JSON命令不给端口时驱动全部四个轮子，端口数不对时拒绝执行
+    try:
+        execute_motor_command_dict({'type': 'create_multiple_motors', 'ports': list(WHEEL_PORTS), 'backend': 'sim'})
+        result = execute_motor_command_dict({'type': 'mecanum_drive', 'vx': 50, 'policy': 'append'})
+        sim_sleep(0.5)
+        speeds = execute_motor_command_dict({'type': 'get_motors_speeds', 'ports': list(WHEEL_PORTS)})['speeds']
+        passed = result['success'] and all(speeds)
+        ok = ok and passed
+        print(f"mecanum_drive 默认端口 -> 实测 {speeds} {'通过' if passed else '失败'}")
+        rejected = execute_motor_command_dict({'type': 'mecanum_drive', 'ports': ['A', 'B'], 'vx': 50})
+        passed = not rejected['success']
+        ok = ok and passed
+        print(f"mecanum_drive 两个端口 -> {rejected.get('error')} {'通过' if passed else '失败'}")
+    finally:
+        release_all_ports()
+        shutdown_motor_workers()
+        configure_simulated_motors(time_scale=1.0)
+
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import os
+import sys
+import math
+import time
+import threading
+import argparse
+import numpy as np
+
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(current_dir)
+
+from utils.lego_motor.motor_backend import BACKEND_SIMULATED, configure_simulated_motors
+from utils.lego_motor.lego_motor_utils import (create_multiple_motors, run_motors_for_distances,
+                                               release_all_ports, shutdown_motor_workers)
+from utils.lego_motor.mecanum import WHEEL_PORTS
+from utils.lego_motor.motion_control import MotionController
+
+# 各端口转速差异，模拟轮子/电机不一致
+GAINS = {'A': 1.0, 'B': 0.85, 'C': 1.1, 'D': 0.92}
+
+class Tracker:
+    """后台以固定频率记录各轮的精确行程，统计轮间行程差"""
+    def __init__(self, motors, rate_hz=200):
+        self.motors = motors
+        self.period = 1.0 / rate_hz
+        self.cm_per_degree = np.array([m.wheel_circumference / 360 for m in motors])
+        self.samples = []
+        self._running = threading.Event()
+
+    def _positions(self):
+        return np.array([m.motor.true_position() for m in self.motors])
+
+    def __enter__(self):
+        self.start = self._positions()
+        self._running.set()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        time.sleep(0.2)
+        self._running.clear()
+        self._thread.join()
+
+    def _run(self):
+        while self._running.is_set():
+            self.samples.append((self._positions() - self.start) * self.cm_per_degree)
+            time.sleep(self.period)
+
+    def travel(self):
+        return (self._positions() - self.start) * self.cm_per_degree
+
+def report(name, tracker, signs, target, duration, call_ms):
+    samples = np.array(tracker.samples) * signs
+    spread = samples.max(axis=1) - samples.min(axis=1)
+    final = tracker.travel() * signs
+    print(f"{name:10s} 调用返回 {call_ms:7.1f} ms | 完成 {duration:5.2f} s | "
+          f"最大轮间行程差 {spread.max():5.2f} cm (平均 {spread.mean():4.2f}) | "
+          f"最终误差 {np.abs(final - target).max():4.2f} cm")
+
+def main():
+    parser = argparse.ArgumentParser(description="开环 run_motors_for_distances 与闭环运动控制的跟踪误差对比（模拟电机）")
+    parser.add_argument('--distance', type=float, default=40.0, help="每个轮子的行程（厘米）")
+    parser.add_argument('--speed', type=int, default=50)
+    args = parser.parse_args()
+
+    configure_simulated_motors(gains=GAINS)
+    motors = create_multiple_motors(list(WHEEL_PORTS), backend=BACKEND_SIMULATED)
+    controller = MotionController(motors)
+    ones = np.ones(len(motors))
+    print(f"各端口转速系数 {GAINS}, 目标 {args.distance} cm, 速度 {args.speed}")
+
+    try:
+        # 开环：每个电机独立 run_for_degrees，调用阻塞到全部完成
+        with Tracker(motors) as tracker:
+            start = time.perf_counter()
+            run_motors_for_distances(motors, args.distance, [args.speed] * 4)
+            duration = time.perf_counter() - start
+        report("开环", tracker, ones, args.distance, duration, duration * 1000)
+
+        # 闭环：立即返回Future
+        with Tracker(motors) as tracker:
+            start = time.perf_counter()
+            future = controller.move_wheels([args.distance] * 4, speed=args.speed)
+            call_ms = (time.perf_counter() - start) * 1000
+            result = future.result()
+            duration = time.perf_counter() - start
+        report("闭环", tracker, ones, args.distance, duration, call_ms)
+        print(f"           控制节拍 {result['ticks']} 次, 控制器统计的最大同步误差 {result['max_sync_error']:.1f}°")
+
+        # 麦克纳姆轮底盘前进：轮间差异直接表现为车头偏转
+        signs = np.sign(controller.kinematics @ (1.0, 0.0, 0.0))
+        inverse = np.linalg.pinv(controller.kinematics)
+        with Tracker(motors) as tracker:
+            result = controller.drive(dx=args.distance, speed=args.speed).result()
+        heading = [math.degrees((inverse @ sample)[2]) for sample in tracker.samples]
+        dx, dy, dtheta = inverse @ tracker.travel()
+        print(f"底盘前进   前进 {dx:.2f} cm, 侧移 {dy:.2f} cm, 车头偏转最大 {max(map(abs, heading)):.2f}°, "
+              f"最终 {math.degrees(dtheta):.2f}°, 用时 {result['duration']:.2f} s")
+
+        # 取消后立即提交的新运动不受影响，取消会作用于排队中的运动
+        running = controller.move_wheels([args.distance * 2] * 4, speed=args.speed)
+        time.sleep(0.3)
+        controller.cancel()
+        aborted = running.result()
+        after = controller.move_degrees([10] * 4).result()
+        running = controller.move_wheels([args.distance * 2] * 4, speed=args.speed)
+        queued = controller.move_wheels([args.distance * 2] * 4, speed=args.speed)
+        time.sleep(0.3)
+        controller.cancel()
+        both = running.result(), queued.result()
+        print(f"取消运动   中止: {not aborted['success']}, 取消后的新运动完成: {after['success']}, "
+              f"同时取消排队中的运动: {not any(r['success'] for r in both)}")
+        assert not aborted['success'] and after['success'] and not any(r['success'] for r in both)
+    finally:
+        controller.shutdown()
+        release_all_ports()
+        shutdown_motor_workers()
+        configure_simulated_motors(gains={})
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+import argparse
+import numpy as np
+
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(current_dir)
+
+from utils.camera.motion_detector import MotionDetector
+from utils.camera.recording import FrameRecorder
+
+def make_scene(width, height, seed=0):
+    """静止的带纹理背景"""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width]
+    base = (np.sin(x / 23.0) * 40 + np.cos(y / 17.0) * 40 + 120).astype(np.float32)
+    scene = np.stack([base, base * 0.9, base * 1.1], axis=-1)
+    scene += rng.normal(0, 8, scene.shape).astype(np.float32)
+    return np.clip(scene, 0, 255).astype(np.uint8)
+
+def make_frames(scene, count, fps, motion_windows, noise, seed=1):
+    """
+    生成测试帧：静止场景加传感器噪声，在 motion_windows 的时间段内有一个方块从左向右移动
+    :return: 帧生成器，每项为 (帧, 时间戳, 真实包围框或None)
+    """
+    rng = np.random.default_rng(seed)
+    height, width = scene.shape[:2]
+    size = (80, 60)
+    # 预先生成少量噪声帧循环使用，生成噪声的耗时不计入检测
+    noise_frames = [rng.integers(-noise, noise + 1, scene.shape, dtype=np.int16) for _ in range(8)]
+    frame = np.empty_like(scene)
+    for i in range(count):
+        t = i / fps
+        np.clip(scene + noise_frames[i % len(noise_frames)], 0, 255, out=frame, casting='unsafe')
+        truth = None
+        for start, end in motion_windows:
+            if start <= t < end:
+                progress = (t - start) / (end - start)
+                x = int(progress * (width - size[0]))
+                y = height // 2 - size[1] // 2 + int(40 * np.sin(progress * 6))
+                frame[y:y + size[1], x:x + size[0]] = (30, 200, 60)
+                truth = (x, y, size[0], size[1])
+        yield frame, t, truth
+
+def iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    w = min(ax + aw, bx + bw) - max(ax, bx)
+    h = min(ay + ah, by + bh) - max(ay, by)
+    if w <= 0 or h <= 0:
+        return 0.0
+    inter = w * h
+    return inter / (aw * ah + bw * bh - inter)
+
+def run(args, scale, budget_ms, record_dir=None):
+    detector = MotionDetector(scale=scale, budget_ms=budget_ms)
+    scene = make_scene(640, 480)
+    windows = [(2.0, 4.0), (7.0, 8.5)]
+    count = int(args.seconds * args.fps)
+    recorder = None
+    recorded = 0
+    ious = []
+    missed = false_positives = 0
+    events = []
+    for seq, (frame, t, truth) in enumerate(make_frames(scene, count, args.fps, windows, args.noise)):
+        result = detector.process(frame, t, seq)
+        for event in result or []:
+            events.append(event)
+            if record_dir is not None and event.kind == 'start':
+                recorder = FrameRecorder(os.path.join(record_dir, f'event_{seq:06d}'), frame.shape)
+            elif event.kind == 'end' and recorder is not None:
+                recorder.close()
+                recorded += recorder.count
+                recorder = None
+        if recorder is not None:
+            recorder.append(frame, t)
+        if result is None:
+            continue
+        if truth is not None:
+            if detector.boxes:
+                ious.append(max(iou(truth, box) for box in detector.boxes))
+            else:
+                missed += 1
+        elif detector.boxes:
+            false_positives += 1
+    if recorder is not None:
+        recorder.close()
+        recorded += recorder.count
+    return detector, events, ious, missed, false_positives, recorded, count, windows
+
+def main():
+    parser = argparse.ArgumentParser(description="运动检测单帧耗时与准确度（合成场景，640x480）")
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--fps', type=float, default=30)
+    parser.add_argument('--noise', type=int, default=6, help="逐帧传感器噪声幅度")
+    args = parser.parse_args()
+
+    print(f"{'缩小倍数':<8}{'工作分辨率':>10}{'预算ms':>8}{'检测ms':>8}{'p99 ms':>8}{'每帧CPU ms':>12}"
+          f"{'检测帧':>8}{'IoU':>7}{'漏检':>6}{'误检':>6}")
+    for scale, budget_ms in ((2, None), (4, None), (8, None), (4, 5.0), (2, 1.0)):
+        detector, events, ious, missed, false_positives, _, count, _ = run(args, scale, budget_ms)
+        s = detector.stats()
+        print(f"{scale:<8d}{f'{640 // scale}x{480 // scale}':>10}{str(budget_ms):>8}{s['process_mean_ms']:>8.2f}"
+              f"{s['process_p99_ms']:>8.2f}{s['cpu_per_frame_ms']:>12.2f}{s['processed']:>8d}"
+              f"{np.mean(ious) if ious else 0:>7.2f}{missed:>6d}{false_positives:>6d}")
+
+    # 默认参数下的事件和事件期间的录制
+    record_dir = tempfile.mkdtemp(prefix='motion_')
+    try:
+        detector, events, _, _, _, recorded, count, windows = run(args, 4, 5.0, record_dir)
+        print(f"\n真实运动时间段: {windows}")
+        for event in events:
+            if event.kind != 'update':
+                print(f"  {event}")
+        size = sum(os.path.getsize(os.path.join(record_dir, f)) for f in os.listdir(record_dir))
+        print(f"录制 {recorded}/{count} 帧 ({recorded / count:.0%}), 文件 {size / 1e6:.1f} MB，"
+              f"连续录制需要 {count * 640 * 480 * 3 / 1e6:.1f} MB")
+    finally:
+        shutil.rmtree(record_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import os
+import sys
+import time
+import threading
+
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(current_dir)
+
+from utils.lego_motor.motor_backend import BACKEND_SIMULATED
+from utils.lego_motor.lego_motor_utils import (
+    create_multiple_motors,
+    execute_motor_command_dict,
+    release_all_ports,
+    run_for_turns_async,
+    run_forever_async,
+    run_motors_for_distances_async,
+    run_motors_for_turns_async,
+    run_motors_forever,
+    shutdown_motor_workers,
+)
+
+# 遥控和闭环控制的节拍（秒），速度更新需要在一个节拍内生效
+CONTROL_TICK = 0.05
+
+def check(name, passed, detail=''):
+    print(f"{name}: {'通过' if passed else '失败'} {detail}")
+    return passed
+
+def wait_stopped(motors, timeout=1.0):
+    """等待所有模拟电机停止，返回耗时（毫秒）"""
+    start = time.perf_counter()
+    while any(m.motor.is_moving() for m in motors):
+        if time.perf_counter() - start > timeout:
+            return None
+        time.sleep(0.001)
+    return (time.perf_counter() - start) * 1000
+
+def main():
+    ok = True
+    motors = create_multiple_motors(['A', 'B', 'C', 'D'], backend=BACKEND_SIMULATED)
+    try:
+        # 1. 提交后立即返回，控制循环在运动期间继续运行
+        callback_calls = []
+        start = time.perf_counter()
+        handle = run_motors_for_turns_async(motors, 1, [50] * 4)
+        submit_ms = (time.perf_counter() - start) * 1000
+        handle.add_done_callback(lambda h: callback_calls.append(time.perf_counter()))
+        ticks = 0
+        while not handle.done():
+            ticks += 1
+            time.sleep(0.01)
+        ok &= check("提交不阻塞", submit_ms < 20, f"提交耗时 {submit_ms:.2f} ms, 运动期间控制循环执行 {ticks} 次")
+        ok &= check("完成回调", len(callback_calls) == 1 and handle.wait(0) and handle.exception() is None)
+
+        # 2. 取消正在执行的运动：立即停车，回调仍然触发
+        cancelled = threading.Event()
+        handle = run_motors_for_distances_async(motors, 100, [50] * 4)
+        handle.add_done_callback(lambda h: cancelled.set())
+        time.sleep(0.3)
+        start = time.perf_counter()
+        handle.cancel()
+        cancel_ms = (time.perf_counter() - start) * 1000
+        stop_ms = wait_stopped(motors)
+        ok &= check("取消运动", handle.cancelled and cancelled.is_set() and stop_ms is not None,
+                    f"cancel() 耗时 {cancel_ms:.2f} ms, 停稳 {stop_ms:.1f} ms")
+
+        # 3. 排队中的运动取消后不会执行
+        first = run_for_turns_async(motors[0], 2, 50)
+        queued = run_for_turns_async(motors[0], 2, 50)
+        queued.cancel()
+        first.result()
+        ok &= check("撤销排队中的运动", queued.futures[0].cancelled() and not motors[0].motor.is_moving())
+
+        # 4. 持续运行在取消之前不会结束
+        handle = run_motors_forever(motors, [40] * 4)
+        not_done = not handle.wait(0.2)
+        handle.cancel()
+        stop_ms = wait_stopped(motors)
+        ok &= check("持续运行句柄", not_done and handle.done() and stop_ms is not None, f"停稳 {stop_ms:.1f} ms")
+
+        # 5. 部分端口已完成时取消，不影响这些端口之后的运动
+        handle = run_motors_for_turns_async(motors[:2], [0.1, 3], [50, 50])
+        handle.futures[0].result()
+        later = run_forever_async(motors[0], 40)
+        later.futures[0].result()
+        handle.cancel()
+        time.sleep(0.05)
+        later_running = motors[0].motor.is_moving() and not later.done()
+        later.cancel()
+        wait_stopped(motors)
+        # 持续运行的端口被新运动接管后，取消旧句柄也不会停止它
+        handle = run_motors_forever(motors[:2], [40, 40])
+        later = run_forever_async(motors[0], 30)
+        later.futures[0].result()
+        handle.cancel()
+        time.sleep(0.05)
+        later_running &= motors[0].motor.is_moving() and not motors[1].motor.is_moving()
+        later.cancel()
+        stop_ms = wait_stopped(motors)
+        ok &= check("只停止本句柄的运动", later_running and stop_ms is not None)
+
+        # 6. JSON命令：wait=false 立即返回，用 motion_status / cancel_motion 跟踪
+        # 释放上面直接创建的电机，改用JSON命令注册表中的实例
+        release_all_ports()
+        execute_motor_command_dict({'type': 'create_multiple_motors', 'ports': ['A', 'B', 'C', 'D'], 'backend': 'sim'})
+        start = time.perf_counter()
+        result = execute_motor_command_dict({'type': 'run_motors_for_distances', 'ports': ['A', 'B'],
+                                             'distances': 50, 'wait': False})
+        json_ms = (time.perf_counter() - start) * 1000
+        status = execute_motor_command_dict({'type': 'motion_status', 'ports': ['A', 'B']})
+        cancel = execute_motor_command_dict({'type': 'cancel_motion', 'ports': ['A', 'B']})
+        status_after = execute_motor_command_dict({'type': 'motion_status', 'ports': ['A', 'B']})
+        ok &= check("JSON非阻塞命令",
+                    result.get('pending') and not status['all_done'] and cancel['cancelled'] == ['A', 'B']
+                    and status_after['all_done'],
+                    f"返回耗时 {json_ms:.2f} ms")
+
+        # 7. 速度更新立即打断同一端口上还在执行的有限运动，一个控制节拍内生效
+        turn = execute_motor_command_dict({'type': 'run_for_turns', 'port': 'A', 'turns': 5, 'wait': False})
+        time.sleep(0.2)
+        start = time.perf_counter()
+        result = execute_motor_command_dict({'type': 'run_forever', 'port': 'A', 'speed': 30})
+        update_ms = (time.perf_counter() - start) * 1000
+        time.sleep(CONTROL_TICK)
+        speed = execute_motor_command_dict({'type': 'get_speed', 'port': 'A'})['speed']
+        execute_motor_command_dict({'type': 'stop', 'port': 'A'})
+        ok &= check("速度更新抢占运动", turn.get('pending') and result['success'] and update_ms < CONTROL_TICK * 1000
+                    and speed == 30, f"返回耗时 {update_ms:.2f} ms, 一个节拍后速度 {speed}")
+    finally:
+        release_all_ports()
+        shutdown_motor_workers()
+
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
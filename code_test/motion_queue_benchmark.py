@@ -0,0 +1,95 @@
+import os
+import sys
+import time
+import argparse
+
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(current_dir)
+
+from utils.lego_motor.motor_backend import BACKEND_SIMULATED, get_serial_bus_writes, reset_serial_bus_writes
+from utils.lego_motor.lego_motor_utils import (
+    POLICY_APPEND,
+    POLICY_COALESCE,
+    POLICY_PREEMPT,
+    _set_speed_action,
+    create_multiple_motors,
+    dispatch_to_motors,
+    get_motor_queue_stats,
+    release_all_ports,
+    run_for_turns_async,
+    run_forever_async,
+    shutdown_motor_workers,
+)
+from utils.lego_motor.mecanum import WHEEL_PORTS
+
+def react_latency(motor, policy):
+    """长距离运动进行中提交持续运行，返回从提交到新命令下发的时间（毫秒）"""
+    long_move = run_for_turns_async(motor, 5, 50)
+    time.sleep(0.3)
+    start = time.perf_counter()
+    handle = run_forever_async(motor, 30, policy=policy)
+    handle.futures[0].result()
+    latency = (time.perf_counter() - start) * 1000
+    handle.cancel()
+    long_move.wait()
+    return latency
+
+def speed_burst(motors, policy, rate_hz, duration):
+    """
+    按 rate_hz 向四个端口连续下发速度更新（比串口能承受的速度快），
+    返回最后一次更新从提交到生效的时间（毫秒）
+    """
+    period = 1.0 / rate_hz
+    ticks = int(duration * rate_hz)
+    reset_serial_bus_writes()
+    next_tick = time.perf_counter()
+    futures = []
+    for tick in range(ticks):
+        speed = 20 + tick % 60
+        futures = dispatch_to_motors(motors, _set_speed_action, [(speed,)] * len(motors), wait=False, policy=policy)
+        next_tick += period
+        delay = next_tick - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+    last_submit = time.perf_counter()
+    for future in futures:
+        future.result()
+    return (time.perf_counter() - last_submit) * 1000, get_serial_bus_writes()
+
+def main():
+    parser = argparse.ArgumentParser(description="端口命令队列策略对比（模拟电机）")
+    parser.add_argument('--rate', type=float, default=200, help="速度更新频率（Hz）")
+    parser.add_argument('--duration', type=float, default=2.0, help="速度更新持续时间（秒）")
+    args = parser.parse_args()
+
+    try:
+        # 1. 新意图打断正在执行的长距离运动
+        print("运行5圈的过程中改为持续运行，从提交到新命令下发的时间:")
+        for policy in (POLICY_APPEND, POLICY_PREEMPT):
+            motors = create_multiple_motors(['A'], backend=BACKEND_SIMULATED)
+            latency = react_latency(motors[0], policy)
+            stats = get_motor_queue_stats()['A']
+            print(f"  {policy:9s} {latency:8.1f} ms  (撤销/打断 {stats['preempted']} 条)")
+            release_all_ports()
+            shutdown_motor_workers()
+
+        # 2. 速度更新快于串口下发能力时的排队情况
+        print(f"\n{args.rate:.0f} Hz 速度更新 {args.duration:.0f} 秒（四个端口共享串口）:")
+        print(f"  {'策略':9s}{'最新意图延迟ms':>14}{'最大队列':>8}{'等待p99 ms':>12}{'合并':>8}{'串口写入':>8}")
+        for policy in (POLICY_APPEND, POLICY_COALESCE, POLICY_PREEMPT):
+            motors = create_multiple_motors(list(WHEEL_PORTS), backend=BACKEND_SIMULATED)
+            latency, writes = speed_burst(motors, policy, args.rate, args.duration)
+            stats = get_motor_queue_stats()
+            max_depth = max(s['max_depth'] for s in stats.values())
+            wait_p99 = max(s['wait_p99_ms'] for s in stats.values())
+            coalesced = sum(s['coalesced'] for s in stats.values())
+            print(f"  {policy:9s}{latency:>14.1f}{max_depth:>8d}{wait_p99:>12.1f}{coalesced:>8d}{writes:>8d}")
+            dispatch_to_motors(motors, _set_speed_action, [(0,)] * len(motors))
+            release_all_ports()
+            shutdown_motor_workers()
+    finally:
+        release_all_ports()
+        shutdown_motor_workers()
+
+if __name__ == "__main__":
+    main()
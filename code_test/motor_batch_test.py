@@ -0,0 +1,95 @@
+import os
+import sys
+import time
+import threading
+
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(current_dir)
+
+from utils.lego_motor.lego_motor_utils import (
+    _plan_command_lanes,
+    add_command_listener,
+    execute_motor_command_dict,
+    execute_motor_commands,
+    release_all_ports,
+    remove_command_listener,
+    shutdown_motor_workers,
+)
+
+def check(name, passed, detail=''):
+    print(f"{name}: {'通过' if passed else '失败'} {detail}")
+    return passed
+
+def main():
+    ok = True
+    try:
+        # 1. 通道划分：创建电机单独成为一个阶段，同一端口的命令在同一通道中保持顺序
+        batch = [
+            {'type': 'create_multiple_motors', 'ports': ['A', 'B', 'C'], 'backend': 'sim'},
+            {'type': 'run_for_turns', 'port': 'A', 'turns': 0.5},
+            {'type': 'run_for_turns', 'port': 'B', 'turns': 0.5},
+            {'type': 'get_position', 'port': 'A'},
+            {'type': 'get_motors_positions', 'ports': ['B', 'C']},
+        ]
+        stages = _plan_command_lanes(batch)
+        ok &= check("通道划分", stages == [[[0]], [[1, 3], [2, 4]]], f"{stages}")
+
+        # 2. 在模拟电机上执行：不同端口并发，同一端口按顺序
+        execute_motor_command_dict(batch[0])
+        start = time.perf_counter()
+        execute_motor_command_dict({'type': 'run_for_turns', 'port': 'A', 'turns': 0.5})
+        single = time.perf_counter() - start
+
+        # 记录执行每条命令的线程，以及执行期间存在的线程
+        seen = []
+        listener = add_command_listener(
+            lambda command_type, command: seen.append((threading.current_thread(), threading.enumerate())))
+        start = time.perf_counter()
+        result = execute_motor_commands(batch)
+        elapsed = time.perf_counter() - start
+        remove_command_listener(listener)
+        results = result['results']
+        # A 先转半圈再读位置：读到的是单独运行一次之后再转半圈的位置
+        position_a = results[3]['position']
+        positions_bc = results[4]['positions']
+        ok &= check("同一端口按顺序", 340 <= position_a <= 380 and 170 <= positions_bc[0] <= 190
+                    and positions_bc[1] == 0, f"A {position_a}°, B/C {positions_bc}")
+        ok &= check("不同端口并发", elapsed < single * 1.5,
+                    f"单个电机半圈 {single * 1000:.0f} ms, A、B 各半圈共 {elapsed * 1000:.0f} ms")
+        extra = {thread.name for _, threads in seen for thread in threads
+                 if thread is not threading.main_thread() and not thread.name.startswith('motor-worker-')}
+        ok &= check("不创建通道线程", len(seen) == len(batch) and not extra
+                    and all(thread is threading.main_thread() for thread, _ in seen), f"其它线程 {sorted(extra)}")
+        ok &= check("汇总结果", result['success'] and result['failed'] == 0 and len(results) == len(batch)
+                    and all(r['success'] for r in results), result['message'])
+
+        # 3. 出错：结果按输入顺序，失败条数计入汇总；stop_on_error 只跳过同一通道中之后的命令
+        batch = [
+            {'type': 'run_for_turns', 'port': 'E', 'turns': 0.1},
+            {'type': 'get_position', 'port': 'A'},
+            {'type': 'no_such_command'},
+            {'type': 'get_speed', 'port': 'E'},
+            {'type': 'get_speed', 'port': 'B'},
+        ]
+        result = execute_motor_commands(batch, stop_on_error=True)
+        results = result['results']
+        errors = [r.get('error') for r in results]
+        ok &= check("错误汇总", not result['success'] and result['failed'] == 3
+                    and errors[0] == '电机 E 未创建' and errors[3] == '前序命令失败，已跳过'
+                    and errors[2] == '未知命令类型: no_such_command'
+                    and results[1]['success'] and results[4]['success'], f"{errors}")
+
+        result = execute_motor_commands(batch)
+        ok &= check("不跳过时逐条执行", result['failed'] == 3 and result['results'][3]['error'] == '电机 E 未创建',
+                    result['message'])
+
+        result = execute_motor_commands('[{"type": "get_speed"')
+        ok &= check("JSON格式错误", result == {'success': False, 'error': 'JSON格式错误'})
+    finally:
+        release_all_ports()
+        shutdown_motor_workers()
+
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import os
+import sys
+import time
+
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(current_dir)
+
+from utils.lego_motor.motor_backend import (
+    configure_simulated_motors,
+    get_serial_bus_writes,
+    reset_serial_bus_writes,
+    sim_time,
+)
+from utils.lego_motor.lego_motor_utils import (
+    create_multiple_motors,
+    get_motors_positions,
+    get_motors_speeds,
+    release_all_ports,
+    run_for_distance,
+    run_for_turns,
+    run_forever,
+    run_motors_for_distances,
+    run_motors_for_turns,
+    run_motors_forever,
+    run_motors_to_positions,
+    run_to_position,
+    shutdown_motor_workers,
+    stop_motors,
+)
+
+# 模拟时间比真实时间快的倍数
+TIME_SCALE = 20.0
+
+def bench(name, func, repeat=5):
+    """执行 func 若干次，统计模拟时间、真实时间和串口命令数"""
+    reset_serial_bus_writes()
+    sim_start = sim_time()
+    real_start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    real_elapsed = (time.perf_counter() - real_start) / repeat
+    sim_elapsed = (sim_time() - sim_start) / repeat
+    writes = get_serial_bus_writes() / repeat
+    print(f"{name:<28}{sim_elapsed * 1000:>12.1f}{real_elapsed * 1000:>12.2f}{writes:>10.1f}")
+
+def main():
+    configure_simulated_motors(time_scale=TIME_SCALE)
+    release_all_ports()
+    motors = create_multiple_motors(['A', 'B', 'C', 'D'], backend='sim')
+    motor = motors[0]
+
+    print(f"模拟电机后端，时间流速 {TIME_SCALE:.0f}x（每项为单次调用的平均值）")
+    print(f"{'函数':<28}{'模拟耗时ms':>12}{'真实耗时ms':>12}{'串口命令':>10}")
+
+    bench("run_for_turns", lambda: run_for_turns(motor, 1, 50))
+    bench("run_to_position", lambda: run_to_position(motor, 90, 50))
+    bench("run_for_distance", lambda: run_for_distance(motor, 17.5, 50))
+    bench("run_forever + stop", lambda: (run_forever(motor, 50), motor.stop()))
+    bench("run_motors_for_turns", lambda: run_motors_for_turns(motors, 1, [50] * 4, [1, -1, 1, -1]))
+    bench("run_motors_to_positions", lambda: run_motors_to_positions(motors, [90, 180, 270, 0], [50] * 4))
+    bench("run_motors_for_distances", lambda: run_motors_for_distances(motors, [17.5] * 4, [50] * 4, [1, -1, 1, -1]))
+    bench("run_motors_forever", lambda: [f.result() for f in run_motors_forever(motors, [50] * 4).futures])
+    bench("stop_motors", lambda: stop_motors(motors))
+    bench("get_motors_speeds", lambda: get_motors_speeds(motors), repeat=50)
+    bench("get_motors_positions", lambda: get_motors_positions(motors), repeat=50)
+
+    # 一圈 = 360 度，四个电机都应在目标附近（到位后刹车会有少量过冲）
+    before = [m.motor.true_position() for m in motors]
+    run_motors_for_turns(motors, 1, [50] * 4)
+    errors = [m.motor.true_position() - b - 360 for m, b in zip(motors, before)]
+    print(f"\nrun_motors_for_turns(1圈, 速度50) 到位误差（度）: {[round(e, 1) for e in errors]}")
+
+    shutdown_motor_workers()
+    for m in motors:
+        m.release()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import os
+import sys
+import time
+import types
+import threading
+import statistics
+
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(current_dir)
+
+class FakeMotor:
+    """模拟buildhat.Motor，串口命令耗时固定"""
+    def __init__(self, port, command_latency=0.0005):
+        self.port = port
+        self.command_latency = command_latency
+        self.position = 0
+
+    def _serial_write(self):
+        time.sleep(self.command_latency)
+
+    def start(self, speed=None):
+        self._serial_write()
+
+    def stop(self):
+        self._serial_write()
+
+    def run_for_degrees(self, degrees, speed=None, blocking=True):
+        self._serial_write()
+        self.position += int(degrees)
+
+    def run_to_position(self, degrees, speed=None, blocking=True, direction="shortest"):
+        self._serial_write()
+        self.position = int(degrees)
+
+    def get_position(self):
+        return self.position
+
+    def get_speed(self):
+        return 0
+
+# 在导入电机工具前替换buildhat模块
+sys.modules['buildhat'] = types.SimpleNamespace(Motor=FakeMotor)
+
+from utils.lego_motor.lego_motor_utils import (
+    create_multiple_motors,
+    release_all_ports,
+    run_motors_for_turns,
+    shutdown_motor_workers,
+    stop_motors,
+)
+
+def stop_motors_per_call_threads(motors):
+    """旧实现：每次调用为每个电机创建一个线程"""
+    threads = [threading.Thread(target=motor.stop) for motor in motors]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+def measure(func, motors, iterations):
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func(motors)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return {
+        'mean': statistics.mean(latencies),
+        'p50': latencies[len(latencies) // 2],
+        'p99': latencies[int(len(latencies) * 0.99) - 1],
+        'max': latencies[-1],
+    }
+
+def print_result(name, result):
+    print(f"{name:<28} 平均 {result['mean']:.3f} ms | p50 {result['p50']:.3f} ms | "
+          f"p99 {result['p99']:.3f} ms | 最大 {result['max']:.3f} ms")
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    release_all_ports()
+    motors = create_multiple_motors(['A', 'B', 'C', 'D'])
+
+    # 预热工作线程
+    stop_motors(motors)
+
+    print(f"四电机 stop 命令延迟（{iterations} 次）")
+    print_result("每次调用创建线程", measure(stop_motors_per_call_threads, motors, iterations))
+    print_result("常驻工作线程", measure(stop_motors, motors, iterations))
+
+    print(f"\n四电机 run_for_turns 命令延迟（{iterations} 次）")
+    print_result("常驻工作线程", measure(lambda m: run_motors_for_turns(m, 0.1), motors, iterations))
+
+    shutdown_motor_workers()
+    for motor in motors:
+        motor.release()
+
+if __name__ == "__main__":
+    main()
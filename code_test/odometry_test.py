@@ -0,0 +1,105 @@
+import os
+import sys
+import math
+import time
+import argparse
+import numpy as np
+
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(current_dir)
+
+from utils.lego_motor.motor_backend import BACKEND_SIMULATED, sim_sleep
+from utils.lego_motor.lego_motor_utils import (create_multiple_motors, get_motors_positions, run_motors_for_distances_async,
+                                               release_all_ports, shutdown_motor_workers)
+from utils.lego_motor.mecanum import MecanumDrive, WHEEL_PORTS
+from utils.lego_motor.odometry import OdometryService
+
+# (说明, vx, vy, omega, 持续秒数)，每段之后停车
+PATH = [
+    ("前进", 50, 0, 0, 1.0),
+    ("左平移", 0, 50, 0, 1.0),
+    ("左转", 0, 0, 30, 0.8),
+    ("前进", 50, 0, 0, 1.0),
+    ("右平移", 0, -50, 0, 0.5),
+]
+
+def true_positions(motors):
+    return np.array([motor.motor.true_position() for motor in motors])
+
+def main():
+    parser = argparse.ArgumentParser(description="里程计精度与读取抖动测试（模拟电机）")
+    parser.add_argument('--rate', type=float, default=50, help="读取频率（Hz）")
+    args = parser.parse_args()
+
+    motors = create_multiple_motors(list(WHEEL_PORTS), backend=BACKEND_SIMULATED)
+    car = MecanumDrive(motors)
+    odometry = OdometryService(motors, rate_hz=args.rate)
+
+    # 读取耗时：空闲时与阻塞运动执行中
+    start = time.perf_counter()
+    for _ in range(50):
+        get_motors_positions(motors)
+    idle_ms = (time.perf_counter() - start) / 50 * 1000
+    handle = run_motors_for_distances_async(motors, [30] * 4)
+    sim_sleep(0.1)
+    start = time.perf_counter()
+    positions = get_motors_positions(motors)
+    moving_ms = (time.perf_counter() - start) * 1000
+    moving = not handle.done()
+    handle.cancel()
+    sim_sleep(0.2)
+    print(f"读取四个编码器: 空闲 {idle_ms:.2f} ms, 运动执行中 {moving_ms:.2f} ms {positions}")
+    # 读取不排在运动命令后面
+    assert moving and moving_ms < 50
+
+    # 参考位姿：每段只有一种运动，用模拟电机的精确位置分段计算
+    truth = np.zeros(3)
+    try:
+        with odometry:
+            for name, vx, vy, omega, duration in PATH:
+                before = true_positions(motors)
+                car.drive(vx, vy, omega)
+                sim_sleep(duration)
+                car.stop()
+                sim_sleep(0.3)
+                travel = (true_positions(motors) - before) * odometry.cm_per_degree
+                dx, dy, dtheta = odometry.inverse_kinematics @ travel
+                heading = truth[2] + dtheta / 2
+                truth += (dx * math.cos(heading) - dy * math.sin(heading),
+                          dx * math.sin(heading) + dy * math.cos(heading),
+                          dtheta)
+
+                pose = odometry.pose
+                error = math.hypot(pose.x - truth[0], pose.y - truth[1])
+                print(f"{name:4s} 估计 ({pose.x:7.2f}, {pose.y:7.2f}, {math.degrees(pose.theta):6.1f}°)  "
+                      f"参考 ({truth[0]:7.2f}, {truth[1]:7.2f}, {math.degrees(truth[2]):6.1f}°)  "
+                      f"位置误差 {error:.2f} cm")
+
+        history = odometry.history()
+        stats = odometry.jitter_stats()
+        print(f"历史位姿 {len(history)} 条, 读取 {stats['polls']} 次, 错误 {stats['errors']}, 超时 {stats['overruns']}")
+        assert stats['errors'] == 0
+        print(f"周期 {stats['period_ms']:.1f} ms: 实际 {stats['interval_mean_ms']:.2f} ± {stats['interval_std_ms']:.2f} ms, "
+              f"抖动 p99 {stats['jitter_p99_ms']:.2f} ms / 最大 {stats['jitter_max_ms']:.2f} ms, "
+              f"读取耗时 {stats['latency_mean_ms']:.2f} ms (最大 {stats['latency_max_ms']:.2f} ms)")
+
+        # 阻塞运动（run_for_degrees）执行期间里程计照常读取
+        with OdometryService(motors, rate_hz=args.rate) as moving_odometry:
+            handle = run_motors_for_distances_async(motors, [30] * 4)
+            sim_sleep(0.5)
+            polls = moving_odometry.polls
+            handle.result()
+        print(f"阻塞运动执行 0.5 秒内读取 {polls} 次, 错误 {moving_odometry.poll_errors}")
+        assert polls >= 10 and moving_odometry.poll_errors == 0
+
+        # 无锁读取：另一线程高频读取快照的开销
+        start = time.perf_counter()
+        for _ in range(100000):
+            pose = odometry.pose
+        print(f"读取位姿快照 {(time.perf_counter() - start) / 100000 * 1e9:.0f} ns/次")
+    finally:
+        release_all_ports()
+        shutdown_motor_workers()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+import argparse
+import numpy as np
+import cv2
+
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(current_dir)
+
+from utils.camera.frame_capture import FakeFrameSource
+from utils.camera.recording import FrameRecorder, FrameRecordingReader, import_image_directory
+
+def make_frames(count, size):
+    source = FakeFrameSource(size=size, fps=0, noise=True)
+    frames = [source.capture_array() for _ in range(count)]
+    base = time.time()
+    timestamps = [base + i / 30.0 for i in range(count)]
+    return frames, timestamps
+
+def bench_png_write(frames, timestamps, png_dir):
+    # 与旧版 ssh_camera_test.py 相同的命名方式
+    start = time.perf_counter()
+    for frame, timestamp in zip(frames, timestamps):
+        name = time.strftime("%Y%m%d_%H%M%S", time.localtime(timestamp)) + f"_{int(timestamp % 1 * 1e6):06d}"
+        cv2.imwrite(os.path.join(png_dir, f"image_{name}.png"), frame)
+    return time.perf_counter() - start
+
+def bench_png_replay(png_dir):
+    start = time.perf_counter()
+    names = sorted(os.listdir(png_dir))
+    checksum = 0
+    for name in names:
+        frame = cv2.imread(os.path.join(png_dir, name))
+        checksum += int(frame[0, 0, 0])
+    return time.perf_counter() - start, len(names)
+
+def bench_recording_write(frames, timestamps, path):
+    start = time.perf_counter()
+    with FrameRecorder(path, frames[0].shape, frames[0].dtype) as recorder:
+        for frame, timestamp in zip(frames, timestamps):
+            recorder.append(frame, timestamp)
+    return time.perf_counter() - start
+
+def bench_recording_replay(path):
+    start = time.perf_counter()
+    with FrameRecordingReader(path) as reader:
+        # 帧本身是零拷贝视图，这里复制到缓冲区，保证每帧数据都从磁盘/页缓存完整读出一次
+        buffer = np.empty(reader.shape, dtype=reader.dtype)
+        for frame, timestamp in reader:
+            np.copyto(buffer, frame)
+        count = len(reader)
+    return time.perf_counter() - start, count
+
+def bench_random_seek(path, seeks):
+    with FrameRecordingReader(path) as reader:
+        rng = np.random.default_rng(1)
+        times = rng.uniform(reader.start_time, reader.end_time, seeks)
+        start = time.perf_counter()
+        for t in times:
+            i, frame, ts = reader.frame_at_time(t)
+            assert ts <= t or i == 0
+        by_time = time.perf_counter() - start
+
+        indices = rng.integers(0, len(reader), seeks)
+        start = time.perf_counter()
+        for i in indices:
+            frame = reader[i]
+        by_index = time.perf_counter() - start
+    return by_time / seeks * 1e6, by_index / seeks * 1e6
+
+def dir_size(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+def main():
+    parser = argparse.ArgumentParser(description="录像格式与PNG目录的写入、回放速度对比")
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--width', type=int, default=640)
+    parser.add_argument('--height', type=int, default=480)
+    parser.add_argument('--seeks', type=int, default=10000)
+    args = parser.parse_args()
+
+    frames, timestamps = make_frames(args.frames, (args.width, args.height))
+    work_dir = tempfile.mkdtemp(prefix='recording_bench_')
+    png_dir = os.path.join(work_dir, 'camera_images')
+    rec_dir = os.path.join(work_dir, 'recording')
+    os.makedirs(png_dir)
+    os.makedirs(rec_dir)
+
+    try:
+        n = len(frames)
+        png_write = bench_png_write(frames, timestamps, png_dir)
+        rec_write = bench_recording_write(frames, timestamps, os.path.join(rec_dir, 'video'))
+
+        png_replay, png_count = bench_png_replay(png_dir)
+        rec_replay, rec_count = bench_recording_replay(os.path.join(rec_dir, 'video'))
+
+        print(f"{n} 帧 {args.width}x{args.height}")
+        print(f"PNG目录  写入 {n / png_write:8.1f} fps  回放 {png_count / png_replay:8.1f} fps  "
+              f"大小 {dir_size(png_dir) / (1 << 20):.1f} MB  文件数 {png_count}")
+        print(f"录像     写入 {n / rec_write:8.1f} fps  回放 {rec_count / rec_replay:8.1f} fps  "
+              f"大小 {dir_size(rec_dir) / (1 << 20):.1f} MB  文件数 {len(os.listdir(rec_dir))}")
+
+        by_time, by_index = bench_random_seek(os.path.join(rec_dir, 'video'), args.seeks)
+        print(f"随机定位  按时间 {by_time:.2f} us/次  按帧号 {by_index:.2f} us/次")
+
+        # PNG目录转换并校验
+        start = time.perf_counter()
+        imported = import_image_directory(png_dir, os.path.join(rec_dir, 'imported'))
+        elapsed = time.perf_counter() - start
+        with FrameRecordingReader(os.path.join(rec_dir, 'imported')) as reader:
+            same = all(np.array_equal(reader[i], frames[i]) for i in range(len(reader)))
+        print(f"PNG转换   {imported} 帧, {imported / elapsed:.1f} fps, 内容一致: {same}")
+
+        # 关闭读取器后，已取出的帧视图仍然可以读取
+        with FrameRecordingReader(os.path.join(rec_dir, 'video')) as reader:
+            view = reader[2]
+            _, seek_view, _ = reader.frame_at_time(timestamps[5])
+        assert np.array_equal(view, frames[2]) and np.array_equal(seek_view, frames[5])
+        # 空录像按时间定位返回None
+        FrameRecorder(os.path.join(rec_dir, 'empty'), frames[0].shape).close()
+        with FrameRecordingReader(os.path.join(rec_dir, 'empty')) as reader:
+            assert len(reader) == 0 and reader.frame_at_time(0.0) is None
+        print("关闭后帧视图可读，空录像定位返回None")
+    finally:
+        shutil.rmtree(work_dir)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import os
+import sys
+import time
+import random
+import tracemalloc
+
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(current_dir)
+
+from utils.communication.sse_parser import SSEParser, SSEParseError, SSEEvent
+
+def build_stream(event_count):
+    """生成合成事件流：包含多行data、注释、retry、\\r\\n换行和中文内容"""
+    parts = []
+    for i in range(event_count):
+        newline = '\r\n' if i % 3 == 0 else '\n'
+        if i % 50 == 0:
+            parts.append(f': heartbeat{newline}')
+        if i % 100 == 0:
+            parts.append(f'retry: 3000{newline}')
+        parts.append(f'id: {i}{newline}event: Message{newline}')
+        parts.append(f'data: {{"content": "第{i}条消息，电机运行 {i % 10} 圈", "node_is_finish": true}}{newline}')
+        if i % 7 == 0:
+            parts.append(f'data: {{"extra": {i}}}{newline}')
+        parts.append(newline)
+    return ''.join(parts).encode('utf-8')
+
+def split_chunks(data, min_size, max_size, seed=0):
+    """按随机大小切块，切点可能落在行中间、多字节字符中间或 \\r\\n 中间"""
+    rng = random.Random(seed)
+    chunks = []
+    pos = 0
+    while pos < len(data):
+        size = rng.randint(min_size, max_size)
+        chunks.append(data[pos:pos + size])
+        pos += size
+    return chunks
+
+def parse_all(chunks):
+    parser = SSEParser()
+    events = []
+    for chunk in chunks:
+        events.extend(parser.feed(chunk))
+    events.extend(parser.close())
+    return events
+
+def check_correctness():
+    data = build_stream(2000)
+    reference = parse_all([data])
+    assert len(reference) == 2000
+    assert reference[7].data.count('\n') == 1
+    assert reference[0].retry == 3000 and reference[-1].id == '1999'
+    for min_size, max_size in ((1, 1), (1, 7), (100, 5000)):
+        assert parse_all(split_chunks(data, min_size, max_size)) == reference
+
+    # 单行超长时报错，内存不会无限增长
+    parser = SSEParser(max_line_size=1024)
+    try:
+        for _ in range(100):
+            parser.feed(b'data: ' + b'x' * 100)
+    except SSEParseError:
+        pass
+    else:
+        raise AssertionError("应当抛出 SSEParseError")
+
+    # 没有以空行结尾的最后一个事件
+    assert parse_all([b'event: Done\ndata: {}']) == [SSEEvent('Done', '{}')]
+    print("正确性检查通过")
+
+def main():
+    event_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    check_correctness()
+
+    data = build_stream(event_count)
+    size_mb = len(data) / (1 << 20)
+    print(f"\n合成事件流: {event_count} 个事件, {size_mb:.1f} MB")
+
+    for min_size, max_size in ((4096, 4096), (16, 1500), (65536, 65536)):
+        chunks = split_chunks(data, min_size, max_size)
+        start = time.perf_counter()
+        events = parse_all(chunks)
+        elapsed = time.perf_counter() - start
+        assert len(events) == event_count
+        print(f"块大小 {min_size}-{max_size} 字节: {size_mb / elapsed:.1f} MB/s, "
+              f"{event_count / elapsed:,.0f} 事件/秒")
+
+    # 逐块解析并丢弃事件时的内存峰值，应与流的总长度无关
+    chunks = split_chunks(data, 4096, 4096)
+    tracemalloc.start()
+    parser = SSEParser()
+    for chunk in chunks:
+        parser.feed(chunk)
+    parser.close()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"流式解析内存峰值: {peak / 1024:.1f} KB")
+
+if __name__ == "__main__":
+    main()
@@ -1,52 +1,133 @@
-from picamera2 import Picamera2
-import time
-import numpy as np
-import cv2
 import os
-from datetime import datetime
+import sys
+import time
+import argparse
+
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(current_dir)
+
+from utils.camera.frame_capture import FrameCapture, FakeFrameSource, Picamera2Source
+from utils.camera.frame_writer import FrameWriter
+from utils.camera.frame_stream import FrameStreamServer
+from utils.camera.event_recorder import EventRecorder
+from utils.camera.motion_detector import MotionDetector
 
 def main():
+    parser = argparse.ArgumentParser(description="通过SSH使用摄像头时，将图像保存到磁盘")
+    parser.add_argument('--format', default='jpeg', choices=['jpeg', 'npy', 'raw'], help="保存格式")
+    parser.add_argument('--quality', type=int, default=90, help="JPEG质量")
+    parser.add_argument('--workers', type=int, default=2, help="编码线程数")
+    parser.add_argument('--queue-size', type=int, default=16, help="等待保存的最大帧数")
+    parser.add_argument('--drop-policy', default='drop_oldest', choices=['drop_oldest', 'drop_newest', 'block'])
+    parser.add_argument('--interval', type=float, default=0.0, help="两次保存之间的最小间隔（秒），0表示保存每一帧")
+    parser.add_argument('--fake', action='store_true', help="使用模拟帧源")
+    parser.add_argument('--duration', type=float, default=0.0, help="运行时间（秒），0表示一直运行")
+    parser.add_argument('--stream-port', type=int, default=0, help="MJPEG推流端口，浏览器打开 http://<IP>:<端口>/ 观看，0表示不推流")
+    parser.add_argument('--raw-port', type=int, default=0, help="原始帧TCP推流端口，0表示不启用")
+    parser.add_argument('--no-save', action='store_true', help="只推流，不保存到磁盘")
+    parser.add_argument('--events', action='store_true', help="只在有运动时保存录像（含触发前后的帧），代替连续保存")
+    parser.add_argument('--pre-roll', type=float, default=3.0, help="事件录像：触发前保留的秒数")
+    parser.add_argument('--post-roll', type=float, default=5.0, help="事件录像：触发后继续录制的秒数")
+    parser.add_argument('--quota-mb', type=float, default=0.0, help="事件录像目录的大小上限（MB），超出时删除最早的录像，0表示不限制")
+    args = parser.parse_args()
+
     # 初始化摄像头
-    picam2 = Picamera2()
-    
-    # 配置摄像头
-    camera_config = picam2.create_preview_configuration(main={"size": (640, 480)})
-    picam2.configure(camera_config)
-    
-    # 启动摄像头
-    picam2.start()
-    
+    if args.fake:
+        source = FakeFrameSource(size=(640, 480), fps=30)
+    else:
+        source = Picamera2Source(size=(640, 480))
+
     # 创建保存图片的目录
     save_dir = "camera_images"
-    if not os.path.exists(save_dir):
-        os.makedirs(save_dir)
-    
+
+    capture = FrameCapture(source, capacity=8).start()
+    writer = None
+    recorder = None
+    if args.events:
+        recorder = EventRecorder(
+            "event_recordings",
+            pre_roll=args.pre_roll,
+            post_roll=args.post_roll,
+            quota_bytes=int(args.quota_mb * (1 << 20)) or None,
+            capture=capture,
+            detector=MotionDetector(),
+        ).start()
+    elif not args.no_save:
+        writer = FrameWriter(
+            save_dir,
+            format=args.format,
+            jpeg_quality=args.quality,
+            workers=args.workers,
+            queue_size=args.queue_size,
+            drop_policy=args.drop_policy,
+        ).start()
+
+    server = None
+    if args.stream_port or args.raw_port:
+        server = FrameStreamServer(
+            capture,
+            http_port=args.stream_port or None,
+            raw_port=args.raw_port or None,
+            jpeg_quality=args.quality,
+        ).start()
+        for name, port in server.ports.items():
+            print(f"推流已启动: {'http://<树莓派IP>:%d/' % port if name == 'http' else 'TCP原始帧端口 %d' % port}")
+
     print("摄像头已启动，按 Ctrl+C 退出程序")
-    
+
+    start = time.time()
+    last_saved = 0.0
+    last_report = start
     try:
         while True:
-            # 捕获图像
-            frame = picam2.capture_array()
-            
-            # 打印图像信息
-            print(f"图像形状: {frame.shape}")
-            print(f"图像类型: {frame.dtype}")
-            print(f"图像值范围: [{frame.min()}, {frame.max()}]")
-            
-            # 保存图像为PNG格式
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-            filename = os.path.join(save_dir, f"image_{timestamp}.png")
-            cv2.imwrite(filename, frame)
-            print(f"已保存图片: {filename}")
-            
-            # 短暂延时以减少CPU使用
-            time.sleep(0.1)
-                
+            frame, timestamp, seq = capture.next_frame(timeout=1.0)
+            if frame is None:
+                continue
+
+            # 提交到后台保存，编码和写盘不阻塞采集
+            if writer is not None and timestamp - last_saved >= args.interval:
+                writer.submit(frame, timestamp)
+                last_saved = timestamp
+
+            now = time.time()
+            if now - last_report >= 1.0:
+                capture_stats = capture.stats()
+                line = f"图像形状: {frame.shape}"
+                if writer is not None:
+                    stats = writer.stats()
+                    line += (f" | 保存 {stats['written']} 帧 ({stats['fps']:.1f} fps), "
+                             f"丢弃 {stats['dropped']} 帧, 队列 {stats['pending']}, "
+                             f"平均编码 {stats['avg_encode_ms']:.1f} ms")
+                if recorder is not None:
+                    stats = recorder.stats()
+                    line += (f" | 事件录像 {stats['clips']} 段, 写入 {stats['bytes_written'] / (1 << 20):.1f} MB "
+                             f"(连续保存的 {stats['ratio']:.1%})")
+                if server is not None:
+                    stream_stats = server.stats()
+                    line += f" | 推流客户端 {len(stream_stats['clients'])}, 编码 {stream_stats['avg_encode_ms']:.1f} ms"
+                print(f"{line} | 采集跳过 {capture_stats['dropped']} 帧")
+                last_report = now
+
+            if args.duration and now - start >= args.duration:
+                break
+
     except KeyboardInterrupt:
         print("\n程序被用户中断")
     finally:
         # 清理资源
-        picam2.stop()
+        if server is not None:
+            server.stop()
+        if recorder is not None:
+            recorder.stop()
+            stats = recorder.stats()
+            print(f"共 {stats['clips']} 段事件录像, 写入 {stats['bytes_written'] / (1 << 20):.1f} MB, "
+                  f"连续保存需要 {stats['continuous_bytes'] / (1 << 20):.1f} MB")
+        capture.stop()
+        if writer is not None:
+            writer.close()
+            stats = writer.stats()
+            print(f"共保存 {stats['written']} 帧, 丢弃 {stats['dropped']} 帧, "
+                  f"写入 {stats['bytes'] / (1 << 20):.1f} MB, 平均 {stats['fps']:.1f} fps")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
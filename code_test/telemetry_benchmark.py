@@ -0,0 +1,98 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+import argparse
+import numpy as np
+
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(current_dir)
+
+from utils.lego_motor.motor_backend import BACKEND_SIMULATED, configure_simulated_motors
+from utils.lego_motor.lego_motor_utils import (create_multiple_motors, get_motors_positions,
+                                               release_all_ports, shutdown_motor_workers)
+from utils.lego_motor.drive_state import DriveState
+from utils.lego_motor.mecanum import WHEEL_PORTS
+from utils.lego_motor.telemetry import TelemetrySampler, load_telemetry
+
+def control_loop(drive_state, seconds, rate_hz=20):
+    """模拟遥控循环：每个节拍读取编码器并下发速度（每5个节拍变化一次），返回节拍耗时（毫秒）"""
+    latencies = []
+    period = 1.0 / rate_hz
+    end = time.perf_counter() + seconds
+    tick = 0
+    while time.perf_counter() < end:
+        started = time.perf_counter()
+        get_motors_positions(drive_state.motors)
+        drive_state.set_speeds([30 + tick // 5 % 20] * len(drive_state.motors), wait=True)
+        latencies.append((time.perf_counter() - started) * 1000)
+        tick += 1
+        time.sleep(max(0.0, period - (time.perf_counter() - started)))
+    return np.array(latencies)
+
+def main():
+    parser = argparse.ArgumentParser(description="遥测采样开销、堵转检测和写出测试（模拟电机）")
+    parser.add_argument('--seconds', type=float, default=3.0, help="每项测试的时长")
+    args = parser.parse_args()
+
+    # C 轮卡住：有指令但不转
+    configure_simulated_motors(gains={'C': 0.0})
+    motors = create_multiple_motors(list(WHEEL_PORTS), backend=BACKEND_SIMULATED)
+    drive_state = DriveState(motors)
+    flush_dir = tempfile.mkdtemp(prefix='telemetry_')
+
+    try:
+        # 1. 对 20 Hz 遥控循环的影响
+        print(f"{'采样频率':<10}{'控制节拍p50 ms':>16}{'p99 ms':>10}{'串口占用':>10}{'CPU':>8}{'单次采样ms':>12}{'降频':>6}{'实际Hz':>8}")
+        for rate in (0, 10, 20, 50):
+            sampler = TelemetrySampler(motors, rate_hz=rate) if rate else None
+            if sampler:
+                sampler.start()
+            latencies = control_loop(drive_state, args.seconds)
+            if sampler:
+                sampler.stop()
+                o = sampler.overhead()
+                print(f"{rate:<10d}{np.percentile(latencies, 50):>16.2f}{np.percentile(latencies, 99):>10.2f}"
+                      f"{o['duty']:>10.1%}{o['cpu']:>8.1%}{o['sample_mean_ms']:>12.2f}{o['throttles']:>6d}{o['rate_hz']:>8.1f}")
+            else:
+                print(f"{'关闭':<10}{np.percentile(latencies, 50):>16.2f}{np.percentile(latencies, 99):>10.2f}")
+
+        # 2. 堵转检测与定期写出
+        sampler = TelemetrySampler(motors, rate_hz=20, command_source=drive_state,
+                                   flush_dir=flush_dir, flush_interval=1.0)
+        with sampler:
+            drive_state.set_speeds([40] * 4, wait=True)
+            commanded_at = time.time()
+            detected_at = None
+            while time.time() - commanded_at < args.seconds:
+                stalls = sampler.detect_stalls(min_duration=0.5)
+                if stalls and detected_at is None:
+                    detected_at = time.time()
+                    print(f"\n检测到堵转: {stalls}（指令下发后 {detected_at - commanded_at:.2f} s）")
+                time.sleep(0.05)
+
+            start = time.perf_counter()
+            stats = sampler.stats(seconds=1.0)
+            query_ms = (time.perf_counter() - start) * 1000
+            for port, s in stats.items():
+                print(f"  {port}: 平均速度 {s['speed_mean']:6.1f}, 位置变化 {s['position_delta']:5d}°, 滞后 {s['lag']:5.1f}")
+            print(f"最近1秒统计耗时 {query_ms:.2f} ms")
+            drive_state.stop()
+
+        data = load_telemetry(flush_dir)
+        size = sum(os.path.getsize(os.path.join(flush_dir, f)) for f in os.listdir(flush_dir))
+        records = max(len(data['timestamp']), 1)
+        raw = sum(column.itemsize for column in data.values())
+        o = sampler.overhead()
+        print(f"写出 {o['flushes']} 个数据块, {len(data['timestamp'])} 条记录（采样 {o['samples']} 次 x 4 个电机）, "
+              f"文件 {size / records:.1f} 字节/条（数据 {raw} 字节/条，其余为每个数据块的文件头）, "
+              f"写出耗时共 {o['flush_ms']:.1f} ms, 丢弃 {o['dropped']}")
+    finally:
+        shutil.rmtree(flush_dir, ignore_errors=True)
+        release_all_ports()
+        shutdown_motor_workers()
+        configure_simulated_motors(gains={})
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import os
+import sys
+import pty
+import time
+import select
+import threading
+import subprocess
+
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(current_dir)
+
+from utils.teleop.keyboard import KeyReader, FixedRateTicker
+
+REPEAT_DELAY = 0.5       # 模拟系统按键重复延迟
+REPEAT_INTERVAL = 0.033  # 模拟系统按键重复间隔
+
+def hold_key(master, key, duration):
+    """模拟按住按键：先发一个字符，等待重复延迟后按间隔重复；返回最后一个字符的发送时间"""
+    os.write(master, key.encode())
+    last = time.monotonic()
+    end = last + duration
+    time.sleep(REPEAT_DELAY)
+    while time.monotonic() < end:
+        os.write(master, key.encode())
+        last = time.monotonic()
+        time.sleep(REPEAT_INTERVAL)
+    return last
+
+def tap_key(master, key):
+    os.write(master, key.encode())
+    return time.monotonic()
+
+def test_key_reader():
+    master, slave = pty.openpty()
+    sent = {}
+
+    def feeder():
+        time.sleep(0.1)
+        sent['w'] = hold_key(master, 'w', 1.5)
+        time.sleep(1.0)
+        sent['a'] = tap_key(master, 'a')
+        time.sleep(1.0)
+        hold_key(master, 's', 0.8)
+        sent['d'] = hold_key(master, 'd', 0.8)
+        time.sleep(0.5)
+        os.write(master, b'p')
+
+    timeline = []
+    thread = threading.Thread(target=feeder, daemon=True)
+    with KeyReader(fd=slave) as reader:
+        thread.start()
+        ticker = FixedRateTicker(100)
+        while True:
+            keys = reader.read_keys(ticker.remaining())
+            if keys and 'p' in keys:
+                break
+            if ticker.due():
+                timeline.append((time.monotonic(), reader.held_key()))
+    thread.join()
+    os.close(master)
+    os.close(slave)
+
+    # 每个按键：按住期间是否被误判为松开，以及松开检测延迟
+    def segments(key):
+        runs, start = [], None
+        for i, (t, k) in enumerate(timeline):
+            if k == key and start is None:
+                start = t
+            if k != key and start is not None:
+                runs.append((start, t))
+                start = None
+        return runs
+
+    ok = True
+    for key, expected_runs in (('w', 1), ('a', 1), ('s', 1), ('d', 1)):
+        runs = segments(key)
+        detail = ''
+        if key in sent and runs:
+            detail = f"，松开检测延迟 {(runs[-1][1] - sent[key]) * 1000:.0f} ms"
+        passed = len(runs) == expected_runs
+        ok = ok and passed
+        print(f"按键 {key}: 按住区间 {len(runs)} 段（期望 {expected_runs}）{detail} {'通过' if passed else '失败'}")
+    print(f"控制节拍 {len(timeline)} 次, 超时 {ticker.overruns} 次")
+    return ok
+
+def test_car_control():
+    """在伪终端中运行 car_control.py --sim，检查按住前进、松开停止、p 退出"""
+    master, slave = pty.openpty()
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'car_control.py'),
+         '--sim', '--verbose'],
+        stdin=slave, stdout=slave, stderr=slave, close_fds=True)
+    os.close(slave)
+
+    output = b''
+
+    def read_until(text, timeout):
+        nonlocal output
+        deadline = time.monotonic() + timeout
+        while text.encode() not in output and time.monotonic() < deadline:
+            readable, _, _ = select.select([master], [], [], 0.05)
+            if readable:
+                try:
+                    output += os.read(master, 4096)
+                except OSError:
+                    break
+        return text.encode() in output
+
+    ok = read_until("松开按键后小车会自动停止", 10)
+    hold_key(master, 'w', 1.0)
+    ok = read_until("向前移动", 2) and ok
+    released = time.monotonic()
+    ok = read_until("动作: 停止", 2) and ok
+    print(f"car_control: 松开后 {(time.monotonic() - released) * 1000:.0f} ms 内停止")
+    os.write(master, b'p')
+    ok = read_until("程序已退出", 5) and ok
+    proc.wait(timeout=5)
+    os.close(master)
+
+    print(f"car_control 伪终端测试 {'通过' if ok and proc.returncode == 0 else '失败'}")
+    if not ok:
+        print(output.decode(errors='replace'))
+    return ok
+
+def main():
+    ok = test_key_reader()
+    ok = test_car_control() and ok
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
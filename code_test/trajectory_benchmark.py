@@ -0,0 +1,110 @@
+import os
+import sys
+import time
+import threading
+import argparse
+import numpy as np
+
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(current_dir)
+
+from utils.lego_motor.motor_backend import BACKEND_SIMULATED, sim_sleep
+from utils.lego_motor.lego_motor_utils import (create_multiple_motors, run_motors_for_turns,
+                                               release_all_ports, shutdown_motor_workers)
+from utils.lego_motor.mecanum import WHEEL_PORTS
+from utils.lego_motor.trajectory import PROFILE_S_CURVE, PROFILE_TRAPEZOID, TrajectoryFollower
+
+class Sampler:
+    """后台以固定频率记录各电机的精确位置"""
+    def __init__(self, motors, rate_hz=500):
+        self.motors = motors
+        self.period = 1.0 / rate_hz
+        self.times = []
+        self.samples = []
+        self._running = threading.Event()
+
+    def _positions(self):
+        return [m.motor.true_position() for m in self.motors]
+
+    def __enter__(self):
+        self.start = np.array(self._positions())
+        self.started_at = time.perf_counter()
+        self._running.set()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        # 记录刹车后的滑行
+        time.sleep(0.1)
+        self._running.clear()
+        self._thread.join()
+
+    def _run(self):
+        while self._running.is_set():
+            self.times.append(time.perf_counter() - self.started_at)
+            self.samples.append(self._positions())
+            time.sleep(self.period)
+
+def report(name, sampler, target, call_s, tolerance=2.0):
+    times = np.array(sampler.times)
+    travel = np.array(sampler.samples) - sampler.start
+    # 到达时间：所有电机都进入目标误差范围的最早时刻
+    reached = np.all(travel >= target - tolerance, axis=1)
+    reach_s = times[np.argmax(reached)] if reached.any() else float('nan')
+    overshoot = max(float((travel - target).max()), 0.0)
+    final = np.abs(travel[-1] - target).max()
+    # 用 20 ms（一个控制节拍）间隔的差分估计峰值加速度，反映起步和刹车的冲击
+    step = max(1, int(round(0.02 / np.median(np.diff(times)))))
+    t = times[::step]
+    velocity = np.diff(travel[::step], axis=0) / np.diff(t)[:, None]
+    acceleration = np.abs(np.diff(velocity, axis=0)) / np.diff(t)[1:, None]
+    print(f"{name:14s}{call_s:>9.2f}{reach_s:>9.2f}{overshoot:>9.1f}{final:>9.1f}{acceleration.max():>12.0f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="恒速 run_motors_for_turns 与平滑轨迹的对比（模拟电机）")
+    parser.add_argument('--turns', type=float, default=2.0)
+    parser.add_argument('--acceleration', type=float, default=2000.0, help="轨迹最大加速度（度/秒²）")
+    args = parser.parse_args()
+
+    motors = create_multiple_motors(list(WHEEL_PORTS), backend=BACKEND_SIMULATED)
+    follower = TrajectoryFollower(motors)
+    target = args.turns * 360
+
+    try:
+        for speed in (50, 90):
+            print(f"\n{args.turns} 圈, 速度 {speed}")
+            print(f"{'方式':14s}{'用时s':>9}{'到达s':>9}{'过冲°':>9}{'终差°':>9}{'峰值加速度':>12}")
+            with Sampler(motors) as sampler:
+                start = time.perf_counter()
+                run_motors_for_turns(motors, args.turns, [speed] * 4)
+                call_s = time.perf_counter() - start
+            report("恒速", sampler, target, call_s)
+            sim_sleep(0.2)
+
+            for profile in (PROFILE_TRAPEZOID, PROFILE_S_CURVE):
+                with Sampler(motors) as sampler:
+                    start = time.perf_counter()
+                    result = follower.run_for_turns(args.turns, speed, acceleration=args.acceleration,
+                                                    profile=profile).result()
+                    call_s = time.perf_counter() - start
+                report(profile, sampler, target, call_s)
+                sim_sleep(0.2)
+            print(f"  (S曲线规划时长 {result['planned_duration']:.2f} s, 最大跟踪误差 "
+                  f"{result['max_tracking_error']:.1f}°, 控制节拍 {result['ticks']} 次)")
+
+        # 取消后立即提交新轨迹，取消不会被新轨迹清除
+        running = follower.run_for_turns(args.turns, 50)
+        sim_sleep(0.3)
+        follower.cancel()
+        after = follower.run_for_degrees([90] * 4, 50)
+        aborted, after = running.result(), after.result()
+        print(f"\n取消后提交新轨迹: 原轨迹中止 {not aborted['success']}, 新轨迹完成 {after['success']}")
+        assert not aborted['success'] and after['success']
+    finally:
+        follower.shutdown()
+        release_all_ports()
+        shutdown_motor_workers()
+
+if __name__ == "__main__":
+    main()
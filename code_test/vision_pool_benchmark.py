@@ -0,0 +1,111 @@
+import os
+import sys
+import time
+import argparse
+import multiprocessing
+import numpy as np
+import cv2
+
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(current_dir)
+
+from utils.camera.vision_pool import VisionWorkerPool, Resize, ConvertColor, ColorBlobDetect, JpegEncode
+
+PIPELINES = {
+    'resize+gray': [Resize((320, 240)), ConvertColor(cv2.COLOR_BGR2GRAY)],
+    'detect': [ColorBlobDetect((40, 100, 100), (80, 255, 255))],
+    'jpeg': [JpegEncode(80)],
+}
+
+def make_frames(count, size=(640, 480), seed=0):
+    """带纹理的合成帧，一个绿色方块从左向右移动"""
+    rng = np.random.default_rng(seed)
+    width, height = size
+    coarse = rng.integers(0, 256, (24, 32, 3), dtype=np.uint8)
+    scene = cv2.resize(coarse, size, interpolation=cv2.INTER_CUBIC)
+    frames = []
+    for i in range(count):
+        frame = scene.copy()
+        x = int(i / count * (width - 60))
+        frame[200:260, x:x + 60] = (40, 220, 40)
+        frames.append(frame)
+    return frames
+
+def run_chain(processors, frame):
+    value = frame
+    for processor in processors:
+        value = processor(value)
+    return value
+
+_pickle_processors = None
+
+def _pickle_init(processors):
+    global _pickle_processors
+    cv2.setNumThreads(1)
+    _pickle_processors = processors
+
+def _pickle_task(frame):
+    return run_chain(_pickle_processors, frame)
+
+def inline_fps(processors, frames, rounds):
+    cv2.setNumThreads(1)
+    start = time.perf_counter()
+    results = [run_chain(processors, frame) for _ in range(rounds) for frame in frames]
+    return len(results) / (time.perf_counter() - start), results[:len(frames)]
+
+def pool_fps(processors, frames, rounds, workers):
+    pool = VisionWorkerPool(processors, frames[0].shape, workers=workers).start()
+    try:
+        # 预热：工作进程导入OpenCV
+        list(pool.map(frames[:workers]))
+        cpu = time.process_time()
+        start = time.perf_counter()
+        results = list(pool.map(frame for _ in range(rounds) for frame in frames))
+        elapsed = time.perf_counter() - start
+        cpu = (time.process_time() - cpu) / elapsed
+        stats = pool.stats()
+    finally:
+        pool.stop()
+    seqs = [result.seq for result in results]
+    assert seqs == sorted(seqs) and len(seqs) == len(frames) * rounds
+    return len(results) / elapsed, results[:len(frames)], stats, cpu, len({result.worker for result in results})
+
+def pickle_fps(processors, frames, rounds, workers):
+    with multiprocessing.Pool(workers, initializer=_pickle_init, initargs=(processors,)) as pool:
+        list(pool.imap(_pickle_task, frames[:workers]))
+        start = time.perf_counter()
+        results = list(pool.imap(_pickle_task, (frame for _ in range(rounds) for frame in frames)))
+        return len(results) / (time.perf_counter() - start)
+
+def same_result(a, b):
+    if isinstance(a, np.ndarray):
+        return np.array_equal(a, b)
+    return a == b
+
+def main():
+    parser = argparse.ArgumentParser(description="多进程帧处理池 1..N 个工作进程的吞吐量（合成 640x480 帧）")
+    parser.add_argument('--frames', type=int, default=60, help="不同帧的数量")
+    parser.add_argument('--rounds', type=int, default=5, help="每种情况重复处理的轮数")
+    parser.add_argument('--max-workers', type=int, default=max(4, os.cpu_count() or 1))
+    args = parser.parse_args()
+
+    frames = make_frames(args.frames)
+    print(f"CPU核数: {os.cpu_count()}, 每种情况处理 {args.frames * args.rounds} 帧")
+    print(f"{'处理链':<14}{'方式':<12}{'进程':>5}{'fps':>9}{'加速比':>8}{'主进程CPU':>10}{'复制ms':>8}{'处理ms':>8}{'用到进程':>9}")
+    for name, processors in PIPELINES.items():
+        base_fps, expected = inline_fps(processors, frames, args.rounds)
+        print(f"{name:<14}{'单线程':<12}{1:>5d}{base_fps:>9.1f}{1.0:>8.2f}")
+        for workers in range(1, args.max_workers + 1):
+            fps, results, stats, cpu, used = pool_fps(processors, frames, args.rounds, workers)
+            # 结果按送入顺序返回，且与单线程处理一致
+            assert all(same_result(r.value, e) for r, e in zip(results, expected))
+            print(f"{'':<14}{'共享内存池':<12}{workers:>5d}{fps:>9.1f}{fps / base_fps:>8.2f}{cpu:>10.0%}"
+                  f"{stats['copy_ms']:>8.2f}{stats['process_ms']:>8.2f}{used:>9d}")
+        fps = pickle_fps(processors, frames, args.rounds, args.max_workers)
+        print(f"{'':<14}{'Pool序列化':<12}{args.max_workers:>5d}{fps:>9.1f}{fps / base_fps:>8.2f}")
+    print("\n结果顺序与单线程处理结果一致")
+    if (os.cpu_count() or 1) < 2:
+        print("只有1个CPU核：多进程只增加了传递开销，加速比需要在多核设备（如4核的树莓派4/5）上测量")
+
+if __name__ == "__main__":
+    main()
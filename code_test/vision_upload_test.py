@@ -0,0 +1,123 @@
+import os
+import sys
+import time
+import asyncio
+import numpy as np
+import cv2
+
+current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(current_dir)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from coze_stub_server import start_stub_server
+from utils.camera.frame_capture import FrameCapture, FakeFrameSource
+from utils.communication.coze_client import CozeStreamClient
+from utils.communication.async_workflow_runner import AsyncWorkflowRunner
+from utils.communication.vision_upload import (VisionUploader, dhash, hamming_distance, encode_to_budget,
+                                               SOURCE_UPLOAD, SOURCE_DUPLICATE, SOURCE_CACHE)
+from utils.json_backend import json_loads
+
+WORKFLOW_ID = '7492954257341513755'
+
+def make_scene(seed, size=(640, 480)):
+    """平滑的随机场景，加上细节纹理，不同 seed 之间差别明显"""
+    rng = np.random.default_rng(seed)
+    coarse = rng.integers(0, 256, (12, 16, 3), dtype=np.uint8)
+    scene = cv2.resize(coarse, size, interpolation=cv2.INTER_CUBIC).astype(np.int16)
+    scene += rng.integers(-20, 21, scene.shape, dtype=np.int16)
+    return np.clip(scene, 0, 255).astype(np.uint8)
+
+def jitter(frame, seed, shift=3):
+    """同一场景的另一帧：平移几个像素并加传感器噪声"""
+    rng = np.random.default_rng(seed)
+    moved = np.roll(frame, shift, axis=1).astype(np.int16)
+    moved += rng.integers(-6, 7, moved.shape, dtype=np.int16)
+    return np.clip(moved, 0, 255).astype(np.uint8)
+
+def main():
+    server, base_url = start_stub_server()
+    client = CozeStreamClient(base_url=base_url, token='test-token')
+    scenes = {name: make_scene(seed) for seed, name in enumerate('ABCD')}
+
+    try:
+        print("1. 感知哈希")
+        a = scenes['A']
+        _, jpeg = cv2.imencode('.jpg', a, [cv2.IMWRITE_JPEG_QUALITY, 50])
+        same = {'平移+噪声': jitter(a, 1), 'JPEG压缩': cv2.imdecode(jpeg, cv2.IMREAD_COLOR),
+                '缩小一半': cv2.resize(a, (320, 240), interpolation=cv2.INTER_AREA)}
+        for name, frame in same.items():
+            distance = hamming_distance(dhash(a), dhash(frame))
+            print(f"  同一场景 {name}: 相差 {distance} 位")
+            assert distance <= 6
+        distances = [hamming_distance(dhash(scenes[x]), dhash(scenes[y])) for x in 'ABCD' for y in 'ABCD' if x < y]
+        print(f"  不同场景: 相差 {min(distances)} - {max(distances)} 位")
+        assert min(distances) > 12
+        start = time.perf_counter()
+        for _ in range(200):
+            dhash(a)
+        print(f"  640x480 单次 {(time.perf_counter() - start) / 200 * 1000:.3f} ms")
+
+        print("2. 按字节预算编码")
+        for budget in (16 * 1024, 32 * 1024, 64 * 1024, 128 * 1024):
+            start = time.perf_counter()
+            data, scale, quality, attempts = encode_to_budget(a, budget)
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"  预算 {budget // 1024:4d} KB: {len(data) / 1024:6.1f} KB, 缩放 {scale:.2f}, "
+                  f"质量 {quality}, 编码 {attempts} 次, {elapsed:.1f} ms")
+            assert len(data) <= budget
+
+        print("3. 去重与缓存")
+        vision = VisionUploader(client, max_bytes=32 * 1024)
+        sequence = [('A', 0), ('A', 1), ('B', 0), ('A', 2), ('C', 0), ('B', 1), ('B', 2)]
+        expected = [SOURCE_UPLOAD, SOURCE_DUPLICATE, SOURCE_UPLOAD, SOURCE_CACHE, SOURCE_UPLOAD, SOURCE_CACHE, SOURCE_DUPLICATE]
+        sources = []
+        for (name, variant), want in zip(sequence, expected):
+            frame = scenes[name] if variant == 0 else jitter(scenes[name], variant)
+            entry = vision.attach(frame)
+            sources.append(entry['source'])
+            print(f"  场景 {name}{variant}: {entry['source']:<9} {entry['file_id']} {entry['bytes'] / 1024:.1f} KB {entry['size']}")
+        assert sources == expected
+        assert len(server.uploads) == 3
+        assert all(len(data) <= 32 * 1024 for _, _, data in server.uploads)
+        assert server.uploads[0][2][:2] == b'\xff\xd8'  # JPEG
+        s = vision.stats()
+        print(f"  {s['frames']} 帧只上传 {s['uploads']} 次, 平均 {s['avg_upload_bytes'] / 1024:.1f} KB"
+              f"（原始帧的 {s['compression']:.1%}）, 编码 {s['avg_encode_ms']:.1f} ms, 上传 {s['avg_upload_ms']:.1f} ms")
+
+        print("4. 工作流运行和恢复时附带画面")
+        capture = FrameCapture(FakeFrameSource(size=(640, 480), fps=30), capacity=8).start()
+        try:
+            vision = VisionUploader(client, capture=capture, max_bytes=48 * 1024)
+            runner = AsyncWorkflowRunner(WORKFLOW_ID, client=client, command_handler=lambda command: {'success': True},
+                                         verbose=False, vision=vision)
+            before = len(server.requests)
+            asyncio.run(runner.run())
+        finally:
+            capture.stop()
+        (run_path, run_request), (resume_path, resume_request) = server.requests[before:before + 2]
+        assert run_path == '/v1/workflow/stream_run' and resume_path == '/v1/workflow/stream_resume'
+        run_image = json_loads(run_request['parameters']['image'])
+        resume = json_loads(resume_request['resume_data'])
+        print(f"  stream_run 参数: {run_request['parameters']}")
+        print(f"  stream_resume resume_data: {resume}")
+        assert run_request['parameters']['head_input'] == ''
+        assert run_image['file_id'].startswith('file_')
+        assert resume['text'] == 'next' and json_loads(resume['image'])['file_id'].startswith('file_')
+
+        print("5. 上传失败时不附带画面")
+        bad_client = CozeStreamClient(base_url=base_url + '/missing', token='test-token')
+        vision = VisionUploader(bad_client)
+        parameters = vision.run_parameters(frame=scenes['D'])
+        print(f"  参数: {parameters}")
+        assert parameters == {'head_input': ''} and vision.upload_errors == 1
+        assert vision.resume_data(frame=scenes['D']) == 'next'
+        bad_client.close()
+
+        print(f"\n共建立 {server.connections} 个TCP连接（上传与事件流共用连接池）")
+        print("所有测试通过！")
+    finally:
+        client.close()
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,422 @@
+import os
+import sys
+import json
+import math
+import time
+import collections
+import threading
+from datetime import datetime
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from utils.camera.frame_capture import FrameRingBuffer
+from utils.camera.recording import FrameRecorder, FRAMES_SUFFIX, INDEX_SUFFIX, HEADER_SUFFIX, INDEX_DTYPE
+
+# 触发来源
+TRIGGER_MOTION = 'motion'
+TRIGGER_MOTOR = 'motor'
+TRIGGER_API = 'api'
+
+# 查询类电机命令不会让车动起来，不触发录像
+MOTOR_QUERY_COMMANDS = frozenset((
+    'get_speed', 'get_position', 'get_motors_speeds', 'get_motors_positions',
+    'motion_status', 'get_motor_queue_stats',
+))
+
+EVENT_LOG = 'events.jsonl'
+CLIP_PREFIX = 'event_'
+
+class EventRecorder:
+    """
+    事件触发录像
+    最近几秒的帧保存在内存环形缓冲区中，只有触发时才把 [触发时间 - pre_roll, 触发时间 + post_roll]
+    内的帧写成一段录像（FrameRecorder 格式，可用 FrameRecordingReader 读取）。
+    时间上重叠的触发合并为同一段录像；目录总大小超出配额时从最早的录像开始删除。
+    每段录像结束后在目录下的 events.jsonl 追加一行说明（时间范围、帧数、触发来源）
+    """
+    def __init__(self, directory, pre_roll=3.0, post_roll=5.0, fps=30.0, quota_bytes=None,
+                 capture=None, detector=None):
+        """
+        :param directory: 录像目录
+        :param pre_roll: 触发前保留的秒数
+        :param post_roll: 触发后继续录制的秒数
+        :param fps: 预计帧率，用于确定内存环形缓冲区的大小（约 pre_roll + 1 秒的帧）
+        :param quota_bytes: 录像目录的大小上限（字节），为None时不限制
+        :param capture: 已启动的 FrameCapture，start() 后由后台线程跟随采集；为None时由调用方 feed() 送入帧
+        :param detector: MotionDetector，设置后每帧做运动检测，有运动时触发
+        """
+        self.directory = directory
+        self.pre_roll = pre_roll
+        self.post_roll = post_roll
+        self.fps = fps
+        self.quota_bytes = quota_bytes
+        self.capture = capture
+        self.detector = detector
+        os.makedirs(directory, exist_ok=True)
+
+        self._ring = None
+        # 写盘前先把帧复制到这里，复制完确认槽位没有被覆盖
+        self._scratch = None
+        # 待录制的时间窗口，每项为 [开始, 结束, {触发来源: 次数}]；第一项为正在录制的窗口
+        self._windows = collections.deque()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        # 当前录像下一个要处理的帧序号，以及还没有写入过任何录像的第一帧序号
+        self._cursor = 0
+        self._unwritten = 0
+        self._clip = None
+        self._clip_window = None
+        self._clip_first = None
+        # 目录中已有的录像 (路径, 字节数)，按时间从旧到新
+        self._stored = collections.deque(self._scan_clips())
+        self.clips = []
+
+        # 统计
+        self.frames_seen = 0
+        self.frames_written = 0
+        self.frames_dropped = 0      # 还没写出就被环形缓冲区覆盖的帧
+        self.frames_over_quota = 0   # 当前录像单独超出配额而没有写出的帧
+        self.bytes_written = 0
+        self.triggers = 0
+        self.merged = 0
+        self.evicted = 0
+
+        self._running = threading.Event()
+        self._follow_thread = None
+        self._write_thread = None
+        self._motor_listener = None
+
+    # 送入帧 -------------------------------------------------------------
+    def feed(self, frame, timestamp=None):
+        """
+        送入一帧：复制到内存环形缓冲区，设置了 detector 时做运动检测
+        没有调用 start() 时在当前线程中同步写盘
+        :param frame: 帧数组
+        :param timestamp: 时间戳（秒），为None时使用 time.time()
+        :return: 帧序号
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        if self._ring is None:
+            # 环形缓冲区要容纳 pre_roll 的帧，以及写盘落后和等待合并期间的帧
+            capacity = max(3, math.ceil((self.pre_roll + 1.0) * self.fps) + 2)
+            self._ring = FrameRingBuffer(capacity, frame.shape, frame.dtype)
+            self._scratch = np.empty(frame.shape, dtype=frame.dtype)
+        seq = self._ring.write(frame, timestamp)
+        self.frames_seen += 1
+
+        if self.detector is not None:
+            self.detector.process(frame, timestamp, seq)
+            if self.detector.active:
+                self.trigger(TRIGGER_MOTION, timestamp)
+
+        if self._write_thread is None:
+            self._drain()
+        else:
+            self._wake.set()
+        return seq
+
+    def trigger(self, reason=TRIGGER_API, timestamp=None):
+        """
+        触发录像，与正在等待或录制的时间窗口重叠时合并
+        :param reason: 触发来源，记录到事件日志中
+        :param timestamp: 触发时间（秒），为None时使用 time.time()
+        :return: None
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        start, end = timestamp - self.pre_roll, timestamp + self.post_roll
+        with self._lock:
+            self.triggers += 1
+            last = self._windows[-1] if self._windows else None
+            if last is not None and start <= last[1]:
+                if end > last[1]:
+                    last[1] = end
+                last[2][reason] = last[2].get(reason, 0) + 1
+                self.merged += 1
+            else:
+                self._windows.append([start, end, {reason: 1}])
+        self._wake.set()
+
+    def attach_motor_commands(self, ignored=MOTOR_QUERY_COMMANDS):
+        """
+        通过 execute_motor_command 执行的电机命令（查询类命令除外）触发录像
+        :param ignored: 不触发录像的命令类型
+        :return: None
+        """
+        from utils.lego_motor.lego_motor_utils import add_command_listener
+
+        def listener(command_type, command):
+            if command_type not in ignored:
+                self.trigger(TRIGGER_MOTOR)
+
+        self.detach_motor_commands()
+        self._motor_listener = add_command_listener(listener)
+
+    def detach_motor_commands(self):
+        """
+        停止由电机命令触发录像
+        :return: None
+        """
+        if self._motor_listener is not None:
+            from utils.lego_motor.lego_motor_utils import remove_command_listener
+            remove_command_listener(self._motor_listener)
+            self._motor_listener = None
+
+    # 写盘 ---------------------------------------------------------------
+    def _drain(self, final=False):
+        """
+        把时间窗口内、已经送入的帧写入录像
+        :param final: 为True时不再等待之后的帧，处理完已送入的帧就结束所有窗口
+        """
+        ring = self._ring
+        if ring is None:
+            return
+        while True:
+            latest = ring.write_seq - 1
+            with self._lock:
+                window = self._windows[0] if self._windows else None
+                if window is None:
+                    return
+            if self._clip is None:
+                self._open_clip(window)
+
+            cursor = self._cursor
+            if cursor > latest:
+                if not final:
+                    return
+                self._finish_window()
+                continue
+            oldest = max(0, ring.write_seq - ring.capacity + 1)
+            if cursor < oldest:
+                self.frames_dropped += oldest - cursor
+                self._cursor = cursor = oldest
+            frame, timestamp = ring.get(cursor)
+            if frame is None:
+                # 检查之后、读取之前被覆盖
+                self.frames_dropped += 1
+                self._cursor = cursor + 1
+                continue
+            # 复制期间写入端可能开始覆盖这个槽位，复制完仍然有效才说明帧和时间戳完整
+            np.copyto(self._scratch, frame)
+            if not ring.is_valid(cursor):
+                self.frames_dropped += 1
+                self._cursor = cursor + 1
+                continue
+            frame = self._scratch
+
+            with self._lock:
+                end = window[1]
+            if timestamp > end:
+                # 窗口之后的帧先不处理：等最新帧超过 结束 + pre_roll，之后的触发不可能再与这个窗口重叠
+                latest_timestamp = ring.timestamps[latest % ring.capacity]
+                if not final and latest_timestamp <= end + self.pre_roll:
+                    return
+                # 检查期间窗口被新的触发延长时不结束，重新判断这一帧
+                self._finish_window(end)
+                continue
+
+            self._append(frame, timestamp)
+            self._cursor = self._unwritten = cursor + 1
+
+    def _finish_window(self, end=None):
+        """结束当前窗口的录像；窗口在这期间被新的触发延长时返回False"""
+        with self._lock:
+            if end is not None and self._clip_window[1] != end:
+                return False
+            self._windows.popleft()
+        self._close_clip()
+        return True
+
+    def _open_clip(self, window):
+        ring = self._ring
+        # 从环形缓冲区中仍然有效、且还没写过的帧里找窗口开始后的第一帧
+        first = max(self._unwritten, ring.write_seq - ring.capacity + 1, 0)
+        seqs = np.arange(first, ring.write_seq)
+        if seqs.size:
+            timestamps = ring.timestamps[seqs % ring.capacity]
+            first += int(np.searchsorted(timestamps, window[0], side='left'))
+        self._cursor = first
+
+        name = CLIP_PREFIX + datetime.fromtimestamp(max(window[0], 0)).strftime('%Y%m%d_%H%M%S_%f')
+        path = os.path.join(self.directory, name)
+        # 不同时间窗口开始时间相同的情况（如时间戳回拨）
+        suffix = 1
+        while os.path.exists(path + HEADER_SUFFIX):
+            path = os.path.join(self.directory, f'{name}_{suffix}')
+            suffix += 1
+        self._clip = FrameRecorder(path, ring.shape, ring.dtype, grow_frames=max(1, int(self.fps)))
+        self._clip_window = window
+
+    def _append(self, frame, timestamp):
+        clip = self._clip
+        frame_bytes = clip.frame_bytes + INDEX_DTYPE.itemsize
+        if not self._make_room(frame_bytes):
+            self.frames_over_quota += 1
+            return
+        if clip.count == 0:
+            self._clip_first = timestamp
+        clip.append(frame, timestamp)
+        self.frames_written += 1
+        self.bytes_written += frame_bytes
+
+    def _close_clip(self):
+        clip, window = self._clip, self._clip_window
+        self._clip = None
+        self._clip_window = None
+        clip.close()
+        if clip.count == 0:
+            # 窗口内没有帧（如 flush 时刚触发），不留下空录像
+            _remove_clip(clip.path)
+            return
+        size = _clip_size(clip.path)
+        self._stored.append((clip.path, size))
+        entry = {
+            'path': os.path.basename(clip.path),
+            'start': window[0],
+            'end': window[1],
+            'frames': clip.count,
+            'first_frame': self._clip_first,
+            'last_frame': clip.last_timestamp,
+            'bytes': size,
+            'triggers': window[2],
+        }
+        self.clips.append(entry)
+        with open(os.path.join(self.directory, EVENT_LOG), 'a') as f:
+            f.write(json.dumps(entry) + '\n')
+
+    # 配额 ---------------------------------------------------------------
+    def _scan_clips(self):
+        clips = []
+        for name in sorted(os.listdir(self.directory)):
+            if name.startswith(CLIP_PREFIX) and name.endswith(HEADER_SUFFIX):
+                path = os.path.join(self.directory, name[:-len(HEADER_SUFFIX)])
+                clips.append((path, _clip_size(path)))
+        return clips
+
+    def stored_bytes(self):
+        """
+        录像目录中的录像总大小（包括正在录制的）
+        :return: 字节数
+        """
+        current = self._clip.bytes_written if self._clip is not None else 0
+        return sum(size for _, size in self._stored) + current
+
+    def _make_room(self, needed):
+        """按配额删除最早的录像，为 needed 字节腾出空间；只剩当前录像仍然不够时返回False"""
+        if self.quota_bytes is None:
+            return True
+        total = self.stored_bytes()
+        while total + needed > self.quota_bytes and self._stored:
+            path, size = self._stored.popleft()
+            _remove_clip(path)
+            total -= size
+            self.evicted += 1
+        return total + needed <= self.quota_bytes
+
+    # 后台线程 -----------------------------------------------------------
+    def start(self):
+        """
+        启动写盘线程；设置了 capture 时同时启动跟随采集的线程
+        :return: self
+        """
+        if self._write_thread is not None:
+            return self
+        self._running.set()
+        self._write_thread = threading.Thread(target=self._write_loop, name='event-recorder', daemon=True)
+        self._write_thread.start()
+        if self.capture is not None:
+            self._follow_thread = threading.Thread(target=self._follow_loop, name='event-recorder-follow', daemon=True)
+            self._follow_thread.start()
+        return self
+
+    def stop(self):
+        """
+        停止后台线程，把已经触发的时间窗口内已送入的帧写完并关闭录像
+        :return: None
+        """
+        self._running.clear()
+        self._wake.set()
+        for thread in (self._follow_thread, self._write_thread):
+            if thread is not None:
+                thread.join()
+        self._follow_thread = None
+        self._write_thread = None
+        self.detach_motor_commands()
+        self.flush()
+
+    def flush(self):
+        """
+        写出所有已送入、在时间窗口内的帧，并结束录像（不再等待 post_roll 之后的帧）
+        :return: None
+        """
+        self._drain(final=True)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def _follow_loop(self):
+        buffer = self.capture.buffer
+        last_seq = -1
+        while self._running.is_set():
+            seq = buffer.wait_for_frame(last_seq, timeout=0.5)
+            if seq <= last_seq:
+                continue
+            # 跟随采集时跳过中间的帧会造成录像中的跳帧，这里按顺序送入所有仍然有效的帧
+            for s in range(max(last_seq + 1, seq - buffer.capacity + 2), seq + 1):
+                frame, timestamp = buffer.get(s)
+                if frame is not None:
+                    self.feed(frame, timestamp)
+            last_seq = seq
+
+    def _write_loop(self):
+        while self._running.is_set():
+            self._wake.wait(0.1)
+            self._wake.clear()
+            try:
+                self._drain()
+            except Exception as e:
+                print(f"事件录像写盘出错: {e}")
+
+    def stats(self):
+        """
+        录像统计
+        :return: dict，continuous_bytes 为同样的帧全部连续录制需要的字节数
+        """
+        frame_bytes = (self._ring.frames[0].nbytes + INDEX_DTYPE.itemsize) if self._ring is not None else 0
+        continuous = self.frames_seen * frame_bytes
+        return {
+            'frames_seen': self.frames_seen,
+            'frames_written': self.frames_written,
+            'frames_dropped': self.frames_dropped,
+            'frames_over_quota': self.frames_over_quota,
+            'triggers': self.triggers,
+            'merged': self.merged,
+            'clips': len(self.clips),
+            'evicted': self.evicted,
+            'bytes_written': self.bytes_written,
+            'stored_bytes': self.stored_bytes(),
+            'continuous_bytes': continuous,
+            'ratio': self.bytes_written / continuous if continuous else 0.0,
+        }
+
+def _clip_size(path):
+    size = 0
+    for suffix in (FRAMES_SUFFIX, INDEX_SUFFIX, HEADER_SUFFIX):
+        try:
+            size += os.path.getsize(path + suffix)
+        except FileNotFoundError:
+            pass
+    return size
+
+def _remove_clip(path):
+    for suffix in (FRAMES_SUFFIX, INDEX_SUFFIX, HEADER_SUFFIX):
+        try:
+            os.remove(path + suffix)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,370 @@
+import time
+import threading
+
+import numpy as np
+
+class FrameRingBuffer:
+    """
+    预分配的帧环形缓冲区
+    所有帧存放在一块连续的NumPy数组中，写入时复制到对应槽位，读取时返回视图而不是副本。
+    视图指向的槽位会在写入 capacity 帧之后被覆盖，需要长期保存的帧请自行复制，
+    或用 is_valid(seq) 检查是否已被覆盖。
+    """
+    def __init__(self, capacity, shape, dtype=np.uint8):
+        """
+        :param capacity: 槽位数量，至少为3（一个正在写入，其余可供读取）
+        :param shape: 单帧形状，如 (480, 640, 3)
+        :param dtype: 像素类型
+        """
+        if capacity < 3:
+            raise ValueError("环形缓冲区至少需要3个槽位")
+
+        self.capacity = capacity
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.frames = np.empty((capacity,) + self.shape, dtype=self.dtype)
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.sequence = np.full(capacity, -1, dtype=np.int64)
+
+        # 下一帧的序号，已写入的帧序号为 0 .. write_seq-1
+        self.write_seq = 0
+        self._condition = threading.Condition()
+
+    def write(self, frame, timestamp=None):
+        """
+        写入一帧
+        :param frame: 与缓冲区形状一致的数组
+        :param timestamp: 时间戳（秒），为None时使用 time.time()
+        :return: 该帧的序号
+        """
+        seq = self.write_seq
+        slot = seq % self.capacity
+        np.copyto(self.frames[slot], frame, casting='unsafe')
+        self.timestamps[slot] = time.time() if timestamp is None else timestamp
+        self.sequence[slot] = seq
+
+        with self._condition:
+            self.write_seq = seq + 1
+            self._condition.notify_all()
+        return seq
+
+    def writable_slot(self):
+        """
+        返回下一帧槽位的可写视图，配合 commit() 使用，帧源可以直接写入缓冲区，省去一次复制
+        :return: 槽位视图
+        """
+        return self.frames[self.write_seq % self.capacity]
+
+    def commit(self, timestamp=None):
+        """
+        提交通过 writable_slot() 写入的帧
+        :param timestamp: 时间戳（秒），为None时使用 time.time()
+        :return: 该帧的序号
+        """
+        seq = self.write_seq
+        slot = seq % self.capacity
+        self.timestamps[slot] = time.time() if timestamp is None else timestamp
+        self.sequence[slot] = seq
+        with self._condition:
+            self.write_seq = seq + 1
+            self._condition.notify_all()
+        return seq
+
+    def is_valid(self, seq):
+        """
+        判断某一帧是否仍在缓冲区中（没有被覆盖，也没有正在被覆盖）
+        :param seq: 帧序号
+        :return: bool
+        """
+        return self.write_seq - self.capacity < seq < self.write_seq
+
+    def get(self, seq):
+        """
+        按序号获取帧
+        :param seq: 帧序号
+        :return: (只读帧视图, 时间戳)，帧已被覆盖时返回 (None, None)
+        """
+        if not self.is_valid(seq):
+            return None, None
+        slot = seq % self.capacity
+        view = self.frames[slot]
+        view.flags.writeable = False
+        return view, float(self.timestamps[slot])
+
+    def latest(self):
+        """
+        获取最新一帧
+        :return: (只读帧视图, 时间戳, 序号)，还没有帧时返回 (None, None, -1)
+        """
+        seq = self.write_seq - 1
+        if seq < 0:
+            return None, None, -1
+        frame, timestamp = self.get(seq)
+        return frame, timestamp, seq
+
+    def history(self, n):
+        """
+        获取最近 n 帧（不包括正在被覆盖的槽位），按时间从旧到新排列
+        :param n: 帧数
+        :return: (只读帧视图列表, 时间戳数组, 起始序号)
+        """
+        end = self.write_seq
+        n = min(n, end, self.capacity - 1)
+        start = end - n
+        frames = []
+        for seq in range(start, end):
+            view = self.frames[seq % self.capacity]
+            view.flags.writeable = False
+            frames.append(view)
+        slots = np.arange(start, end) % self.capacity
+        return frames, self.timestamps[slots], start
+
+    def wait_for_frame(self, after_seq, timeout=None):
+        """
+        等待序号大于 after_seq 的帧写入
+        :param after_seq: 已经处理过的最新帧序号
+        :param timeout: 超时时间（秒）
+        :return: 最新帧序号，超时返回 after_seq
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self.write_seq - 1 > after_seq, timeout)
+            return self.write_seq - 1
+
+class FakeFrameSource:
+    """
+    模拟摄像头帧源，不需要树莓派摄像头
+    生成一个随时间平移的渐变图案，并按指定帧率限速
+    """
+    def __init__(self, size=(640, 480), fps=30.0, channels=3, noise=False):
+        """
+        :param size: 图像尺寸 (宽, 高)
+        :param fps: 帧率，为None或0时不限速
+        :param channels: 通道数
+        :param noise: 是否叠加随机噪声（测试运动检测等场景）
+        """
+        width, height = size
+        self.shape = (height, width, channels) if channels > 1 else (height, width)
+        self.fps = fps
+        self.noise = noise
+        self.frame_count = 0
+
+        x = np.arange(width, dtype=np.uint16)
+        y = np.arange(height, dtype=np.uint16)[:, None]
+        base = ((x + y) % 256).astype(np.uint8)
+        if channels > 1:
+            base = np.stack([base, base[::-1], np.full_like(base, 128)][:channels] +
+                            [base] * max(0, channels - 3), axis=-1)
+        self._base = base
+        self._rng = np.random.default_rng(0)
+        self._next_time = None
+
+    def start(self):
+        self._next_time = time.perf_counter()
+
+    def stop(self):
+        pass
+
+    def _wait_next_frame(self):
+        if not self.fps:
+            return
+        if self._next_time is None:
+            self._next_time = time.perf_counter()
+        self._next_time += 1.0 / self.fps
+        delay = self._next_time - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            # 落后太多时不追帧
+            self._next_time = time.perf_counter()
+
+    def capture_into(self, out):
+        """
+        直接把下一帧写入 out
+        :param out: 与帧形状一致的可写数组
+        :return: None
+        """
+        self._wait_next_frame()
+        shift = (self.frame_count * 4) % self.shape[1]
+        # 水平平移图案，模拟画面运动
+        out[:, shift:] = self._base[:, :self.shape[1] - shift]
+        out[:, :shift] = self._base[:, self.shape[1] - shift:]
+        if self.noise:
+            out += self._rng.integers(0, 8, size=out.shape, dtype=np.uint8)
+        self.frame_count += 1
+
+    def capture_array(self):
+        frame = np.empty(self.shape, dtype=np.uint8)
+        self.capture_into(frame)
+        return frame
+
+class Picamera2Source:
+    """树莓派摄像头帧源"""
+    def __init__(self, size=(640, 480), picam2=None):
+        """
+        :param size: 图像尺寸 (宽, 高)
+        :param picam2: 已创建的Picamera2实例，为None时自动创建
+        """
+        if picam2 is None:
+            # 只在使用真实摄像头时导入
+            from picamera2 import Picamera2
+            picam2 = Picamera2()
+            camera_config = picam2.create_preview_configuration(main={"size": size})
+            picam2.configure(camera_config)
+
+        self.picam2 = picam2
+        # 帧形状与像素格式有关，由第一帧确定
+        self.shape = None
+
+    def start(self):
+        self.picam2.start()
+
+    def stop(self):
+        self.picam2.stop()
+
+    def capture_array(self):
+        return self.picam2.capture_array()
+
+class FrameCapture:
+    """
+    后台采集线程
+    采集与显示、编码、保存等处理并行，帧写入预分配的环形缓冲区，
+    处理端通过 latest() / history() 获取帧视图
+    """
+    def __init__(self, source, capacity=8, shape=None, dtype=np.uint8):
+        """
+        :param source: 帧源，需要提供 start(), stop(), capture_array()，可选 capture_into(out)
+        :param capacity: 环形缓冲区槽位数
+        :param shape: 单帧形状，为None时使用 source.shape，仍未知时采集第一帧确定
+        :param dtype: 像素类型
+        """
+        self.source = source
+        self.capacity = capacity
+        self._shape = shape or getattr(source, 'shape', None)
+        self._dtype = dtype
+        self.buffer = None
+
+        # 统计
+        self.frames_captured = 0
+        self.frames_dropped = 0  # 处理端来不及读取、被跳过的帧
+        self.capture_errors = 0
+        self._last_read_seq = -1
+
+        self._running = threading.Event()
+        self._ready = threading.Event()
+        self._start_error = None
+        self._thread = None
+
+    def start(self):
+        """
+        启动摄像头和采集线程，等待第一帧的缓冲区准备好
+        第一帧采集失败时停止摄像头，并在这里抛出采集线程中的异常
+        :return: self
+        """
+        if self._thread is not None:
+            return self
+        self._ready.clear()
+        self._start_error = None
+        self.source.start()
+        self._running.set()
+        self._thread = threading.Thread(target=self._run, name='frame-capture', daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._start_error is not None:
+            self.stop()
+            raise self._start_error
+        return self
+
+    def stop(self):
+        """
+        停止采集线程和摄像头
+        :return: None
+        """
+        self._running.clear()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.source.stop()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def _run(self):
+        capture_into = getattr(self.source, 'capture_into', None)
+        try:
+            if self._shape is None:
+                first = self.source.capture_array()
+                self.buffer = FrameRingBuffer(self.capacity, first.shape, first.dtype)
+                self.buffer.write(first)
+                self.frames_captured += 1
+            else:
+                self.buffer = FrameRingBuffer(self.capacity, self._shape, self._dtype)
+        except Exception as e:
+            # 缓冲区没有建立，交给 start() 抛出
+            self._start_error = e
+            return
+        finally:
+            self._ready.set()
+
+        while self._running.is_set():
+            try:
+                if capture_into is not None:
+                    capture_into(self.buffer.writable_slot())
+                    self.buffer.commit()
+                else:
+                    self.buffer.write(self.source.capture_array())
+                self.frames_captured += 1
+            except Exception as e:
+                self.capture_errors += 1
+                print(f"采集图像时出错: {e}")
+                time.sleep(0.01)
+
+    def _mark_read(self, seq):
+        if seq > self._last_read_seq:
+            if self._last_read_seq >= 0:
+                self.frames_dropped += seq - self._last_read_seq - 1
+            self._last_read_seq = seq
+
+    def latest(self):
+        """
+        获取最新一帧（只读视图）
+        :return: (帧视图, 时间戳, 序号)
+        """
+        frame, timestamp, seq = self.buffer.latest()
+        if seq >= 0:
+            self._mark_read(seq)
+        return frame, timestamp, seq
+
+    def next_frame(self, timeout=1.0):
+        """
+        等待比上次读取更新的一帧
+        :param timeout: 超时时间（秒）
+        :return: (帧视图, 时间戳, 序号)，超时返回 (None, None, 上次序号)
+        """
+        seq = self.buffer.wait_for_frame(self._last_read_seq, timeout)
+        if seq <= self._last_read_seq:
+            return None, None, self._last_read_seq
+        frame, timestamp = self.buffer.get(seq)
+        self._mark_read(seq)
+        return frame, timestamp, seq
+
+    def history(self, n):
+        """
+        获取最近 n 帧（只读视图列表）
+        :param n: 帧数
+        :return: (帧视图列表, 时间戳数组, 起始序号)
+        """
+        return self.buffer.history(n)
+
+    def stats(self):
+        """
+        采集统计
+        :return: dict
+        """
+        return {
+            'captured': self.frames_captured,
+            'dropped': self.frames_dropped,
+            'errors': self.capture_errors,
+        }
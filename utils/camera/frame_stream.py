@@ -0,0 +1,364 @@
+import time
+import json
+import socket
+import struct
+import asyncio
+import threading
+
+import numpy as np
+
+# 原始帧模式每帧的头部：负载字节数, 序号, 时间戳, 高, 宽, 通道数, 像素类型
+# 之后紧跟 负载字节数 的像素数据（C顺序）
+RAW_HEADER = struct.Struct('<IqdHHB3s')
+
+MJPEG_BOUNDARY = b'frame'
+
+_INDEX_PAGE = b'''<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>camera</title></head>
+<body style="margin:0;background:#000"><img src="/stream" style="width:100%"></body></html>
+'''
+
+class _Packet:
+    """一帧编码后的数据，所有客户端共享同一份字节"""
+    __slots__ = ('seq', 'timestamp', 'mjpeg_part', 'raw')
+
+    def __init__(self, seq, timestamp, mjpeg_part=None, raw=None):
+        self.seq = seq
+        self.timestamp = timestamp
+        self.mjpeg_part = mjpeg_part
+        self.raw = raw
+
+class _StreamClient:
+    """
+    一个连接的客户端
+    只保留最新的一帧：发送跟不上时新帧直接替换还没发送的帧，慢客户端只会丢帧，不会拖慢采集和其它客户端
+    """
+    __slots__ = ('kind', 'peer', 'writer', 'task', 'latest', 'event', 'sent', 'dropped', 'bytes_sent', 'connected_at')
+
+    def __init__(self, kind, writer):
+        self.kind = kind
+        self.writer = writer
+        self.peer = writer.get_extra_info('peername')
+        self.task = asyncio.current_task()
+        self.latest = None
+        self.event = asyncio.Event()
+        self.sent = 0
+        self.dropped = 0
+        self.bytes_sent = 0
+        self.connected_at = time.time()
+
+    def offer(self, packet):
+        if self.latest is not None:
+            self.dropped += 1
+        self.latest = packet
+        self.event.set()
+
+class FrameStreamServer:
+    """
+    帧推流服务器（asyncio）
+    - HTTP MJPEG：浏览器打开 http://<树莓派IP>:<http_port>/ 即可观看，/stream 为 multipart 流，/snapshot.jpg 为单帧
+    - 原始帧TCP：每帧为 RAW_HEADER 加像素数据，用 RawFrameClient 接收
+    编码线程从采集环形缓冲区取最新帧，每帧只编码一次（只在有对应客户端时编码），再分发给所有客户端
+    """
+    def __init__(self, capture, host='0.0.0.0', http_port=8080, raw_port=None, jpeg_quality=80, max_fps=None):
+        """
+        :param capture: 已启动的 FrameCapture（或任何提供 buffer 属性的采集对象）
+        :param host: 监听地址
+        :param http_port: MJPEG HTTP端口，为None时不启用
+        :param raw_port: 原始帧TCP端口，为None时不启用
+        :param jpeg_quality: JPEG质量 0-100
+        :param max_fps: 推流帧率上限，为None时跟随采集帧率
+        """
+        if http_port is None and raw_port is None:
+            raise ValueError("http_port 和 raw_port 至少需要启用一个")
+        self.capture = capture
+        self.host = host
+        self.http_port = http_port
+        self.raw_port = raw_port
+        self.jpeg_quality = jpeg_quality
+        self.min_interval = 1.0 / max_fps if max_fps else 0.0
+
+        if http_port is not None:
+            # 只有MJPEG需要OpenCV
+            import cv2
+            self._cv2 = cv2
+
+        # 客户端集合只在事件循环线程中修改，其它线程读取整体替换的快照
+        self._clients = set()
+        self._client_snapshot = ()
+        self._client_kinds = frozenset()
+        self._latest_jpeg = None
+        self._loop = None
+        self._servers = []
+        self._running = threading.Event()
+        self._ready = threading.Event()
+        self._loop_thread = None
+        self._encoder_thread = None
+        self._start_error = None
+
+        # 统计
+        self.frames_encoded = 0
+        self.jpeg_encoded = 0
+        self.encode_seconds = 0.0
+        self.clients_served = 0
+
+    # 启动与停止 ---------------------------------------------------------
+    def start(self):
+        """
+        在后台线程中启动事件循环和编码线程
+        :return: self
+        """
+        if self._loop_thread is not None:
+            return self
+        self._running.set()
+        self._loop_thread = threading.Thread(target=self._run_loop, name='frame-stream', daemon=True)
+        self._loop_thread.start()
+        self._ready.wait()
+        if self._start_error is not None:
+            self._loop_thread.join()
+            self._loop_thread = None
+            raise self._start_error
+        self._encoder_thread = threading.Thread(target=self._encode_loop, name='frame-stream-encoder', daemon=True)
+        self._encoder_thread.start()
+        return self
+
+    def stop(self):
+        """
+        断开所有客户端并停止服务
+        :return: None
+        """
+        self._running.clear()
+        if self._encoder_thread is not None:
+            self._encoder_thread.join()
+            self._encoder_thread = None
+        if self._loop_thread is not None:
+            self._loop.call_soon_threadsafe(self._shutdown_event.set)
+            self._loop_thread.join()
+            self._loop_thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    @property
+    def ports(self):
+        """实际监听的端口 {'http': 端口, 'raw': 端口}，端口参数为0时由系统分配"""
+        return {name: server.sockets[0].getsockname()[1] for name, server in self._servers}
+
+    def _run_loop(self):
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self._serve())
+        finally:
+            self._loop.close()
+
+    async def _serve(self):
+        self._shutdown_event = asyncio.Event()
+        try:
+            if self.http_port is not None:
+                server = await asyncio.start_server(self._handle_http, self.host, self.http_port)
+                self._servers.append(('http', server))
+            if self.raw_port is not None:
+                server = await asyncio.start_server(self._handle_raw, self.host, self.raw_port)
+                self._servers.append(('raw', server))
+        except OSError as e:
+            self._start_error = e
+            for _, server in self._servers:
+                server.close()
+            self._ready.set()
+            return
+        self._ready.set()
+
+        await self._shutdown_event.wait()
+        for _, server in self._servers:
+            server.close()
+        tasks = [client.task for client in self._clients]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for _, server in self._servers:
+            await server.wait_closed()
+
+    # 编码与分发 ---------------------------------------------------------
+    def _encode_loop(self):
+        buffer = self.capture.buffer
+        last_seq = -1
+        last_sent = 0.0
+        while self._running.is_set():
+            seq = buffer.wait_for_frame(last_seq, timeout=0.5)
+            if seq <= last_seq:
+                continue
+            last_seq = seq
+            kinds = self._client_kinds
+            if not kinds:
+                continue
+            now = time.perf_counter()
+            if now - last_sent < self.min_interval:
+                continue
+            last_sent = now
+
+            frame, timestamp = buffer.get(seq)
+            if frame is None:
+                continue
+            started = time.perf_counter()
+            try:
+                packet = self._encode(frame, timestamp, seq, kinds)
+            except Exception as e:
+                print(f"推流编码出错: {e}")
+                continue
+            # 编码期间槽位被覆盖时放弃这一帧
+            if not buffer.is_valid(seq):
+                continue
+            self.encode_seconds += time.perf_counter() - started
+            self.frames_encoded += 1
+            self._loop.call_soon_threadsafe(self._publish, packet)
+
+    def _encode(self, frame, timestamp, seq, kinds):
+        packet = _Packet(seq, timestamp)
+        if 'mjpeg' in kinds:
+            ok, data = self._cv2.imencode('.jpg', frame, [self._cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+            if not ok:
+                raise RuntimeError("JPEG编码失败")
+            jpeg = data.tobytes()
+            self._latest_jpeg = jpeg
+            self.jpeg_encoded += 1
+            # 帧头带上采集时间戳和序号，客户端可以据此计算端到端延迟
+            packet.mjpeg_part = (
+                b'--' + MJPEG_BOUNDARY + b'\r\nContent-Type: image/jpeg\r\n'
+                b'Content-Length: %d\r\nX-Timestamp: %.6f\r\nX-Sequence: %d\r\n\r\n' % (len(jpeg), timestamp, seq)
+                + jpeg + b'\r\n')
+        if 'raw' in kinds:
+            height, width = frame.shape[:2]
+            channels = frame.shape[2] if frame.ndim == 3 else 1
+            header = RAW_HEADER.pack(frame.nbytes, seq, timestamp, height, width, channels, frame.dtype.str.encode())
+            packet.raw = header + frame.tobytes()
+        return packet
+
+    def _publish(self, packet):
+        for client in self._clients:
+            if (client.kind == 'mjpeg' and packet.mjpeg_part is not None) or \
+                    (client.kind == 'raw' and packet.raw is not None):
+                client.offer(packet)
+
+    async def _pump(self, client):
+        payload = 'mjpeg_part' if client.kind == 'mjpeg' else 'raw'
+        while True:
+            await client.event.wait()
+            client.event.clear()
+            packet, client.latest = client.latest, None
+            if packet is None:
+                continue
+            data = getattr(packet, payload)
+            client.writer.write(data)
+            await client.writer.drain()
+            client.sent += 1
+            client.bytes_sent += len(data)
+
+    def _update_snapshot(self):
+        self._client_snapshot = tuple(self._clients)
+        self._client_kinds = frozenset(client.kind for client in self._clients)
+
+    async def _serve_client(self, client):
+        self._clients.add(client)
+        self._update_snapshot()
+        self.clients_served += 1
+        try:
+            await self._pump(client)
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._clients.discard(client)
+            self._update_snapshot()
+            client.writer.close()
+
+    # 协议 ---------------------------------------------------------------
+    async def _handle_raw(self, reader, writer):
+        writer.get_extra_info('socket').setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        await self._serve_client(_StreamClient('raw', writer))
+
+    async def _handle_http(self, reader, writer):
+        try:
+            request = await reader.readuntil(b'\r\n\r\n')
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            writer.close()
+            return
+        parts = request.split(b'\r\n', 1)[0].split()
+        path = parts[1].decode('latin-1') if len(parts) >= 2 else '/'
+
+        if path == '/stream':
+            writer.get_extra_info('socket').setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            writer.write(b'HTTP/1.1 200 OK\r\n'
+                         b'Content-Type: multipart/x-mixed-replace; boundary=' + MJPEG_BOUNDARY + b'\r\n'
+                         b'Cache-Control: no-cache\r\nConnection: close\r\n\r\n')
+            await self._serve_client(_StreamClient('mjpeg', writer))
+            return
+
+        if path == '/':
+            self._respond(writer, b'200 OK', b'text/html; charset=utf-8', _INDEX_PAGE)
+        elif path == '/snapshot.jpg' and self._latest_jpeg is not None:
+            self._respond(writer, b'200 OK', b'image/jpeg', self._latest_jpeg)
+        elif path == '/stats':
+            self._respond(writer, b'200 OK', b'application/json', json.dumps(self.stats()).encode())
+        else:
+            self._respond(writer, b'404 Not Found', b'text/plain', b'not found')
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        writer.close()
+
+    @staticmethod
+    def _respond(writer, status, content_type, body):
+        writer.write(b'HTTP/1.1 ' + status + b'\r\nContent-Type: ' + content_type +
+                     b'\r\nContent-Length: %d\r\nConnection: close\r\n\r\n' % len(body) + body)
+
+    def stats(self):
+        """
+        推流统计
+        :return: dict，clients 为每个客户端已发送和因发送跟不上被替换掉的帧数
+        """
+        return {
+            'encoded': self.frames_encoded,
+            'jpeg_encoded': self.jpeg_encoded,
+            'avg_encode_ms': self.encode_seconds / self.frames_encoded * 1000 if self.frames_encoded else 0.0,
+            'clients_served': self.clients_served,
+            'clients': [{'kind': c.kind, 'peer': str(c.peer), 'sent': c.sent, 'dropped': c.dropped,
+                         'bytes': c.bytes_sent} for c in self._client_snapshot],
+        }
+
+class RawFrameClient:
+    """原始帧TCP模式的接收端"""
+    def __init__(self, host, port, timeout=5.0):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._header = bytearray(RAW_HEADER.size)
+
+    def _read_exact(self, view):
+        while len(view):
+            n = self.sock.recv_into(view)
+            if n == 0:
+                raise ConnectionError("推流服务器已断开")
+            view = view[n:]
+
+    def read_frame(self):
+        """
+        接收一帧
+        :return: (帧数组, 时间戳, 序号)
+        """
+        self._read_exact(memoryview(self._header))
+        nbytes, seq, timestamp, height, width, channels, dtype = RAW_HEADER.unpack(self._header)
+        shape = (height, width, channels) if channels > 1 else (height, width)
+        frame = np.empty(shape, dtype=np.dtype(dtype.decode()))
+        self._read_exact(memoryview(frame).cast('B'))
+        return frame, timestamp, seq
+
+    def close(self):
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,206 @@
+import os
+import sys
+import time
+import queue
+import threading
+from datetime import datetime
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from utils.camera.recording import FrameRecorder
+
+# 保存格式
+FORMAT_JPEG = 'jpeg'
+FORMAT_NPY = 'npy'
+FORMAT_RAW = 'raw'
+
+# 队列满时的处理方式
+DROP_OLDEST = 'drop_oldest'   # 丢弃队列中最旧的帧，保证保存的是最新画面
+DROP_NEWEST = 'drop_newest'   # 丢弃新提交的帧
+BLOCK = 'block'               # 阻塞提交方，直到队列有空位
+
+_FORMATS = (FORMAT_JPEG, FORMAT_NPY, FORMAT_RAW)
+_DROP_POLICIES = (DROP_OLDEST, DROP_NEWEST, BLOCK)
+
+class FrameWriter:
+    """
+    异步帧保存流水线
+    采集循环只负责提交帧，编码和写盘在后台线程池中进行；
+    队列有界，写盘跟不上时按 drop_policy 丢帧或阻塞
+    """
+    def __init__(self, save_dir, format=FORMAT_JPEG, jpeg_quality=90, workers=2,
+                 queue_size=16, drop_policy=DROP_OLDEST):
+        """
+        :param save_dir: 保存目录
+        :param format: 'jpeg'（JPEG压缩）、'npy'（未压缩的NumPy文件）或 'raw'（追加到带时间索引的内存映射录像，见 recording.py）
+        :param jpeg_quality: JPEG质量 0-100
+        :param workers: 编码线程数，raw 格式固定为1个线程以保证帧顺序
+        :param queue_size: 等待保存的最大帧数
+        :param drop_policy: 队列满时的处理方式，'drop_oldest', 'drop_newest' 或 'block'
+        """
+        if format not in _FORMATS:
+            raise ValueError(f"未知的保存格式: {format}，可选 {_FORMATS}")
+        if drop_policy not in _DROP_POLICIES:
+            raise ValueError(f"未知的丢帧策略: {drop_policy}，可选 {_DROP_POLICIES}")
+
+        self.save_dir = save_dir
+        self.format = format
+        self.jpeg_quality = jpeg_quality
+        self.drop_policy = drop_policy
+        self.workers = 1 if format == FORMAT_RAW else workers
+        os.makedirs(save_dir, exist_ok=True)
+
+        if format == FORMAT_JPEG:
+            # 只有JPEG格式需要OpenCV
+            import cv2
+            self._cv2 = cv2
+
+        self._queue = queue.Queue(queue_size)
+        self._raw_file = None
+        self._stats_lock = threading.Lock()
+        self._threads = []
+        self._started_at = None
+
+        # 统计
+        self.submitted = 0
+        self.written = 0
+        self.dropped = 0
+        self.bytes_written = 0
+        self.encode_seconds = 0.0
+
+    def start(self):
+        """
+        启动编码线程
+        :return: self
+        """
+        self._started_at = time.perf_counter()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f'frame-writer-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def close(self):
+        """
+        等待队列中的帧全部保存后停止线程
+        :return: None
+        """
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        if self._raw_file is not None:
+            self._raw_file.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def submit(self, frame, timestamp=None, copy=True):
+        """
+        提交一帧
+        :param frame: 帧数组
+        :param timestamp: 时间戳（秒），为None时使用 time.time()
+        :param copy: 是否复制帧；来自环形缓冲区的视图会被覆盖，需要复制
+        :return: 是否进入了保存队列
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        item = (np.array(frame, copy=True) if copy else frame, timestamp)
+
+        with self._stats_lock:
+            self.submitted += 1
+
+        if self.drop_policy == BLOCK:
+            self._queue.put(item)
+            return True
+
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            pass
+
+        if self.drop_policy == DROP_NEWEST:
+            with self._stats_lock:
+                self.dropped += 1
+            return False
+
+        # 丢弃最旧的一帧，再放入新帧
+        while True:
+            try:
+                self._queue.get_nowait()
+                self._queue.task_done()
+                with self._stats_lock:
+                    self.dropped += 1
+            except queue.Empty:
+                pass
+            try:
+                self._queue.put_nowait(item)
+                return True
+            except queue.Full:
+                continue
+
+    def _filename(self, timestamp, extension, prefix='image'):
+        name = datetime.fromtimestamp(timestamp).strftime("%Y%m%d_%H%M%S_%f")
+        return os.path.join(self.save_dir, f"{prefix}_{name}.{extension}")
+
+    def _write(self, frame, timestamp):
+        if self.format == FORMAT_JPEG:
+            ok, data = self._cv2.imencode('.jpg', frame, [self._cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+            if not ok:
+                raise RuntimeError("JPEG编码失败")
+            with open(self._filename(timestamp, 'jpg'), 'wb') as f:
+                f.write(data)
+            return len(data)
+
+        if self.format == FORMAT_NPY:
+            np.save(self._filename(timestamp, 'npy'), frame)
+            return frame.nbytes
+
+        if self._raw_file is None:
+            path = os.path.splitext(self._filename(timestamp, 'raw', prefix='video'))[0]
+            self._raw_file = FrameRecorder(path, frame.shape, frame.dtype)
+        self._raw_file.append(frame, timestamp)
+        return frame.nbytes
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                frame, timestamp = item
+                start = time.perf_counter()
+                nbytes = self._write(frame, timestamp)
+                elapsed = time.perf_counter() - start
+                with self._stats_lock:
+                    self.written += 1
+                    self.bytes_written += nbytes
+                    self.encode_seconds += elapsed
+            except Exception as e:
+                print(f"保存图像时出错: {e}")
+            finally:
+                self._queue.task_done()
+
+    def stats(self):
+        """
+        保存统计
+        :return: dict，fps 为启动以来实际保存的帧率
+        """
+        with self._stats_lock:
+            elapsed = time.perf_counter() - self._started_at if self._started_at else 0.0
+            return {
+                'submitted': self.submitted,
+                'written': self.written,
+                'dropped': self.dropped,
+                'pending': self._queue.qsize(),
+                'bytes': self.bytes_written,
+                'fps': self.written / elapsed if elapsed > 0 else 0.0,
+                'avg_encode_ms': self.encode_seconds / self.written * 1000 if self.written else 0.0,
+            }
@@ -0,0 +1,245 @@
+import time
+import collections
+
+import numpy as np
+
+# 640x480 输入的单帧处理预算（毫秒），超出时隔帧检测
+DEFAULT_BUDGET_MS = 5.0
+
+class MotionEvent:
+    """
+    一次运动事件
+    kind 为 'start'（运动开始）、'update'（运动持续，区域有变化）或 'end'（运动结束）
+    boxes 为全分辨率坐标的包围框列表 (x, y, w, h)
+    """
+    __slots__ = ('kind', 'timestamp', 'seq', 'boxes', 'area_ratio', 'started_at')
+
+    def __init__(self, kind, timestamp, seq, boxes, area_ratio, started_at):
+        self.kind = kind
+        self.timestamp = timestamp
+        self.seq = seq
+        self.boxes = boxes
+        self.area_ratio = area_ratio
+        self.started_at = started_at
+
+    def __repr__(self):
+        return (f"MotionEvent({self.kind}, t={self.timestamp:.3f}, seq={self.seq}, "
+                f"boxes={self.boxes}, area={self.area_ratio:.1%})")
+
+class MotionDetector:
+    """
+    帧差运动检测
+    每帧转为灰度并按面积平均缩小 scale 倍到工作分辨率，
+    与指数加权平均的背景相减后阈值化，再用连通域分析得到运动区域；
+    连续 min_frames 帧有运动时产生 'start' 事件，cooldown 秒没有运动时产生 'end' 事件
+    """
+    def __init__(self, scale=4, alpha=0.05, threshold=20, min_area=0.002, min_frames=2,
+                 cooldown=1.0, dilate=1, budget_ms=DEFAULT_BUDGET_MS):
+        """
+        :param scale: 缩小倍数，640x480 在 scale=4 时工作分辨率为 160x120
+        :param alpha: 背景更新速率，越大背景适应越快（静止下来的物体更快融入背景）
+        :param threshold: 灰度差阈值（0-255）
+        :param min_area: 运动区域的最小面积，占工作分辨率画面的比例
+        :param min_frames: 连续多少帧有运动才算运动开始，过滤单帧噪声
+        :param cooldown: 多少秒没有运动算运动结束
+        :param dilate: 阈值化后膨胀的像素数（工作分辨率），把相邻的小块合并为一个区域，0表示不膨胀
+        :param budget_ms: 单帧处理预算（毫秒），平均耗时超出时隔帧检测，为None时每帧都检测
+        """
+        self.scale = scale
+        self.alpha = alpha
+        self.threshold = threshold
+        self.min_area = min_area
+        self.min_frames = min_frames
+        self.cooldown = cooldown
+        self.dilate = dilate
+        self.budget_ms = budget_ms
+        # 有运动的像素的背景更新速率相对 alpha 的比例
+        self.moving_alpha_ratio = 0.05
+
+        import cv2
+        self._cv2 = cv2
+        self._kernel = np.ones((2 * dilate + 1, 2 * dilate + 1), np.uint8) if dilate else None
+
+        self._shape = None
+        self._background = None
+        self._full_gray = None
+        self._small = None
+        self._gray = None
+        self._delta = None
+        self._diff = None
+        self._rate = None
+        self._mask = None
+
+        # 事件状态
+        self.active = False
+        self._motion_frames = 0
+        self._last_motion = None
+        self._started_at = None
+        # 最近一次检测到的运动区域（全分辨率坐标）
+        self.boxes = []
+
+        # 隔帧检测：每 stride 帧检测一次
+        self.stride = 1
+        self._frame_index = 0
+
+        # 统计
+        self.frames = 0
+        self.processed = 0
+        self.events = 0
+        self._process_ms = collections.deque(maxlen=256)
+        self._cpu_ms = 0.0
+        self._ewma_ms = 0.0
+
+    def reset(self):
+        """
+        丢弃背景，下一帧重新建立
+        :return: None
+        """
+        self._background = None
+        self.active = False
+        self._motion_frames = 0
+
+    # 预处理 -------------------------------------------------------------
+    def _allocate(self, shape):
+        s = self.scale
+        height, width = shape[0] // s, shape[1] // s
+        self._shape = shape
+        self._full_gray = np.zeros(shape[:2], np.uint8)
+        self._small = np.zeros((height, width), np.uint8)
+        self._gray = np.zeros((height, width), np.float32)
+        self._delta = np.zeros((height, width), np.float32)
+        self._diff = np.zeros((height, width), np.float32)
+        self._rate = np.zeros((height, width), np.float32)
+        self._mask = np.zeros((height, width), np.uint8)
+        self._background = None
+
+    def downscale(self, frame):
+        """
+        转为灰度并按面积平均缩小到工作分辨率，中间结果写入预先分配的缓冲区
+        4通道帧（如picamera2的XBGR8888）忽略第4个通道
+        :param frame: 全分辨率帧
+        :return: 工作分辨率的 float32 灰度图（复用的内部缓冲区）
+        """
+        cv2 = self._cv2
+        if frame.shape != self._shape:
+            self._allocate(frame.shape)
+        if frame.ndim == 2:
+            gray = frame
+        else:
+            code = cv2.COLOR_BGRA2GRAY if frame.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+            gray = cv2.cvtColor(frame, code, dst=self._full_gray)
+        height, width = self._small.shape
+        cv2.resize(gray, (width, height), dst=self._small, interpolation=cv2.INTER_AREA)
+        np.multiply(self._small, 1.0, out=self._gray, casting='unsafe')
+        return self._gray
+
+    # 检测 ---------------------------------------------------------------
+    def process(self, frame, timestamp=None, seq=-1):
+        """
+        处理一帧
+        :param frame: 全分辨率帧（只读视图即可，不会修改）
+        :param timestamp: 时间戳（秒），为None时使用 time.time()
+        :param seq: 帧序号，写入事件中便于回查
+        :return: 事件列表（大多数帧为空列表）；按预算跳过的帧返回 None
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        self.frames += 1
+        self._frame_index += 1
+        if self._frame_index < self.stride:
+            return None
+        self._frame_index = 0
+
+        started = time.perf_counter()
+        cpu_started = time.thread_time()
+        boxes, area_ratio = self._detect(frame)
+        events = self._update_state(boxes, area_ratio, timestamp, seq)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self._cpu_ms += (time.thread_time() - cpu_started) * 1000
+        self._process_ms.append(elapsed_ms)
+        self.processed += 1
+        self._adapt(elapsed_ms)
+        return events
+
+    def _detect(self, frame):
+        gray = self.downscale(frame)
+        if self._background is None:
+            self._background = gray.copy()
+            return [], 0.0
+
+        delta, diff, rate = self._delta, self._diff, self._rate
+        np.subtract(gray, self._background, out=delta)
+        np.abs(delta, out=diff)
+        mask = self._mask
+        moving = mask.view(bool)
+        np.greater(diff, self.threshold, out=moving)
+
+        # 有运动的位置背景更新慢得多，经过的物体不会马上融入背景；停下不动的物体最终仍会成为背景
+        rate.fill(self.alpha)
+        rate[moving] = self.alpha * self.moving_alpha_ratio
+        np.multiply(delta, rate, out=delta)
+        np.add(self._background, delta, out=self._background)
+
+        changed = int(np.count_nonzero(mask))
+        if changed == 0:
+            return [], 0.0
+
+        if self._kernel is not None:
+            mask = self._cv2.dilate(mask, self._kernel)
+        count, _, stats, _ = self._cv2.connectedComponentsWithStats(mask, connectivity=8)
+        min_pixels = self.min_area * mask.size
+        # stats 每行为 x, y, w, h, 面积，第0行是背景
+        regions = stats[1:count]
+        regions = regions[regions[:, 4] >= min_pixels]
+        s = self.scale
+        boxes = [tuple(int(v) * s for v in region[:4]) for region in regions]
+        return boxes, changed / mask.size
+
+    def _update_state(self, boxes, area_ratio, timestamp, seq):
+        events = []
+        if boxes:
+            self._motion_frames += 1
+            self._last_motion = timestamp
+            if not self.active and self._motion_frames >= self.min_frames:
+                self.active = True
+                self._started_at = timestamp
+                self.events += 1
+                events.append(MotionEvent('start', timestamp, seq, boxes, area_ratio, timestamp))
+            elif self.active and len(boxes) != len(self.boxes):
+                events.append(MotionEvent('update', timestamp, seq, boxes, area_ratio, self._started_at))
+        else:
+            self._motion_frames = 0
+            if self.active and timestamp - self._last_motion >= self.cooldown:
+                self.active = False
+                events.append(MotionEvent('end', timestamp, seq, [], 0.0, self._started_at))
+        self.boxes = boxes
+        return events
+
+    def _adapt(self, elapsed_ms):
+        # 按单次检测的平均耗时折算到每帧，超出预算时加大检测间隔，余量充足时减小
+        if self.budget_ms is None:
+            return
+        self._ewma_ms += 0.1 * (elapsed_ms - self._ewma_ms)
+        per_frame = self._ewma_ms / self.stride
+        if per_frame > self.budget_ms:
+            self.stride += 1
+        elif self.stride > 1 and self._ewma_ms / (self.stride - 1) < self.budget_ms * 0.8:
+            self.stride -= 1
+
+    def stats(self):
+        """
+        处理统计
+        :return: dict，process 为单次检测的耗时（毫秒，最近256次），per_frame 为平摊到每一帧的CPU时间
+        """
+        times = np.array(self._process_ms) if self._process_ms else np.zeros(1)
+        return {
+            'frames': self.frames,
+            'processed': self.processed,
+            'stride': self.stride,
+            'events': self.events,
+            'active': self.active,
+            'process_mean_ms': float(times.mean()),
+            'process_p99_ms': float(np.percentile(times, 99)),
+            'cpu_per_frame_ms': self._cpu_ms / self.frames if self.frames else 0.0,
+            'budget_ms': self.budget_ms,
+        }
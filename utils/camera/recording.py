@@ -0,0 +1,253 @@
+import os
+import re
+import json
+from datetime import datetime
+
+import numpy as np
+
+# 索引文件中每一帧的记录：时间戳（秒）和帧数据在 .frames 文件中的字节偏移
+INDEX_DTYPE = np.dtype([('timestamp', '<f8'), ('offset', '<i8')])
+
+FRAMES_SUFFIX = '.frames'
+INDEX_SUFFIX = '.index'
+HEADER_SUFFIX = '.json'
+
+class FrameRecorder:
+    """
+    录像写入器
+    录像由三个文件组成：
+      <path>.frames  固定形状的原始帧数据，按块预分配并通过内存映射写入
+      <path>.index   每帧16字节的索引（时间戳、字节偏移），只追加
+      <path>.json    帧形状和像素类型
+    """
+    def __init__(self, path, shape, dtype=np.uint8, grow_frames=256):
+        """
+        :param path: 录像路径（不含扩展名）
+        :param shape: 单帧形状
+        :param dtype: 像素类型
+        :param grow_frames: 每次扩展 .frames 文件时预分配的帧数
+        """
+        self.path = path
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.frame_bytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        self.grow_frames = grow_frames
+        self.count = 0
+        self.last_timestamp = None
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with open(path + HEADER_SUFFIX, 'w') as f:
+            json.dump({'shape': list(self.shape), 'dtype': self.dtype.str}, f)
+
+        self._frames_file = open(path + FRAMES_SUFFIX, 'w+b')
+        self._index_file = open(path + INDEX_SUFFIX, 'wb')
+        self._index_record = np.zeros(1, dtype=INDEX_DTYPE)
+        self._capacity = 0
+        self._mmap = None
+        self._grow()
+
+    def _grow(self):
+        if self._mmap is not None:
+            self._mmap.flush()
+            del self._mmap
+        self._capacity += self.grow_frames
+        self._frames_file.truncate(self._capacity * self.frame_bytes)
+        self._mmap = np.memmap(self._frames_file, dtype=self.dtype, mode='r+',
+                               shape=(self._capacity,) + self.shape)
+
+    def append(self, frame, timestamp):
+        """
+        追加一帧，时间戳需要单调不减
+        :param frame: 帧数组
+        :param timestamp: 时间戳（秒）
+        :return: 帧序号
+        """
+        if self.last_timestamp is not None and timestamp < self.last_timestamp:
+            raise ValueError(f"时间戳必须单调不减: {timestamp} < {self.last_timestamp}")
+        if self.count == self._capacity:
+            self._grow()
+
+        self._mmap[self.count] = frame
+        self._index_record['timestamp'] = timestamp
+        self._index_record['offset'] = self.count * self.frame_bytes
+        self._index_file.write(self._index_record.tobytes())
+
+        self.last_timestamp = timestamp
+        self.count += 1
+        return self.count - 1
+
+    @property
+    def bytes_written(self):
+        return self.count * (self.frame_bytes + INDEX_DTYPE.itemsize)
+
+    def close(self):
+        """
+        刷新数据，把 .frames 文件截断到实际大小
+        :return: None
+        """
+        if self._frames_file.closed:
+            return
+        self._mmap.flush()
+        del self._mmap
+        self._mmap = None
+        self._frames_file.truncate(self.count * self.frame_bytes)
+        self._frames_file.close()
+        self._index_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+class FrameRecordingReader:
+    """
+    录像读取器
+    帧数据以只读内存映射打开，按帧号或时间定位，返回的帧是内存映射上的视图，不会复制数据
+    """
+    def __init__(self, path):
+        """
+        :param path: 录像路径（不含扩展名）
+        """
+        self.path = path
+        with open(path + HEADER_SUFFIX) as f:
+            header = json.load(f)
+        self.shape = tuple(header['shape'])
+        self.dtype = np.dtype(header['dtype'])
+        self.frame_bytes = int(np.prod(self.shape)) * self.dtype.itemsize
+
+        index = np.fromfile(path + INDEX_SUFFIX, dtype=INDEX_DTYPE)
+        # 写入中断时 .frames 可能比索引短，以两者中完整的帧数为准
+        frames_size = os.path.getsize(path + FRAMES_SUFFIX)
+        count = min(len(index), frames_size // self.frame_bytes) if self.frame_bytes else 0
+        self.index = index[:count]
+        self.timestamps = self.index['timestamp']
+
+        if count:
+            self.frames = np.memmap(path + FRAMES_SUFFIX, dtype=self.dtype, mode='r',
+                                    shape=(count,) + self.shape)
+        else:
+            self.frames = np.empty((0,) + self.shape, dtype=self.dtype)
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def __getitem__(self, i):
+        """按帧号获取帧视图，支持切片（切片也是视图）"""
+        return self.frames[i]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.frames[i], float(self.timestamps[i])
+
+    @property
+    def start_time(self):
+        return float(self.timestamps[0]) if len(self) else None
+
+    @property
+    def end_time(self):
+        return float(self.timestamps[-1]) if len(self) else None
+
+    def index_at_time(self, timestamp):
+        """
+        找到时间戳不晚于 timestamp 的最后一帧
+        帧率基本恒定，先按平均帧间隔估算帧号，再在附近修正；偏差较大时退回二分查找
+        :param timestamp: 时间（秒）
+        :return: 帧号，早于第一帧时返回0
+        """
+        ts = self.timestamps
+        n = len(ts)
+        if n == 0 or timestamp <= ts[0]:
+            return 0
+        if timestamp >= ts[-1]:
+            return n - 1
+
+        span = ts[-1] - ts[0]
+        i = int((timestamp - ts[0]) / span * (n - 1)) if span > 0 else 0
+        i = min(max(i, 0), n - 1)
+        for _ in range(8):
+            if ts[i] > timestamp:
+                i -= 1
+            elif i + 1 < n and ts[i + 1] <= timestamp:
+                i += 1
+            else:
+                return i
+        i = int(np.searchsorted(ts, timestamp, side='right')) - 1
+        return max(i, 0)
+
+    def frame_at_time(self, timestamp):
+        """
+        按时间定位帧
+        :param timestamp: 时间（秒）
+        :return: (帧号, 帧视图, 该帧时间戳)，录像为空时返回None
+        """
+        if not len(self):
+            return None
+        i = self.index_at_time(timestamp)
+        return i, self.frames[i], float(self.timestamps[i])
+
+    def frames_between(self, start_time, end_time):
+        """
+        获取时间区间 [start_time, end_time] 内的所有帧
+        :return: (帧数组视图, 时间戳数组)
+        """
+        i0 = int(np.searchsorted(self.timestamps, start_time, side='left'))
+        i1 = int(np.searchsorted(self.timestamps, end_time, side='right'))
+        return self.frames[i0:i1], self.timestamps[i0:i1]
+
+    def close(self):
+        """
+        释放对内存映射的引用；已经取出的帧视图仍然持有映射，映射在最后一个视图释放后才关闭
+        :return: None
+        """
+        self.frames = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+_PNG_NAME_PATTERN = re.compile(r'(\d{8}_\d{6}_\d{6})')
+
+def _timestamp_from_filename(path):
+    match = _PNG_NAME_PATTERN.search(os.path.basename(path))
+    if match:
+        return datetime.strptime(match.group(1), "%Y%m%d_%H%M%S_%f").timestamp()
+    return os.path.getmtime(path)
+
+def import_image_directory(src_dir, dst_path, pattern='.png'):
+    """
+    将图片目录（如 ssh_camera_test.py 旧版本保存的 camera_images/image_*.png）转换为录像
+    时间戳从文件名 image_%Y%m%d_%H%M%S_%f 中解析，解析不到时使用文件修改时间
+    :param src_dir: 图片目录
+    :param dst_path: 录像路径（不含扩展名）
+    :param pattern: 图片扩展名
+    :return: 导入的帧数
+    """
+    import cv2
+
+    files = [os.path.join(src_dir, name) for name in os.listdir(src_dir) if name.endswith(pattern)]
+    entries = sorted((_timestamp_from_filename(path), path) for path in files)
+
+    recorder = None
+    try:
+        for timestamp, path in entries:
+            frame = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+            if frame is None:
+                print(f"无法读取图片: {path}")
+                continue
+            if recorder is None:
+                recorder = FrameRecorder(dst_path, frame.shape, frame.dtype)
+            elif frame.shape != recorder.shape:
+                print(f"图片尺寸不一致，已跳过: {path}")
+                continue
+            recorder.append(frame, timestamp)
+    finally:
+        if recorder is not None:
+            recorder.close()
+
+    return recorder.count if recorder is not None else 0
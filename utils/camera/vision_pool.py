@@ -0,0 +1,315 @@
+import os
+import time
+import threading
+import multiprocessing
+from multiprocessing import shared_memory
+
+import numpy as np
+
+class Resize:
+    """缩放到固定尺寸"""
+    def __init__(self, size, interpolation=None):
+        """
+        :param size: (宽, 高)
+        :param interpolation: OpenCV插值方式，默认 INTER_AREA
+        """
+        self.size = tuple(size)
+        self.interpolation = interpolation
+
+    def __call__(self, frame):
+        import cv2
+        interpolation = cv2.INTER_AREA if self.interpolation is None else self.interpolation
+        return cv2.resize(frame, self.size, interpolation=interpolation)
+
+class ConvertColor:
+    """颜色空间转换，如 cv2.COLOR_BGR2GRAY"""
+    def __init__(self, code):
+        self.code = code
+
+    def __call__(self, frame):
+        import cv2
+        return cv2.cvtColor(frame, self.code)
+
+class ColorBlobDetect:
+    """
+    颜色区域检测：HSV范围内的像素做连通域分析
+    :return: 包围框列表 [(x, y, w, h, 面积), ...]，坐标为输入帧的坐标
+    """
+    def __init__(self, lower, upper, min_area=50):
+        """
+        :param lower: HSV下限 (h, s, v)
+        :param upper: HSV上限 (h, s, v)
+        :param min_area: 最小面积（像素）
+        """
+        self.lower = np.array(lower, np.uint8)
+        self.upper = np.array(upper, np.uint8)
+        self.min_area = min_area
+
+    def __call__(self, frame):
+        import cv2
+        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+        mask = cv2.inRange(hsv, self.lower, self.upper)
+        count, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+        regions = stats[1:count]
+        return [tuple(int(v) for v in region) for region in regions if region[4] >= self.min_area]
+
+class JpegEncode:
+    """JPEG编码，返回字节串"""
+    def __init__(self, quality=80):
+        self.quality = quality
+
+    def __call__(self, frame):
+        import cv2
+        ok, data = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            raise RuntimeError("JPEG编码失败")
+        return data.tobytes()
+
+class VisionResult:
+    """一帧的处理结果，value 为处理链最后一步的返回值，出错时 error 为错误信息"""
+    __slots__ = ('seq', 'timestamp', 'value', 'error', 'worker', 'process_ms')
+
+    def __init__(self, seq, timestamp, value, error, worker, process_ms):
+        self.seq = seq
+        self.timestamp = timestamp
+        self.value = value
+        self.error = error
+        self.worker = worker
+        self.process_ms = process_ms
+
+    def __repr__(self):
+        return f"VisionResult(seq={self.seq}, worker={self.worker}, {self.process_ms:.2f} ms, error={self.error})"
+
+def _attach_shared_memory(name):
+    try:
+        # Python 3.13+：子进程只是使用，由主进程负责释放
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # 更早的版本中子进程与主进程共用同一个资源跟踪器，重复登记不会导致提前释放
+        return shared_memory.SharedMemory(name=name)
+
+def _worker_main(index, shm_name, shape, dtype, processors, tasks, results):
+    """工作进程：从共享内存槽位读取帧，依次执行处理链，把结果送回主进程"""
+    import cv2
+    # 每个进程只用一个OpenCV线程，并行度由进程数决定
+    cv2.setNumThreads(1)
+    shm = _attach_shared_memory(shm_name)
+    frame_bytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            slot, seq, timestamp = task
+            frame = np.ndarray(shape, dtype, buffer=shm.buf, offset=slot * frame_bytes)
+            started = time.perf_counter()
+            value, error = frame, None
+            try:
+                for processor in processors:
+                    value = processor(value)
+                if value is frame:
+                    # 没有处理器时返回副本，槽位之后会被复用
+                    value = frame.copy()
+            except Exception as e:
+                value, error = None, f"{type(e).__name__}: {e}"
+            del frame
+            results.put((slot, seq, timestamp, value, error, index, (time.perf_counter() - started) * 1000))
+    finally:
+        shm.close()
+
+class VisionWorkerPool:
+    """
+    多进程帧处理池
+    帧复制到共享内存中的槽位，任务队列只传槽位号，工作进程直接在共享内存上读取，不需要序列化帧数据；
+    每个工作进程依次执行处理链（processors），结果按送入顺序返回。
+    处理链中的每一步是可序列化的可调用对象（模块级函数或 Resize 等类的实例），输入上一步的输出；
+    结果通过队列传回，应当尽量小（包围框、JPEG字节串、缩小后的图像）
+    """
+    def __init__(self, processors, shape, dtype=np.uint8, workers=None, slots=None):
+        """
+        :param processors: 处理链，可调用对象列表
+        :param shape: 帧形状
+        :param dtype: 像素类型
+        :param workers: 工作进程数，默认为CPU核数
+        :param slots: 共享内存槽位数（同时在处理中的最多帧数），默认为工作进程数的2倍
+        """
+        self.processors = list(processors)
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.workers = workers or os.cpu_count() or 1
+        self.slots = slots or self.workers * 2
+        self.frame_bytes = int(np.prod(self.shape)) * self.dtype.itemsize
+
+        self._shm = None
+        self._frames = None
+        self._processes = []
+        self._tasks = None
+        self._results = None
+        self._collector = None
+
+        # 空闲槽位，结果返回后才回收
+        self._free_slots = list(range(self.slots))
+        self._slot_condition = threading.Condition()
+        # 按序号排队等待交付的结果
+        self._ready = {}
+        self._result_condition = threading.Condition()
+        self._next_submit = 0
+        self._next_deliver = 0
+
+        # 统计
+        self.submitted = 0
+        self.completed = 0
+        self.dropped = 0
+        self.errors = 0
+        self._process_ms = 0.0
+        self._copy_ms = 0.0
+
+    # 启动与停止 ---------------------------------------------------------
+    def start(self):
+        """
+        分配共享内存并启动工作进程
+        :return: self
+        """
+        if self._processes:
+            return self
+        self._shm = shared_memory.SharedMemory(create=True, size=self.slots * self.frame_bytes)
+        self._frames = np.ndarray((self.slots,) + self.shape, self.dtype, buffer=self._shm.buf)
+        context = multiprocessing.get_context()
+        self._tasks = context.Queue()
+        self._results = context.Queue()
+        for i in range(self.workers):
+            process = context.Process(
+                target=_worker_main,
+                args=(i, self._shm.name, self.shape, self.dtype.str, self.processors, self._tasks, self._results),
+                name=f'vision-worker-{i}', daemon=True)
+            process.start()
+            self._processes.append(process)
+        self._collector = threading.Thread(target=self._collect, name='vision-collector', daemon=True)
+        self._collector.start()
+        return self
+
+    def stop(self):
+        """
+        等待已送入的帧处理完，停止工作进程并释放共享内存
+        :return: None
+        """
+        if not self._processes:
+            return
+        for _ in self._processes:
+            self._tasks.put(None)
+        for process in self._processes:
+            process.join()
+        self._processes = []
+        self._results.put(None)
+        self._collector.join()
+        self._collector = None
+        self._frames = None
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    # 送入与取回 ---------------------------------------------------------
+    def submit(self, frame, timestamp=None, block=True, timeout=None):
+        """
+        送入一帧
+        :param frame: 与 shape 一致的帧
+        :param timestamp: 时间戳（秒），为None时使用 time.time()
+        :param block: 没有空闲槽位时是否等待；为False时直接丢弃这一帧
+        :param timeout: 等待空闲槽位的超时时间（秒）
+        :return: 序号，丢弃时返回None
+        """
+        with self._slot_condition:
+            if not self._free_slots:
+                if not block or not self._slot_condition.wait_for(lambda: self._free_slots, timeout):
+                    self.dropped += 1
+                    return None
+            slot = self._free_slots.pop()
+        started = time.perf_counter()
+        np.copyto(self._frames[slot], frame, casting='unsafe')
+        self._copy_ms += (time.perf_counter() - started) * 1000
+
+        seq = self._next_submit
+        self._next_submit += 1
+        self.submitted += 1
+        self._tasks.put((slot, seq, time.time() if timestamp is None else timestamp))
+        return seq
+
+    def get(self, timeout=None):
+        """
+        按送入顺序取回下一个结果
+        :param timeout: 超时时间（秒）
+        :return: VisionResult，超时返回None
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._result_condition:
+            while self._next_deliver not in self._ready:
+                remaining = 1.0 if deadline is None else min(1.0, deadline - time.monotonic())
+                if remaining <= 0:
+                    return None
+                self._result_condition.wait(remaining)
+                if self._next_deliver not in self._ready and any(not p.is_alive() for p in self._processes):
+                    raise RuntimeError("帧处理工作进程意外退出")
+            result = self._ready.pop(self._next_deliver)
+            self._next_deliver += 1
+            return result
+
+    def pending(self):
+        """已送入但还没有取回的帧数"""
+        return self._next_submit - self._next_deliver
+
+    def map(self, frames, timestamps=None):
+        """
+        处理一串帧，按顺序逐个返回结果；同时在处理中的帧数受槽位数限制
+        :param frames: 帧的可迭代对象
+        :param timestamps: 时间戳的可迭代对象，为None时使用 time.time()
+        :return: VisionResult 生成器
+        """
+        timestamps = iter(timestamps) if timestamps is not None else None
+        for frame in frames:
+            while self.pending() >= self.slots:
+                yield self.get()
+            self.submit(frame, next(timestamps) if timestamps is not None else None)
+        while self.pending():
+            yield self.get()
+
+    def _collect(self):
+        while True:
+            item = self._results.get()
+            if item is None:
+                break
+            slot, seq, timestamp, value, error, worker, process_ms = item
+            with self._slot_condition:
+                self._free_slots.append(slot)
+                self._slot_condition.notify()
+            self.completed += 1
+            self._process_ms += process_ms
+            if error is not None:
+                self.errors += 1
+                print(f"帧处理出错 (序号 {seq}): {error}")
+            with self._result_condition:
+                self._ready[seq] = VisionResult(seq, timestamp, value, error, worker, process_ms)
+                self._result_condition.notify_all()
+
+    def stats(self):
+        """
+        处理统计
+        :return: dict，copy_ms 为主进程把帧复制进共享内存的平均耗时，process_ms 为工作进程中处理链的平均耗时
+        """
+        completed = max(self.completed, 1)
+        return {
+            'workers': self.workers,
+            'slots': self.slots,
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'pending': self.pending(),
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'copy_ms': self._copy_ms / max(self.submitted, 1),
+            'process_ms': self._process_ms / completed,
+        }
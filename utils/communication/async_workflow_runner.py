@@ -0,0 +1,205 @@
+import os
+import sys
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+current_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(current_dir)
+
+from utils.communication.coze_client import CozeStreamClient
+from utils.communication.run_coze_workflow import parse_message_command, execute_command_data, extract_resume_num
+
+# 电机命令与事件流之间的同步方式
+# none:          读事件流和执行电机命令完全重叠，遇到中断立即恢复
+# before_resume: 恢复中断前等待已收到的电机命令全部执行完
+# each_command:  每条电机命令执行完才继续读事件流（与同步版 run_coze_workflow 行为一致）
+BARRIER_NONE = 'none'
+BARRIER_BEFORE_RESUME = 'before_resume'
+BARRIER_EACH_COMMAND = 'each_command'
+
+_BARRIERS = (BARRIER_NONE, BARRIER_BEFORE_RESUME, BARRIER_EACH_COMMAND)
+
+# 事件流读完的标记
+_STREAM_END = object()
+
+class AsyncWorkflowRunner:
+    """
+    基于asyncio的Coze工作流执行器
+    一个任务读取事件流，电机命令放入队列由执行任务按顺序执行，
+    电机运动期间仍然可以继续读取后续事件并及时恢复中断
+    """
+    def __init__(self, workflow_id, client=None, command_handler=None, barrier=BARRIER_NONE,
+                 resume_data='next', max_pending_commands=64, verbose=True, vision=None):
+        """
+        :param workflow_id: Coze工作流ID
+        :param client: CozeStreamClient实例，为None时自动创建
+        :param command_handler: 电机命令执行函数，参数为命令字典或命令列表，默认为 execute_command_data
+        :param barrier: 同步方式，'none', 'before_resume' 或 'each_command'
+        :param resume_data: 恢复中断时提交的数据
+        :param max_pending_commands: 等待执行的命令数上限，队列满时暂停读取事件流
+        :param verbose: 是否打印命令执行结果
+        :param vision: VisionUploader实例，设置后启动和每次恢复时附带当前的摄像头画面
+        """
+        if barrier not in _BARRIERS:
+            raise ValueError(f"未知的同步方式: {barrier}，可选 {_BARRIERS}")
+
+        self.workflow_id = workflow_id
+        self.client = client
+        self.command_handler = command_handler or execute_command_data
+        self.barrier = barrier
+        self.resume_data = resume_data
+        self.max_pending_commands = max_pending_commands
+        self.verbose = verbose
+        self.vision = vision
+
+        # 运行统计
+        self.results = []
+        self.command_latencies = []  # 收到命令到开始执行的等待时间（秒）
+        self.resume_count = 0
+
+    async def run(self):
+        """
+        执行工作流直到结束（不再有中断）
+        :return: 运行统计字典
+        """
+        loop = asyncio.get_running_loop()
+        own_client = self.client is None
+        if own_client:
+            self.client = CozeStreamClient()
+
+        # 事件流读取和电机命令各用独立的线程，电机命令按顺序在同一线程执行
+        self._io_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='coze-io')
+        self._motor_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='coze-motor')
+        self._queue = asyncio.Queue(self.max_pending_commands)
+
+        start = time.perf_counter()
+        executor_task = asyncio.create_task(self._execute_commands(loop))
+        try:
+            await self._consume_events(loop)
+            await self._queue.join()
+        finally:
+            executor_task.cancel()
+            try:
+                await executor_task
+            except asyncio.CancelledError:
+                pass
+            self._io_executor.shutdown(wait=False)
+            self._motor_executor.shutdown(wait=True)
+            if own_client:
+                self.client.close()
+                self.client = None
+
+        return {
+            'commands': len(self.results),
+            'resumes': self.resume_count,
+            'elapsed': time.perf_counter() - start,
+            'max_command_wait': max(self.command_latencies, default=0.0),
+            'results': self.results,
+        }
+
+    async def _open_stream(self, loop, resume=None):
+        # 选帧、编码和上传都是阻塞操作，和发起请求一起放在IO线程中
+        return await loop.run_in_executor(self._io_executor, self._open_stream_blocking, resume)
+
+    def _open_stream_blocking(self, resume):
+        vision = self.vision
+        if resume is None:
+            parameters = vision.run_parameters() if vision is not None else None
+            return self.client.stream_run(self.workflow_id, parameters)
+
+        event_id, type_num = resume
+        resume_data = vision.resume_data(self.resume_data) if vision is not None else self.resume_data
+        return self.client.stream_resume(self.workflow_id, event_id, type_num, resume_data)
+
+    async def _consume_events(self, loop):
+        pending_stream = asyncio.ensure_future(self._open_stream(loop))
+
+        try:
+            while pending_stream is not None:
+                opening, pending_stream = pending_stream, None
+                events = await opening
+                try:
+                    while True:
+                        event = await loop.run_in_executor(self._io_executor, next, events, _STREAM_END)
+                        if event is _STREAM_END:
+                            break
+
+                        if event.event == 'Message':
+                            command_data = parse_message_command(event.data)
+                            if command_data is None:
+                                continue
+                            await self._queue.put((command_data, time.perf_counter()))
+                            if self.barrier == BARRIER_EACH_COMMAND:
+                                await self._queue.join()
+
+                        elif event.event == 'Interrupt':
+                            resume = extract_resume_num(event.data)
+                            if resume is None:
+                                continue
+                            if self.barrier == BARRIER_BEFORE_RESUME:
+                                await self._queue.join()
+                            # 同一个流中又出现中断时以最后一个为准，之前的恢复流不再读取
+                            if pending_stream is not None:
+                                await self._discard_stream(loop, pending_stream)
+                            # 立即发出恢复请求，同时把当前流剩余的数据读完
+                            self.resume_count += 1
+                            pending_stream = asyncio.ensure_future(self._open_stream(loop, resume))
+
+                        elif event.event == 'Error':
+                            print(f"工作流出错: {event.data}")
+                finally:
+                    await loop.run_in_executor(self._io_executor, events.close)
+        finally:
+            # 出错退出时已经发出的恢复请求
+            if pending_stream is not None:
+                await self._discard_stream(loop, pending_stream)
+
+    async def _discard_stream(self, loop, pending_stream):
+        """
+        关闭不再读取的事件流
+        请求已经在IO线程中发出，无法撤回，等它返回后关闭，释放连接
+        """
+        try:
+            events = await pending_stream
+        except Exception as e:
+            print(f"丢弃的恢复请求出错: {e!r}")
+            return
+        await loop.run_in_executor(self._io_executor, events.close)
+
+    async def _execute_commands(self, loop):
+        while True:
+            command_data, received = await self._queue.get()
+            try:
+                self.command_latencies.append(time.perf_counter() - received)
+                result = await loop.run_in_executor(self._motor_executor, self.command_handler, command_data)
+                self.results.append(result)
+                if self.verbose:
+                    print(result)
+            except Exception as e:
+                self.results.append({'success': False, 'error': str(e)})
+            finally:
+                self._queue.task_done()
+
+def run_coze_workflow_async(workflow_id="7490536647290699787", client=None, barrier=BARRIER_NONE, **kwargs):
+    """
+    用asyncio执行器运行Coze工作流
+
+    参数:
+        workflow_id: Coze工作流ID
+        client: CozeStreamClient实例，为None时自动创建
+        barrier: 同步方式，'none', 'before_resume' 或 'each_command'
+
+    返回:
+        dict: 运行统计
+    """
+    runner = AsyncWorkflowRunner(workflow_id, client=client, barrier=barrier, **kwargs)
+    return asyncio.run(runner.run())
+
+if __name__ == "__main__":
+    workflow_id = "7492954257341513755"  # 默认工作流ID
+
+    if len(sys.argv) > 1:
+        workflow_id = sys.argv[1]
+
+    run_coze_workflow_async(workflow_id)
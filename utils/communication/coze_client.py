@@ -0,0 +1,228 @@
+import os
+import sys
+import uuid
+import threading
+import http.client
+from urllib.parse import urlsplit
+
+current_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(current_dir)
+
+from utils.json_backend import json_dumps, json_loads, JSONDecodeError
+from utils.communication.sse_parser import SSEEvent, iter_sse_events
+
+# Coze开放平台地址和访问令牌，可通过环境变量覆盖
+COZE_API_BASE = os.environ.get('COZE_API_BASE', 'https://api.coze.cn')
+COZE_API_TOKEN = os.environ.get('COZE_API_TOKEN', 'pat_6Vkv0jN3NhumeU5EPbTx14b8e0g40f4gUp0LsMdgCXXx2e4XsUZu2RXwPvYUpHPt')
+
+STREAM_RUN_PATH = '/v1/workflow/stream_run'
+STREAM_RESUME_PATH = '/v1/workflow/stream_resume'
+FILE_UPLOAD_PATH = '/v1/files/upload'
+
+# 复用连接时，这些异常说明服务端已经关闭了空闲连接，可以换新连接重试
+_STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+
+class CozeAPIError(Exception):
+    """Coze接口返回错误"""
+    def __init__(self, status, body):
+        super().__init__(f"Coze接口错误 (HTTP {status}): {body}")
+        self.status = status
+        self.body = body
+
+def _iter_response_chunks(response, chunk_size=65536):
+    """
+    按到达顺序读取HTTP响应体，有多少数据就返回多少，不等待凑满chunk_size
+    :param response: http.client.HTTPResponse
+    :return: 字节串迭代器
+    """
+    while True:
+        chunk = response.read1(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+class CozeStreamClient:
+    """
+    Coze工作流流式接口客户端
+    进程内直接发送HTTP请求并解析SSE事件，连接池保持长连接，
+    工作流运行和中断恢复可以复用同一个TLS连接
+    """
+    def __init__(self, base_url=COZE_API_BASE, token=COZE_API_TOKEN, timeout=60, max_idle_connections=4):
+        """
+        :param base_url: 接口地址，如 'https://api.coze.cn' 或本地测试服务器 'http://127.0.0.1:8000'
+        :param token: 访问令牌
+        :param timeout: 套接字超时时间（秒）
+        :param max_idle_connections: 连接池中最多保留的空闲连接数
+        """
+        parts = urlsplit(base_url)
+        if parts.scheme not in ('http', 'https'):
+            raise ValueError(f"不支持的协议: {parts.scheme}")
+
+        self._connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self._host = parts.hostname
+        self._port = parts.port
+        self._base_path = parts.path.rstrip('/')
+        self._timeout = timeout
+        self._max_idle_connections = max_idle_connections
+        self._headers = {
+            'Authorization': f'Bearer {token}',
+            'Content-Type': 'application/json',
+            'Accept': 'text/event-stream',
+            'Connection': 'keep-alive',
+        }
+
+        self._idle_connections = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def stream_run(self, workflow_id, parameters=None):
+        """
+        启动工作流
+        :param workflow_id: Coze工作流ID
+        :param parameters: 工作流输入参数字典，默认为 {"head_input": ""}
+        :return: SSEEvent迭代器
+        """
+        if parameters is None:
+            parameters = {'head_input': ''}
+        body = {
+            'parameters': parameters,
+            'workflow_id': workflow_id,
+        }
+        return self._stream(STREAM_RUN_PATH, body)
+
+    def stream_resume(self, workflow_id, event_id, interrupt_type, resume_data='next'):
+        """
+        恢复被中断的工作流
+        :param workflow_id: Coze工作流ID
+        :param event_id: 中断事件ID
+        :param interrupt_type: 中断类型
+        :param resume_data: 恢复时提交的数据
+        :return: SSEEvent迭代器
+        """
+        body = {
+            'workflow_id': workflow_id,
+            'event_id': event_id,
+            'interrupt_type': interrupt_type,
+            'resume_data': resume_data,
+        }
+        return self._stream(STREAM_RESUME_PATH, body)
+
+    def upload_file(self, data, file_name='frame.jpg', content_type='image/jpeg'):
+        """
+        上传文件，得到的文件ID可以作为工作流的图片等文件参数
+        :param data: 文件内容（字节串）
+        :param file_name: 文件名
+        :param content_type: 文件类型
+        :return: 接口返回的文件信息字典，包含 'id'
+        """
+        boundary = uuid.uuid4().hex
+        payload = b''.join((
+            b'--%s\r\n' % boundary.encode(),
+            b'Content-Disposition: form-data; name="file"; filename="%s"\r\n' % file_name.encode('utf-8'),
+            b'Content-Type: %s\r\n\r\n' % content_type.encode(),
+            data,
+            b'\r\n--%s--\r\n' % boundary.encode(),
+        ))
+        headers = dict(self._headers)
+        headers['Content-Type'] = f'multipart/form-data; boundary={boundary}'
+        headers['Accept'] = 'application/json'
+        conn, response = self._send(FILE_UPLOAD_PATH, payload, headers)
+        try:
+            body = response.read()
+        except Exception:
+            conn.close()
+            raise
+        if response.will_close:
+            conn.close()
+        else:
+            self._release_connection(conn)
+
+        try:
+            result = json_loads(body)
+        except JSONDecodeError:
+            raise CozeAPIError(response.status, body.decode('utf-8', errors='replace'))
+        if response.status != 200 or result.get('code', 0) != 0 or 'data' not in result:
+            raise CozeAPIError(response.status, body.decode('utf-8', errors='replace'))
+        return result['data']
+
+    def close(self):
+        """
+        关闭所有空闲连接
+        :return: None
+        """
+        with self._lock:
+            self._closed = True
+            connections = self._idle_connections
+            self._idle_connections = []
+        for conn in connections:
+            conn.close()
+
+    def _acquire_connection(self):
+        with self._lock:
+            if self._idle_connections:
+                return self._idle_connections.pop(), True
+        return self._connection_class(self._host, self._port, timeout=self._timeout), False
+
+    def _release_connection(self, conn):
+        with self._lock:
+            if not self._closed and len(self._idle_connections) < self._max_idle_connections:
+                self._idle_connections.append(conn)
+                return
+        conn.close()
+
+    def _send(self, path, payload, headers=None):
+        """
+        发送请求并返回 (连接, 响应)
+        复用的空闲连接已被服务端关闭时，换新连接重试一次
+        """
+        headers = headers or self._headers
+        conn, reused = self._acquire_connection()
+        try:
+            conn.request('POST', self._base_path + path, body=payload, headers=headers)
+            return conn, conn.getresponse()
+        except _STALE_CONNECTION_ERRORS:
+            conn.close()
+            if not reused:
+                raise
+        except Exception:
+            conn.close()
+            raise
+
+        conn = self._connection_class(self._host, self._port, timeout=self._timeout)
+        try:
+            conn.request('POST', self._base_path + path, body=payload, headers=headers)
+            return conn, conn.getresponse()
+        except Exception:
+            conn.close()
+            raise
+
+    def _stream(self, path, body):
+        payload = json_dumps(body).encode('utf-8')
+        conn, response = self._send(path, payload)
+
+        content_type = response.getheader('Content-Type', '')
+        if response.status != 200 or 'text/event-stream' not in content_type:
+            error_body = response.read().decode('utf-8', errors='replace')
+            conn.close()
+            raise CozeAPIError(response.status, error_body)
+
+        return self._iter_response(conn, response)
+
+    def _iter_response(self, conn, response):
+        completed = False
+        try:
+            yield from iter_sse_events(_iter_response_chunks(response))
+            completed = True
+        finally:
+            # 只有完整读完的响应才能把连接放回连接池
+            if completed and not response.will_close:
+                response.close()
+                self._release_connection(conn)
+            else:
+                conn.close()
@@ -1,123 +1,147 @@
-import subprocess
-import json
-import os
 import sys
-import re
-import tempfile
 current_dir = "/mnt/Monitor_car"
 sys.path.append(current_dir)
 
-# 导入脚本生成函数
-from utils.communication.generate_coze_script import generate_coze_head_script, generate_coze_resume_script
-from utils.lego_motor.lego_motor_utils import execute_motor_command
+from utils.communication.coze_client import CozeStreamClient
+from utils.lego_motor.lego_motor_utils import execute_motor_command_dict, execute_motor_commands
+from utils.json_backend import json_loads, JSONDecodeError
+def _strip_data_prefix(data_str):
+    # 去除字符串开头的"data:"前缀及其后的一个空格（只去前缀，不按字符逐个去除）
+    if data_str.startswith('data:'):
+        data_str = data_str[5:]
+        if data_str.startswith(' '):
+            data_str = data_str[1:]
+    return data_str
+
 def extract_resume_num(data_str):
-    # 去除字符串开头的"data: "
-    data_str = data_str.lstrip('data: ')
+    # 兼容带"data: "前缀的原始行和SSEEvent.data
+    data_str = _strip_data_prefix(data_str)
     try:
         # 解析JSON数据
-        data = json.loads(data_str)
+        data = json_loads(data_str)
         # 提取event_id中的第一串数字
         event_id_num = data["interrupt_data"]["event_id"]
         type_num = data["interrupt_data"]["type"]
         return event_id_num, type_num
-    except (KeyError, IndexError, json.JSONDecodeError):
+    except (KeyError, IndexError, JSONDecodeError):
         print("解析字符串时出现错误，请检查输入字符串的格式。")
         return None
 
 def content_text(data_str):
-    # 去除字符串开头的"data: "
-    data_str = data_str.lstrip('data: ')
+    # 兼容带"data: "前缀的原始行和SSEEvent.data
+    data_str = _strip_data_prefix(data_str)
     try:
         # 解析JSON数据
-        data = json.loads(data_str)
+        data = json_loads(data_str)
         # 提取content
         content = data["content"]
         node_is_finish = data.get("node_is_finish", True)
         return content, node_is_finish
-    except (KeyError, IndexError, json.JSONDecodeError):
+    except (KeyError, IndexError, JSONDecodeError):
         print("解析字符串时出现错误，请检查输入字符串的格式。")
         return None, True
     
-def run_coze_workflow(workflow_id="7490536647290699787", script_path=None):
+def parse_message_command(data_str):
     """
-    执行Coze工作流并捕获其输出，只显示工作流的实际输出
+    从一条Message事件中取出电机控制命令
     
     参数:
-        workflow_id: Coze工作流ID
-        head_input: 工作流的输入参数
-        script_path: 脚本路径，如果为None则自动生成
+        data_str: Message事件的data字段
+        
+    返回:
+        命令字典、命令列表，或None（内容不是电机控制命令）
     """
-    # 如果未提供脚本路径，则生成脚本
-    script_path = generate_coze_head_script(workflow_id)
+    json_str, _ = content_text(data_str)
+    if not json_str or 'type' not in json_str:
+        return None
     
     try:
-        # 执行shell脚本并捕获输出
-        task_flag = 0
-        bash_flag = 0
-
-        # 实时输出结果，但只显示工作流相关输出
-        while True:
-            if bash_flag == 0:
-                process = subprocess.Popen(
-                    ["bash", script_path],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True
-                )
-                bash_flag = 1
-            output = process.stdout.readline()
-            if output == '' and process.poll() is not None:
-                break
-            elif output == "event: Message\n":
-                task_flag = 1
-            elif output == "event: Interrupt\n":
-                task_flag = 2
-
-            elif output and task_flag == 1:
-                content = content_text(output.strip())
-                if isinstance(content, tuple):
-                    json_str, _ = content
-                    if 'type' in json_str:
-                        try:
-                            command_data = json.loads(json_str)
-                            if isinstance(command_data, dict) and 'type' in command_data:
-                                # 如果是电机控制命令，则执行
-                                result = execute_motor_command(json.dumps(command_data))
-                                print(result)
-                            else:
-                                print(json_str)
-                        except json.JSONDecodeError:
-                            print(json_str)
-                task_flag = 0
+        command_data = json_loads(json_str)
+    except JSONDecodeError:
+        print(json_str)
+        return None
+    
+    if isinstance(command_data, dict) and 'type' in command_data:
+        return command_data
+    if isinstance(command_data, list):
+        return command_data
+    
+    print(json_str)
+    return None
 
-            elif output and task_flag == 2:
-                event_id, type_num = extract_resume_num(output.strip())
-                script_path = generate_coze_resume_script(workflow_id, event_id, type_num)
-                bash_flag = 0
-                task_flag = 0
-        
-        # 获取返回码
-        return_code = process.poll()
+def execute_command_data(command_data):
+    """
+    执行parse_message_command得到的命令：单条命令直接执行，命令列表批量执行
+    
+    参数:
+        command_data: 命令字典或命令列表
         
-        # 获取所有输出
-        stdout, stderr = process.communicate()
+    返回:
+        dict: 执行结果
+    """
+    if isinstance(command_data, list):
+        return execute_motor_commands(command_data)
+    return execute_motor_command_dict(command_data)
 
-    finally:
-        # 如果是临时生成的脚本，则删除
-        if script_path is None or script_path.startswith(tempfile.gettempdir()):
+def handle_message(data_str):
+    """
+    处理一条Message事件：内容是电机控制命令时执行
+    
+    参数:
+        data_str: Message事件的data字段
+    """
+    command_data = parse_message_command(data_str)
+    if command_data is not None:
+        result = execute_command_data(command_data)
+        print(result)
+
+def run_coze_workflow(workflow_id="7490536647290699787", client=None, vision=None):
+    """
+    执行Coze工作流并处理其输出，遇到中断时自动恢复
+    
+    参数:
+        workflow_id: Coze工作流ID
+        client: CozeStreamClient实例，为None时自动创建，多次运行可传入同一个实例以复用连接
+        vision: VisionUploader实例，设置后启动和每次恢复时附带当前的摄像头画面
+    """
+    own_client = client is None
+    if own_client:
+        client = CozeStreamClient()
+    
+    try:
+        parameters = vision.run_parameters() if vision is not None else None
+        events = client.stream_run(workflow_id, parameters)
+        while events is not None:
+            resume = None
             try:
-                os.unlink(script_path)
-            except:
-                pass
+                for event in events:
+                    if event.event == 'Message':
+                        handle_message(event.data)
+                    elif event.event == 'Interrupt':
+                        # 中断事件是流中的最后一个事件，读完剩余数据后连接可以放回连接池复用
+                        resume = extract_resume_num(event.data)
+                    elif event.event == 'Error':
+                        print(f"工作流出错: {event.data}")
+            finally:
+                events.close()
+            
+            # 中断后恢复工作流，继续读取新的事件流
+            if resume is None:
+                events = None
+            else:
+                event_id, type_num = resume
+                resume_data = vision.resume_data() if vision is not None else 'next'
+                events = client.stream_resume(workflow_id, event_id, type_num, resume_data)
+    finally:
+        if own_client:
+            client.close()
 
 if __name__ == "__main__":
-    # 可以从命令行参数获取workflow_id和head_input
+    # 可以从命令行参数获取workflow_id
 
     workflow_id = "7492954257341513755"  # 默认工作流ID
 
-    if len(sys.argv) > 3:
-        script_path = sys.argv[3]
-    else:
-        script_path = None
+    if len(sys.argv) > 1:
+        workflow_id = sys.argv[1]
     
-    result = run_coze_workflow(workflow_id, script_path)
\ No newline at end of file
+    run_coze_workflow(workflow_id)
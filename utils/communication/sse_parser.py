@@ -0,0 +1,185 @@
+import os
+import sys
+import codecs
+
+current_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(current_dir)
+
+from utils.json_backend import json_loads
+
+class SSEParseError(ValueError):
+    """事件流格式错误或超出缓冲区限制"""
+
+class SSEEvent:
+    """
+    一个服务端推送事件（Server-Sent Event）
+    event: 事件类型，如 'Message', 'Interrupt', 'Done'，未指定时为 'message'
+    data:  数据字符串，多行 data: 字段以换行连接
+    id:    最近一次收到的事件ID
+    retry: 服务端建议的重连间隔（毫秒），未指定时为None
+    """
+    __slots__ = ('event', 'data', 'id', 'retry')
+
+    def __init__(self, event, data, id=None, retry=None):
+        self.event = event
+        self.data = data
+        self.id = id
+        self.retry = retry
+
+    def json(self):
+        """
+        将data解析为JSON
+        :return: 解析后的Python对象
+        """
+        return json_loads(self.data)
+
+    def __eq__(self, other):
+        if not isinstance(other, SSEEvent):
+            return NotImplemented
+        return (self.event, self.data, self.id, self.retry) == (other.event, other.data, other.id, other.retry)
+
+    def __repr__(self):
+        return f"SSEEvent(event={self.event!r}, data={self.data!r}, id={self.id!r}, retry={self.retry!r})"
+
+class SSEParser:
+    """
+    增量SSE解析器
+    可以按任意大小的数据块喂入（字节串或字符串），数据块可以在行中间、
+    多字节字符中间或 \\r\\n 中间断开，每次喂入返回已经完整的事件
+    """
+    def __init__(self, max_line_size=1 << 20, max_event_size=4 << 20):
+        """
+        :param max_line_size: 单行最大长度（字符），超出时抛出SSEParseError
+        :param max_event_size: 单个事件data最大长度（字符），超出时抛出SSEParseError
+        """
+        self.max_line_size = max_line_size
+        self.max_event_size = max_event_size
+
+        self.last_event_id = None
+        self.retry = None
+
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._buffer = ''
+        self._pending_cr = False
+        self._event_type = ''
+        self._data_lines = []
+        self._data_size = 0
+
+    def feed(self, chunk):
+        """
+        喂入一块数据
+        :param chunk: 字节串或字符串
+        :return: 本次解析出的SSEEvent列表
+        """
+        if isinstance(chunk, (bytes, bytearray, memoryview)):
+            text = self._decoder.decode(chunk)
+        else:
+            text = chunk
+        if not text:
+            return []
+
+        # 上一块以 \r 结尾时，本块开头的 \n 属于同一个换行
+        if self._pending_cr and text[0] == '\n':
+            text = text[1:]
+        self._pending_cr = text.endswith('\r')
+        if '\r' in text:
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+
+        if '\n' not in text:
+            self._buffer += text
+            if len(self._buffer) > self.max_line_size:
+                self._reset_buffer()
+                raise SSEParseError(f"单行长度超过限制 {self.max_line_size}")
+            return []
+
+        lines = (self._buffer + text).split('\n')
+        self._buffer = lines.pop()
+        if len(self._buffer) > self.max_line_size:
+            self._reset_buffer()
+            raise SSEParseError(f"单行长度超过限制 {self.max_line_size}")
+
+        events = []
+        for line in lines:
+            event = self._process_line(line)
+            if event is not None:
+                events.append(event)
+        return events
+
+    def close(self):
+        """
+        流结束：处理缓冲区中剩余的数据
+        最后一个事件没有以空行结尾时也会返回，便于兼容提前断开的服务端
+        :return: SSEEvent列表
+        """
+        events = []
+        tail = self._buffer + self._decoder.decode(b'', final=True)
+        self._buffer = ''
+        self._pending_cr = False
+        if tail:
+            event = self._process_line(tail.rstrip('\r'))
+            if event is not None:
+                events.append(event)
+        event = self._process_line('')
+        if event is not None:
+            events.append(event)
+        return events
+
+    def _reset_buffer(self):
+        self._buffer = ''
+        self._event_type = ''
+        self._data_lines = []
+        self._data_size = 0
+
+    def _process_line(self, line):
+        # 空行：分发当前事件
+        if not line:
+            if not self._data_lines:
+                self._event_type = ''
+                return None
+            event = SSEEvent(
+                self._event_type or 'message',
+                '\n'.join(self._data_lines),
+                self.last_event_id,
+                self.retry,
+            )
+            self._event_type = ''
+            self._data_lines = []
+            self._data_size = 0
+            return event
+
+        # 以冒号开头的是注释（常用作心跳）
+        if line[0] == ':':
+            return None
+
+        field, colon, value = line.partition(':')
+        if colon and value[:1] == ' ':
+            value = value[1:]
+
+        if field == 'data':
+            self._data_size += len(value) + 1
+            if self._data_size > self.max_event_size:
+                self._reset_buffer()
+                raise SSEParseError(f"事件数据超过限制 {self.max_event_size}")
+            self._data_lines.append(value)
+        elif field == 'event':
+            self._event_type = value
+        elif field == 'id':
+            if '\0' not in value:
+                self.last_event_id = value
+        elif field == 'retry':
+            if value.isdigit():
+                self.retry = int(value)
+        return None
+
+def iter_sse_events(chunks, parser=None):
+    """
+    从数据块迭代器中解析SSE事件
+    :param chunks: 字节串或字符串的迭代器
+    :param parser: SSEParser实例，为None时新建
+    :return: SSEEvent迭代器
+    """
+    if parser is None:
+        parser = SSEParser()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+    yield from parser.close()
@@ -0,0 +1,294 @@
+import os
+import sys
+import time
+import collections
+
+import numpy as np
+
+current_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(current_dir)
+
+from utils.json_backend import json_dumps
+from utils.communication.coze_client import CozeAPIError
+
+# 附图来源：新上传、与上一张相同、命中缓存
+SOURCE_UPLOAD = 'upload'
+SOURCE_DUPLICATE = 'duplicate'
+SOURCE_CACHE = 'cache'
+
+def dhash(frame, hash_size=8):
+    """
+    差值感知哈希：缩小到 (hash_size+1) x hash_size 的灰度图，比较水平相邻像素的明暗
+    画面平移几个像素、噪声、JPEG压缩几乎不改变哈希，换了场景则有大量位不同
+    :param frame: 帧（灰度、BGR或BGRA）
+    :param hash_size: 每行的位数，哈希共 hash_size * hash_size 位
+    :return: 整数哈希
+    """
+    import cv2
+
+    # 先隔行隔列取样到约 8 倍哈希尺寸，再按面积缩小；最后转灰度，只作用于几十个像素
+    step = max(1, min(frame.shape[0] // (hash_size * 8), frame.shape[1] // ((hash_size + 1) * 8)))
+    small = cv2.resize(frame[::step, ::step], (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    if small.ndim == 3:
+        small = small[..., :3].astype(np.float32) @ np.array([0.114, 0.587, 0.299], np.float32)
+    bits = small[:, 1:] > small[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+def hamming_distance(a, b):
+    """两个哈希不同的位数"""
+    return bin(a ^ b).count('1')
+
+def sharpness(frame, size=(160, 120)):
+    """
+    清晰度评分：缩小后的灰度图拉普拉斯响应的方差，运动模糊的帧分数低
+    :param frame: 帧
+    :param size: 计算用的分辨率
+    :return: 分数
+    """
+    import cv2
+
+    small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+    if small.ndim == 3:
+        small = cv2.cvtColor(small, cv2.COLOR_BGRA2GRAY if small.shape[2] == 4 else cv2.COLOR_BGR2GRAY)
+    return float(cv2.Laplacian(small, cv2.CV_16S).var())
+
+def encode_to_budget(frame, max_bytes, scale=1.0, quality=80, min_quality=40, min_side=96):
+    """
+    把帧编码为不超过 max_bytes 的JPEG
+    先保持质量、按面积缩小（JPEG大小大致与像素数成正比），缩到 min_side 仍然超出时再降低质量
+    :param frame: 帧（BGR）
+    :param max_bytes: 字节预算
+    :param scale: 初始缩放比例，传入上一帧成功的比例可以减少重复编码
+    :param quality: JPEG质量
+    :param min_quality: 最低JPEG质量
+    :param min_side: 短边的最小像素数
+    :return: (JPEG字节串, 缩放比例, 质量, 编码次数)；最小尺寸和最低质量下仍然超出预算时返回最后一次的结果
+    """
+    import cv2
+
+    height, width = frame.shape[:2]
+    if frame.ndim == 3 and frame.shape[2] == 4:
+        frame = frame[..., :3]
+    min_scale = min(1.0, min_side / min(height, width))
+    scale = min(max(scale, min_scale), 1.0)
+    attempts = 0
+    while True:
+        if scale < 1.0:
+            size = (max(1, round(width * scale)), max(1, round(height * scale)))
+            image = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        else:
+            image = frame
+        ok, data = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        if not ok:
+            raise RuntimeError("JPEG编码失败")
+        attempts += 1
+        if len(data) <= max_bytes:
+            return data.tobytes(), scale, quality, attempts
+
+        if scale > min_scale:
+            # 按超出的比例缩小面积，留5%余量
+            scale = max(min_scale, scale * (max_bytes / len(data)) ** 0.5 * 0.95)
+        elif quality > min_quality:
+            quality = max(min_quality, quality - 15)
+        else:
+            return data.tobytes(), scale, quality, attempts
+
+class VisionUploader:
+    """
+    给Coze工作流附带摄像头画面
+    从采集的最近几帧中选最清晰的一帧，按感知哈希跳过与上一张或缓存中相近的画面（直接复用已上传的文件ID），
+    否则自适应缩小并编码到字节预算以内再上传；上传结果按哈希缓存，回到看过的场景时不再重复上传
+    """
+    def __init__(self, client, capture=None, max_bytes=64 * 1024, max_side=640, quality=80,
+                 dedup_distance=6, cache_size=256, select_from=4, image_param='image'):
+        """
+        :param client: CozeStreamClient实例
+        :param capture: 已启动的 FrameCapture，为None时需要调用方传入帧
+        :param max_bytes: 上传图片的字节预算
+        :param max_side: 上传图片长边的最大像素数
+        :param quality: JPEG质量（超出预算时先缩小，再降低质量）
+        :param dedup_distance: 哈希相差不超过该位数视为同一画面（共64位）
+        :param cache_size: 缓存的上传结果数
+        :param select_from: 从最近几帧中选择最清晰的一帧
+        :param image_param: 工作流中图片参数的名称
+        """
+        self.client = client
+        self.capture = capture
+        self.max_bytes = max_bytes
+        self.max_side = max_side
+        self.quality = quality
+        self.dedup_distance = dedup_distance
+        self.cache_size = cache_size
+        self.select_from = select_from
+        self.image_param = image_param
+
+        # 哈希 -> 上传结果，按最近使用排序
+        self._cache = collections.OrderedDict()
+        self._last = None
+        # 上一帧编码成功时相对原图的缩放比例，下一帧从这里开始尝试
+        self._scale = None
+
+        # 统计
+        self.frames = 0
+        self.duplicates = 0
+        self.cache_hits = 0
+        self.uploads = 0
+        self.upload_errors = 0
+        self.encode_attempts = 0
+        self.bytes_uploaded = 0
+        self.bytes_raw = 0
+        self._encode_time = 0.0
+        self._upload_time = 0.0
+
+    def select_frame(self):
+        """
+        从采集环形缓冲区的最近几帧中选出最清晰的一帧
+        :return: 帧（只读视图），还没有帧时返回None
+        """
+        buffer = self.capture.buffer
+        # 刚启动采集时等待第一帧
+        buffer.wait_for_frame(-1, timeout=1.0)
+        frames, _, _ = buffer.history(self.select_from)
+        if not frames:
+            return None
+        if len(frames) == 1:
+            return frames[0]
+        return max(frames, key=sharpness)
+
+    def attach(self, frame=None):
+        """
+        准备一张附图：相近的画面复用已有的文件ID，否则编码并上传
+        :param frame: 帧，为None时从 capture 中选择
+        :return: dict（file_id, hash, bytes, size, source），没有帧或上传失败时返回None
+        """
+        if frame is None:
+            if self.capture is None:
+                return None
+            frame = self.select_frame()
+            if frame is None:
+                return None
+        self.frames += 1
+        frame_hash = dhash(frame)
+
+        last = self._last
+        if last is not None and hamming_distance(frame_hash, last['hash']) <= self.dedup_distance:
+            self.duplicates += 1
+            return dict(last, source=SOURCE_DUPLICATE)
+
+        cached = self._lookup(frame_hash)
+        if cached is not None:
+            self.cache_hits += 1
+            self._last = cached
+            return dict(cached, source=SOURCE_CACHE)
+
+        entry = self._upload(frame, frame_hash)
+        if entry is None:
+            return None
+        self._cache[frame_hash] = entry
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        self._last = entry
+        return dict(entry, source=SOURCE_UPLOAD)
+
+    def _lookup(self, frame_hash):
+        entry = self._cache.get(frame_hash)
+        if entry is None:
+            best = self.dedup_distance + 1
+            for key, candidate in self._cache.items():
+                distance = hamming_distance(frame_hash, key)
+                if distance < best:
+                    best, entry = distance, candidate
+        if entry is not None:
+            self._cache.move_to_end(entry['hash'])
+        return entry
+
+    def _upload(self, frame, frame_hash):
+        height, width = frame.shape[:2]
+        scale = self._scale
+        if scale is None:
+            scale = min(1.0, self.max_side / max(height, width))
+        else:
+            # 画面变简单时逐步放大回去
+            scale = min(1.0, self.max_side / max(height, width), scale * 1.1)
+
+        started = time.perf_counter()
+        data, scale, quality, attempts = encode_to_budget(frame, self.max_bytes, scale=scale, quality=self.quality)
+        self._encode_time += time.perf_counter() - started
+        self.encode_attempts += attempts
+        self._scale = scale
+
+        started = time.perf_counter()
+        try:
+            result = self.client.upload_file(data, file_name=f'frame_{frame_hash:016x}.jpg')
+        except (CozeAPIError, OSError) as e:
+            self.upload_errors += 1
+            print(f"上传图片失败: {e}")
+            return None
+        self._upload_time += time.perf_counter() - started
+        self.uploads += 1
+        self.bytes_uploaded += len(data)
+        self.bytes_raw += frame.nbytes
+        return {
+            'file_id': result['id'],
+            'hash': frame_hash,
+            'bytes': len(data),
+            'size': (round(width * scale), round(height * scale)),
+            'quality': quality,
+        }
+
+    def image_reference(self, frame=None):
+        """
+        工作流图片参数的值
+        :param frame: 帧，为None时从 capture 中选择
+        :return: '{"file_id": ...}' 字符串，没有图片时返回None
+        """
+        entry = self.attach(frame)
+        if entry is None:
+            return None
+        return json_dumps({'file_id': entry['file_id']})
+
+    def run_parameters(self, text='', frame=None):
+        """
+        stream_run 的参数：head_input 加上图片参数（没有图片时省略）
+        :param text: head_input 的内容
+        :param frame: 帧，为None时从 capture 中选择
+        :return: 参数字典
+        """
+        parameters = {'head_input': text}
+        reference = self.image_reference(frame)
+        if reference is not None:
+            parameters[self.image_param] = reference
+        return parameters
+
+    def resume_data(self, text='next', frame=None):
+        """
+        stream_resume 的 resume_data：有图片时为 {"text": ..., <图片参数>: ...} 的JSON字符串，没有图片时为原文本
+        :param text: 恢复时提交的文本
+        :param frame: 帧，为None时从 capture 中选择
+        :return: 字符串
+        """
+        reference = self.image_reference(frame)
+        if reference is None:
+            return text
+        return json_dumps({'text': text, self.image_param: reference})
+
+    def stats(self):
+        """
+        上传统计
+        :return: dict，compression 为上传字节数与原始帧字节数之比
+        """
+        uploads = max(self.uploads, 1)
+        return {
+            'frames': self.frames,
+            'uploads': self.uploads,
+            'duplicates': self.duplicates,
+            'cache_hits': self.cache_hits,
+            'upload_errors': self.upload_errors,
+            'cached': len(self._cache),
+            'bytes_uploaded': self.bytes_uploaded,
+            'avg_upload_bytes': self.bytes_uploaded / uploads,
+            'compression': self.bytes_uploaded / self.bytes_raw if self.bytes_raw else 0.0,
+            'encode_attempts': self.encode_attempts / uploads,
+            'avg_encode_ms': self._encode_time / uploads * 1000,
+            'avg_upload_ms': self._upload_time / uploads * 1000,
+        }
@@ -0,0 +1,41 @@
+import os
+import json
+
+# JSON解析后端：优先使用orjson，未安装时回退到标准库json
+# 设置环境变量 MONITOR_CAR_JSON=json 可以强制使用标准库
+JSONDecodeError = json.JSONDecodeError
+
+try:
+    if os.environ.get('MONITOR_CAR_JSON', '').lower() == 'json':
+        raise ImportError
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    BACKEND = 'orjson'
+
+    # 解析JSON：直接使用 orjson.loads，每条命令都会调用，不再包一层函数
+    # orjson.JSONDecodeError 是 json.JSONDecodeError 的子类
+    json_loads = orjson.loads
+
+    def json_dumps(obj):
+        """
+        序列化为JSON字符串，非ASCII字符保持原样
+        :param obj: Python对象
+        :return: JSON字符串
+        """
+        return orjson.dumps(obj).decode('utf-8')
+else:
+    BACKEND = 'json'
+
+    # 解析JSON，参数为JSON字符串或字节串
+    json_loads = json.loads
+
+    def json_dumps(obj):
+        """
+        序列化为JSON字符串，非ASCII字符保持原样
+        :param obj: Python对象
+        :return: JSON字符串
+        """
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
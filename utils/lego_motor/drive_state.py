@@ -0,0 +1,124 @@
+import os
+import sys
+import time
+import threading
+from concurrent.futures import wait as wait_futures
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from utils.lego_motor.lego_motor_utils import dispatch_to_motors, _set_speed_action
+
+class DriveState:
+    """
+    驱动状态缓存
+    记录每个电机最后一次下发的速度，只把有变化的电机速度下发给 Build HAT，
+    一次更新中有变化的电机通过各端口工作线程同时下发
+    """
+    def __init__(self, motors, deadband=0):
+        """
+        :param motors: MotorController实例列表
+        :param deadband: 速度变化不超过该值时不下发（0表示只要有变化就下发）
+        """
+        self.motors = list(motors)
+        self.deadband = deadband
+        # None 表示未知状态，下一次更新一定会下发
+        self._last_speeds = [None] * len(self.motors)
+        # 每个电机最近一次下发的Future，用于区分命令被之后的速度撤销还是被停止抢占
+        self._latest = [None] * len(self.motors)
+        self._lock = threading.Lock()
+
+        # 统计
+        self.updates = 0
+        self.requested_writes = 0
+        self.sent_writes = 0
+        self.failed_writes = 0
+        self._started_at = time.perf_counter()
+
+    def set_speeds(self, speeds, wait=False):
+        """
+        设置各电机速度，只下发有变化的电机
+        :param speeds: 速度列表，范围 -100 到 100，0 表示停止
+        :param wait: 是否等待命令下发完成
+        :return: 下发的Future列表（wait为True时为结果列表），没有变化时为空列表
+        """
+        changed = []
+        args_list = []
+        with self._lock:
+            self.updates += 1
+            self.requested_writes += len(speeds)
+            for i, speed in enumerate(speeds):
+                last = self._last_speeds[i]
+                if last is not None and abs(speed - last) <= self.deadband and (speed == 0) == (last == 0):
+                    continue
+                self._last_speeds[i] = speed
+                changed.append(i)
+                args_list.append((speed,))
+            self.sent_writes += len(changed)
+
+        if not changed:
+            return []
+
+        futures = dispatch_to_motors([self.motors[i] for i in changed], _set_speed_action, args_list, wait=False)
+        with self._lock:
+            for i, future in zip(changed, futures):
+                self._latest[i] = future
+        for i, future in zip(changed, futures):
+            future.add_done_callback(lambda f, i=i: self._on_done(i, f))
+
+        if wait:
+            # 被更新的速度撤销的命令不会执行，结果记为 None
+            wait_futures(futures)
+            return [None if future.cancelled() else future.result() for future in futures]
+        return futures
+
+    def _on_done(self, index, future):
+        if future.cancelled():
+            # 被之后的速度撤销时缓存已经是新速度；没有更新的命令则是被停止抢占，电机状态未知
+            with self._lock:
+                if self._latest[index] is future:
+                    self._last_speeds[index] = None
+            return
+        if future.exception() is not None:
+            # 下发失败，电机的实际状态未知，下次更新重新下发
+            with self._lock:
+                self.failed_writes += 1
+                self._last_speeds[index] = None
+            print(f"电机 {self.motors[index].port} 速度下发失败: {future.exception()}")
+
+    def stop(self, wait=True):
+        """
+        停止所有电机（已经停止的电机不再下发）
+        :param wait: 是否等待命令下发完成
+        :return: 同 set_speeds
+        """
+        return self.set_speeds([0] * len(self.motors), wait=wait)
+
+    def invalidate(self):
+        """
+        清空速度缓存，其它代码直接控制过电机后调用，下一次更新会全部下发
+        :return: None
+        """
+        with self._lock:
+            self._last_speeds = [None] * len(self.motors)
+
+    @property
+    def speeds(self):
+        """最后一次下发的速度列表"""
+        return list(self._last_speeds)
+
+    def stats(self):
+        """
+        下发统计
+        :return: dict，saved 为缓存省掉的写入次数，*_per_second 按创建以来的时间计算
+        """
+        with self._lock:
+            elapsed = time.perf_counter() - self._started_at
+            saved = self.requested_writes - self.sent_writes
+            return {
+                'updates': self.updates,
+                'requested': self.requested_writes,
+                'sent': self.sent_writes,
+                'saved': saved,
+                'failed': self.failed_writes,
+                'sent_per_second': self.sent_writes / elapsed if elapsed > 0 else 0.0,
+                'saved_per_second': saved / elapsed if elapsed > 0 else 0.0,
+            }
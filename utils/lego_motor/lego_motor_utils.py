@@ -1,10 +1,17 @@
-from buildhat import Motor
+import os
 import time
 import math
 import sys
 import threading
-import queue
 import json
+import queue
+import collections
+from concurrent.futures import Future
+
+# 将项目根目录加入搜索路径，便于直接运行本文件
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from utils.json_backend import json_loads, JSONDecodeError
+from utils.lego_motor.motor_backend import get_motor_class
 
 # 全局端口管理
 _used_ports = set()
@@ -13,20 +20,23 @@ _used_ports = set()
 _active_motors = {}
 
 class MotorController:
-    def __init__(self, port='A', wheel_circumference=17.5):
+    def __init__(self, port='A', wheel_circumference=17.5, backend=None):
         """
         初始化电机控制器
         :param port: 电机端口，如 'A', 'B', 'C', 'D'
         :param wheel_circumference: 轮子周长（厘米），默认为17.5厘米
+        :param backend: 电机后端，'buildhat' 或 'sim'，为None时读取环境变量 MONITOR_CAR_MOTOR_BACKEND
         """
         # 检查端口是否已被使用
         if port in _used_ports:
             raise ValueError(f"端口 {port} 已被使用，请选择其他端口或先释放该端口")
         
         try:
-            self.motor = Motor(port)
+            self.motor = get_motor_class(backend)(port)
             self.port = port
             self.wheel_circumference = wheel_circumference
+            # 最近一次通过工作线程提交的运动（MotionHandle）
+            self.motion = None
             
             # 标记端口为已使用
             _used_ports.add(port)
@@ -173,23 +183,520 @@ def run_for_distance(motor, distance, speed=50, direction=1):
     turns = distance / motor.wheel_circumference
     run_for_turns(motor, turns, speed, direction)
 
-# 多线程同步控制函数
-def _motor_thread(motor, action, *args, **kwargs):
+# 单电机非阻塞版本：提交到端口工作线程执行，立即返回 MotionHandle
+def run_for_turns_async(motor, turns, speed=50, direction=1, policy=None):
+    """
+    run_for_turns 的非阻塞版本
+    :param policy: 队列策略，为None时排在已有命令之后，'preempt' 打断正在执行的运动
+    :return: MotionHandle
+    """
+    return submit_motion([motor], run_for_turns, [(turns, speed, direction)], policy=policy)
+
+def run_to_position_async(motor, position, speed=50, direction='shortest', policy=None):
+    """
+    run_to_position 的非阻塞版本
+    :param policy: 队列策略，为None时排在已有命令之后，'preempt' 打断正在执行的运动
+    :return: MotionHandle
+    """
+    return submit_motion([motor], run_to_position, [(position, speed, direction)], policy=policy)
+
+def run_forever_async(motor, speed=50, direction=1, policy=None):
+    """
+    run_forever 的非阻塞版本，句柄在 cancel() 之前不会结束
+    :param policy: 队列策略，默认抢占该端口正在执行和排队中的运动
+    :return: MotionHandle
+    """
+    return submit_motion([motor], run_forever, [(speed, direction)], continuous=True, policy=policy)
+
+def run_for_distance_async(motor, distance, speed=50, direction=1, policy=None):
+    """
+    run_for_distance 的非阻塞版本
+    :param policy: 队列策略，为None时排在已有命令之后，'preempt' 打断正在执行的运动
+    :return: MotionHandle
+    """
+    return submit_motion([motor], run_for_distance, [(distance, speed, direction)], policy=policy)
+
+# 多电机同步控制：每个端口一个常驻工作线程
+
+# 端口命令队列策略
+POLICY_APPEND = 'append'      # 排在已有命令之后
+POLICY_PREEMPT = 'preempt'    # 撤销排队中的运动命令并打断正在执行的运动
+POLICY_COALESCE = 'coalesce'  # 队尾是同一动作时用新命令替换（如连续的速度更新）
+_POLICIES = (POLICY_APPEND, POLICY_PREEMPT, POLICY_COALESCE)
+
+class MotorWorker:
+    """
+    端口常驻工作线程，按提交顺序依次执行该端口的电机命令
+    避免每次调用都创建和销毁线程带来的延迟抖动；
+    提交时可以指定队列策略，让最新的意图不必排在过时的命令后面
+    """
+    def __init__(self, port):
+        """
+        :param port: 电机端口，如 'A', 'B', 'C', 'D'
+        """
+        self.port = port
+        self._pending = collections.deque()
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        self._current = None
+        self._closed = False
+        
+        # 统计
+        self.submitted = 0
+        self.executed = 0
+        self.preempted = 0
+        self.coalesced = 0
+        self.max_depth = 0
+        self._wait_times = collections.deque(maxlen=1024)
+        
+        self._thread = threading.Thread(
+            target=self._run,
+            name=f"motor-worker-{port}",
+            daemon=True
+        )
+        self._thread.start()
+    
+    def submit(self, action, motor, *args, policy=POLICY_APPEND, inline=False):
+        """
+        提交一个电机命令
+        :param action: 动作函数，调用方式为 action(motor, *args)
+        :param motor: MotorController实例
+        :param args: 位置参数
+        :param policy: 队列策略，'append', 'preempt' 或 'coalesce'
+        :param inline: 端口空闲（没有正在执行和排队中的命令）时直接在调用线程中执行，
+                       省去交给工作线程的开销，只用于下发后立即返回的动作
+        :return: concurrent.futures.Future
+        """
+        if inline:
+            # 直接用底层锁，不经过 Condition 的包装；动作下发后立即返回，执行期间持有锁，
+            # 工作线程和其它提交方等它执行完再继续，端口上的命令仍然按顺序下发
+            with self._lock:
+                if self._current is None and not self._pending and not self._closed:
+                    if policy not in _POLICIES:
+                        raise ValueError(f"未知的队列策略: {policy}，可选 {_POLICIES}")
+                    self.submitted += 1
+                    self._wait_times.append(0.0)
+                    try:
+                        result = action(motor, *args)
+                    except BaseException as e:
+                        future = Future()
+                        future.set_exception(e)
+                    else:
+                        future = _completed_future(result)
+                    self.executed += 1
+                    return future
+        
+        future = Future()
+        interrupted = None
+        with self._condition:
+            if policy == POLICY_PREEMPT:
+                # 排队中的命令全部撤销
+                for item in self._pending:
+                    if item[0].cancel():
+                        self.preempted += 1
+                self._pending.clear()
+                current = self._current
+                # 速度更新、停止这类下发后立即返回的命令不需要打断
+                if current is not None and current[1] not in _NON_BLOCKING_ACTIONS:
+                    interrupted = current[2]
+                    self.preempted += 1
+            elif policy == POLICY_COALESCE:
+                if self._pending and self._pending[-1][1] is action and self._pending[-1][0].cancel():
+                    self._pending.pop()
+                    self.coalesced += 1
+            elif policy != POLICY_APPEND:
+                raise ValueError(f"未知的队列策略: {policy}，可选 {_POLICIES}")
+            
+            self._pending.append((future, action, motor, args, time.perf_counter()))
+            self.submitted += 1
+            self.max_depth = max(self.max_depth, len(self._pending))
+            self._condition.notify()
+        
+        if interrupted is not None:
+            # 工作线程阻塞在正在执行的运动中，直接下发停止打断它
+            try:
+                interrupted.motor.stop()
+            except Exception as e:
+                print(f"打断电机 {self.port} 的运动时出错: {e}")
+        return future
+    
+    def depth(self):
+        """
+        :return: 排队中的命令数（不包括正在执行的命令）
+        """
+        return len(self._pending)
+    
+    def stats(self):
+        """
+        队列统计
+        :return: dict，wait 为命令从提交到开始执行的等待时间（毫秒，最近1024条）
+        """
+        with self._condition:
+            waits = sorted(self._wait_times)
+            depth = len(self._pending)
+        count = len(waits)
+        return {
+            'depth': depth,
+            'max_depth': self.max_depth,
+            'submitted': self.submitted,
+            'executed': self.executed,
+            'preempted': self.preempted,
+            'coalesced': self.coalesced,
+            'wait_mean_ms': sum(waits) / count * 1000 if count else 0.0,
+            'wait_p99_ms': waits[min(count - 1, int(count * 0.99))] * 1000 if count else 0.0,
+            'wait_max_ms': waits[-1] * 1000 if count else 0.0,
+        }
+    
+    def shutdown(self, wait=True):
+        """
+        停止工作线程，已提交的命令会先执行完
+        :param wait: 是否等待线程退出
+        :return: None
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        if wait and self._thread is not threading.current_thread():
+            self._thread.join()
+    
+    def is_alive(self):
+        return self._thread.is_alive()
+    
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+                if not self._pending:
+                    break
+                item = self._pending.popleft()
+                future, action, motor, args, submitted_at = item
+                if not future.set_running_or_notify_cancel():
+                    continue
+                self._current = item
+                self._wait_times.append(time.perf_counter() - submitted_at)
+            
+            try:
+                result = action(motor, *args)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+            
+            with self._condition:
+                self._current = None
+                self.executed += 1
+
+# 结果为None的已完成Future可以共用：不能再被取消，回调在注册时立即调用，不会保存在它上面
+_NONE_FUTURE = Future()
+_NONE_FUTURE.set_running_or_notify_cancel()
+_NONE_FUTURE.set_result(None)
+
+def _completed_future(result):
+    if result is None:
+        return _NONE_FUTURE
+    future = Future()
+    future.set_running_or_notify_cancel()
+    future.set_result(result)
+    return future
+
+# 全局工作线程字典（端口 -> MotorWorker）
+_motor_workers = {}
+_motor_workers_lock = threading.Lock()
+
+def get_motor_worker(port):
+    """
+    获取端口对应的常驻工作线程，不存在时创建
+    :param port: 电机端口
+    :return: MotorWorker实例
     """
-    电机线程函数
+    worker = _motor_workers.get(port)
+    if worker is not None:
+        return worker
+    
+    with _motor_workers_lock:
+        worker = _motor_workers.get(port)
+        if worker is None or not worker.is_alive():
+            worker = MotorWorker(port)
+            _motor_workers[port] = worker
+        return worker
+
+def shutdown_motor_workers(wait=True):
+    """
+    停止所有端口的工作线程
+    :param wait: 是否等待线程退出
+    :return: None
+    """
+    with _motor_workers_lock:
+        workers = list(_motor_workers.values())
+        _motor_workers.clear()
+    
+    for worker in workers:
+        worker.shutdown(wait)
+
+def get_motor_queue_stats():
+    """
+    各端口命令队列的统计
+    :return: dict，端口 -> MotorWorker.stats()
+    """
+    with _motor_workers_lock:
+        workers = list(_motor_workers.items())
+    return {port: worker.stats() for port, worker in workers}
+
+def dispatch_to_motors(motors, action, args_list=None, wait=True, timeout=None, policy=None):
+    """
+    将一个多电机命令分发到各端口的工作线程，所有电机同时开始执行
+    速度下发、停止等立即返回的动作在端口空闲时直接在调用线程中执行
+    :param motors: MotorController实例列表
+    :param action: 动作函数，调用方式为 action(motor, *args)
+    :param args_list: 每个电机的参数元组列表，为None时不带参数
+    :param wait: 是否等待所有电机完成
+    :param timeout: 等待超时时间（秒），为None时一直等待
+    :param policy: 队列策略，为None时按动作使用默认策略（速度更新和停止抢占，其余排队）
+    :return: wait为True时返回结果列表，否则返回Future列表
+    """
+    if policy is None:
+        policy = _DEFAULT_POLICIES.get(action, POLICY_APPEND)
+    
+    # 下发后立即返回的动作在端口空闲时直接执行，不经过工作线程
+    inline = action in _NON_BLOCKING_ACTIONS
+    if args_list is None:
+        futures = [get_motor_worker(motor.port).submit(action, motor, policy=policy, inline=inline)
+                   for motor in motors]
+    else:
+        futures = [get_motor_worker(motor.port).submit(action, motor, *args, policy=policy, inline=inline)
+                   for motor, args in zip(motors, args_list)]
+    
+    if not wait:
+        return futures
+    
+    # 等待所有电机完成，出错时抛出第一个异常；直接执行完的命令不需要等待
+    if timeout is None:
+        return [None if future is _NONE_FUTURE else future.result() for future in futures]
+    deadline = time.monotonic() + timeout
+    try:
+        return [None if future is _NONE_FUTURE else future.result(max(0.0, deadline - time.monotonic()))
+                for future in futures]
+    except TimeoutError:
+        # 超时后撤销还在排队的命令，避免它们之后集中下发
+        for future in futures:
+            future.cancel()
+        raise TimeoutError(f"等待端口 {[motor.port for motor in motors]} 的命令超时 ({timeout} 秒)")
+
+def _submit_to_port(motor, action, *args, policy=None):
+    """
+    单个电机的 dispatch_to_motors(wait=False)，JSON命令中的单端口命令使用，省去参数列表和结果列表
     :param motor: MotorController实例
-    :param action: 要执行的动作函数
+    :param action: 动作函数
     :param args: 位置参数
-    :param kwargs: 关键字参数
-    :return: None
+    :param policy: 队列策略，为None时按动作使用默认策略
+    :return: Future
+    """
+    if policy is None:
+        policy = _DEFAULT_POLICIES.get(action, POLICY_APPEND)
+    return get_motor_worker(motor.port).submit(action, motor, *args, policy=policy,
+                                               inline=action in _NON_BLOCKING_ACTIONS)
+
+class MotionHandle:
+    """
+    一次电机运动的句柄
+    运动命令提交到各端口工作线程后立即返回句柄，调用方可以查询、等待、取消或注册完成回调；
+    持续运行（run_forever）的运动在取消之前不会完成
+    """
+    __slots__ = ('motors', 'futures', 'continuous', 'cancelled', '_done', '_done_event', '_lock',
+                 '_callbacks', '_remaining')
+    
+    def __init__(self, motors, futures, continuous=False):
+        """
+        :param motors: 参与运动的 MotorController 列表
+        :param futures: 每个电机的 Future
+        :param continuous: 是否为持续运行（命令下发后电机一直转动）
+        """
+        self.motors = list(motors)
+        self.futures = list(futures)
+        self.continuous = continuous
+        self.cancelled = False
+        # 结束标记；等待用的 Event 在第一次 wait() 时才创建，大多数速度下发的句柄不会被等待
+        self._done = False
+        self._done_event = None
+        self._lock = threading.Lock()
+        self._callbacks = []
+        # 已经在调用线程中直接执行完的命令不需要等待
+        pending = [future for future in self.futures if future is not _NONE_FUTURE]
+        self._remaining = len(pending)
+        
+        for motor in self.motors:
+            motor.motion = self
+        
+        for future in pending:
+            future.add_done_callback(self._on_future_done)
+        if not pending and not continuous:
+            self._done = True
+    
+    def _on_future_done(self, future):
+        with self._lock:
+            self._remaining -= 1
+            finished = self._remaining == 0 and not self.continuous
+        if finished:
+            self._finish()
+    
+    def _finish(self):
+        with self._lock:
+            if self._done:
+                return
+            self._done = True
+            if self._done_event is not None:
+                self._done_event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception as e:
+                print(f"运动完成回调出错: {e}")
+    
+    def done(self):
+        """
+        :return: 运动是否已经结束（完成、出错或被取消）
+        """
+        return self._done
+    
+    def wait(self, timeout=None):
+        """
+        等待运动结束
+        :param timeout: 超时时间（秒），为None时一直等待
+        :return: 是否在超时前结束
+        """
+        with self._lock:
+            if self._done:
+                return True
+            if self._done_event is None:
+                self._done_event = threading.Event()
+            event = self._done_event
+        return event.wait(timeout)
+    
+    def result(self, timeout=None):
+        """
+        等待运动结束并返回各电机的结果，有电机出错时抛出第一个异常
+        :param timeout: 超时时间（秒）
+        :return: 结果列表
+        """
+        if not self.wait(timeout):
+            raise TimeoutError("等待电机运动超时")
+        return [future.result() for future in self.futures if not future.cancelled()]
+    
+    def exception(self):
+        """
+        :return: 第一个出错电机的异常，没有出错时为None
+        """
+        for future in self.futures:
+            if future.done() and not future.cancelled() and future.exception() is not None:
+                return future.exception()
+        return None
+    
+    def cancel(self):
+        """
+        取消运动：还在排队的命令直接撤销，正在执行或持续运行的电机立即停止
+        :return: 是否有运动被取消（已经结束的运动返回False）
+        """
+        if self.done():
+            return False
+        self.cancelled = True
+        for motor, future in zip(self.motors, self.futures):
+            if future.cancel():
+                continue
+            if self.continuous:
+                # 命令早已执行完，电机是否还在按本句柄转动取决于之后有没有新的运动
+                if motor.motion is not self:
+                    continue
+            elif future.done():
+                # 该端口已经完成，之后的运动属于别的句柄
+                continue
+            # 绕过端口工作线程直接下发停止，工作线程可能正阻塞在 run_for_degrees 中
+            try:
+                motor.motor.stop()
+            except Exception as e:
+                print(f"停止电机 {motor.port} 时出错: {e}")
+        self._finish()
+        return True
+    
+    def add_done_callback(self, callback):
+        """
+        注册运动结束回调，调用方式为 callback(handle)，已经结束时立即调用
+        :param callback: 回调函数
+        :return: None
+        """
+        with self._lock:
+            if not self._done:
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+def submit_motion(motors, action, args_list=None, continuous=False, policy=None):
+    """
+    将运动命令提交到各端口工作线程，立即返回句柄
+    :param motors: MotorController实例列表
+    :param action: 动作函数
+    :param args_list: 每个电机的参数元组列表
+    :param continuous: 是否为持续运行
+    :param policy: 队列策略，见 dispatch_to_motors
+    :return: MotionHandle
+    """
+    futures = dispatch_to_motors(motors, action, args_list, wait=False, policy=policy)
+    return MotionHandle(motors, futures, continuous)
+
+def cancel_motions(ports=None):
     """
-    action(motor, *args, **kwargs)
+    取消已创建电机上正在进行的运动
+    :param ports: 端口列表，为None时取消所有电机
+    :return: 被取消运动的端口列表
+    """
+    selected = [(port, motor.motion) for port, motor in list(_active_motors.items())
+                if (ports is None or port in ports) and motor.motion is not None]
+    
+    # 多个端口可能共用一个句柄，每个句柄只取消一次
+    cancelled_handles = set()
+    for _, handle in selected:
+        if id(handle) not in cancelled_handles and handle.cancel():
+            cancelled_handles.add(id(handle))
+    return [port for port, handle in selected if id(handle) in cancelled_handles]
+
+def _run_for_degrees_action(motor, degrees, speed):
+    motor.motor.run_for_degrees(degrees, speed)
+
+def _run_to_position_action(motor, position, speed):
+    motor.motor.run_to_position(position, speed)
+
+def _start_action(motor, speed):
+    motor.motor.start(speed)
 
-def create_multiple_motors(ports, wheel_circumferences=None):
+def _stop_action(motor):
+    motor.stop()
+
+def _set_speed_action(motor, speed):
+    # 速度带符号直接下发，0 表示停止
+    if speed == 0:
+        motor.motor.stop()
+    else:
+        motor.motor.start(speed)
+
+# 各动作的默认队列策略，未列出的动作为 POLICY_APPEND
+# 速度更新代表最新的意图，默认抢占：撤销排队中的命令并打断正在执行的有限运动
+_DEFAULT_POLICIES = {
+    _start_action: POLICY_PREEMPT,
+    _set_speed_action: POLICY_PREEMPT,
+    run_forever: POLICY_PREEMPT,
+    _stop_action: POLICY_PREEMPT,
+}
+
+# 下发后立即返回的动作，抢占时不需要打断
+_NON_BLOCKING_ACTIONS = frozenset((_start_action, _set_speed_action, run_forever, _stop_action))
+
+def create_multiple_motors(ports, wheel_circumferences=None, backend=None):
     """
     创建多个电机控制器
     :param ports: 电机端口列表，如 ['A', 'B', 'C']
     :param wheel_circumferences: 轮子周长列表（厘米），如果为None则使用默认值
+    :param backend: 电机后端，'buildhat' 或 'sim'，为None时读取环境变量
     :return: MotorController实例列表
     """
     if wheel_circumferences is None:
@@ -197,20 +704,28 @@ def create_multiple_motors(ports, wheel_circumferences=None):
     
     motors = []
     for port, wheel_circumference in zip(ports, wheel_circumferences):
-        motor = create_motor(port, wheel_circumference)
+        motor = create_motor(port, wheel_circumference, backend)
         motors.append(motor)
     
     return motors
 
 def run_motors_for_turns(motors, turns, speeds=None, directions=None):
     """
-    让多个电机按照指定方向以指定速度同步运行n圈
+    让多个电机按照指定方向以指定速度同步运行n圈，等待全部完成
     :param motors: MotorController实例列表
     :param turns: 圈数（浮点数）或圈数列表
     :param speeds: 速度列表，范围 -100 到 100
     :param directions: 方向列表，1表示正向，-1表示反向
     :return: None
     """
+    run_motors_for_turns_async(motors, turns, speeds, directions).result()
+
+def run_motors_for_turns_async(motors, turns, speeds=None, directions=None, policy=None):
+    """
+    run_motors_for_turns 的非阻塞版本
+    :param policy: 队列策略，为None时排在已有命令之后，'preempt' 打断正在执行的运动
+    :return: MotionHandle
+    """
     if isinstance(turns, (int, float)):
         turns = [turns] * len(motors)
         
@@ -220,48 +735,41 @@ def run_motors_for_turns(motors, turns, speeds=None, directions=None):
     if directions is None:
         directions = [1] * len(motors)
     
-    # 创建线程列表
-    threads = []
-    
-    # 为每个电机创建一个线程
-    for motor, turn, speed, direction in zip(motors, turns, speeds, directions):
+    # 为每个电机准备参数
+    args_list = []
+    for turn, speed, direction in zip(turns, speeds, directions):
         degrees = turn * 360
         adjusted_speed = speed * direction
-        
-        # 创建线程，但不启动
-        thread = threading.Thread(
-            target=_motor_thread,
-            args=(motor, lambda m, d, s: m.motor.run_for_degrees(d, s), degrees, abs(adjusted_speed))
-        )
-        threads.append(thread)
-    
-    # 同时启动所有线程
-    for thread in threads:
-        thread.start()
+        args_list.append((degrees, abs(adjusted_speed)))
     
-    # 等待所有线程完成
-    for thread in threads:
-        thread.join()
+    # 分发到各端口的常驻工作线程
+    return submit_motion(motors[:len(args_list)], _run_for_degrees_action, args_list, policy=policy)
 
 def run_motors_to_positions(motors, positions, speeds=None, direction='shortest'):
     """
-    让多个电机按照指定方向或最短路径以指定速度同步运行至指定位置
+    让多个电机按照指定方向或最短路径以指定速度同步运行至指定位置，等待全部完成
     :param motors: MotorController实例列表
     :param positions: 目标位置列表（度数）
     :param speeds: 速度列表，范围 -100 到 100
     :param direction: 方向，可选 'shortest', 'clockwise', 'counterclockwise'
     :return: None
     """
+    run_motors_to_positions_async(motors, positions, speeds, direction).result()
+
+def run_motors_to_positions_async(motors, positions, speeds=None, direction='shortest', policy=None):
+    """
+    run_motors_to_positions 的非阻塞版本
+    :param policy: 队列策略，为None时排在已有命令之后，'preempt' 打断正在执行的运动
+    :return: MotionHandle
+    """
     if isinstance(positions, (int, float)):
         positions = [positions] * len(motors)
         
     if speeds is None:
         speeds = [50] * len(motors)
     
-    # 创建线程列表
-    threads = []
-    
-    # 为每个电机创建一个线程
+    # 为每个电机准备参数
+    args_list = []
     for motor, position, speed in zip(motors, positions, speeds):
         # 确保position是整数
         position = int(position)
@@ -282,21 +790,9 @@ def run_motors_to_positions(motors, positions, speeds=None, direction='shortest'
                 
         # 确保position在有效范围内
         position = position % 360
-        
-        # 创建线程，但不启动
-        thread = threading.Thread(
-            target=_motor_thread,
-            args=(motor, lambda m, p, s: m.motor.run_to_position(p, s), position, speed)
-        )
-        threads.append(thread)
-    
-    # 同时启动所有线程
-    for thread in threads:
-        thread.start()
+        args_list.append((position, speed))
     
-    # 等待所有线程完成
-    for thread in threads:
-        thread.join()
+    return submit_motion(motors[:len(args_list)], _run_to_position_action, args_list, policy=policy)
 
 def stop_motors(motors):
     """
@@ -304,29 +800,16 @@ def stop_motors(motors):
     :param motors: MotorController实例列表
     :return: None
     """
-    # 创建线程列表
-    threads = []
-    
-    # 为每个电机创建一个线程
-    for motor in motors:
-        thread = threading.Thread(target=motor.stop)
-        threads.append(thread)
-    
-    # 同时启动所有线程
-    for thread in threads:
-        thread.start()
-    
-    # 等待所有线程完成
-    for thread in threads:
-        thread.join()
+    dispatch_to_motors(motors, _stop_action)
 
-def run_motors_forever(motors, speeds=None, directions=None):
+def run_motors_forever(motors, speeds=None, directions=None, policy=None):
     """
     让多个电机按照指定方向以指定速度同步一直运行
     :param motors: MotorController实例列表
     :param speeds: 速度列表，范围 -100 到 100
     :param directions: 方向列表，1表示正向，-1表示反向
-    :return: None
+    :param policy: 队列策略，默认抢占各端口正在执行和排队中的运动
+    :return: MotionHandle，调用 cancel() 停止电机
     """
     if speeds is None:
         speeds = [50] * len(motors)
@@ -334,37 +817,32 @@ def run_motors_forever(motors, speeds=None, directions=None):
     if directions is None:
         directions = [1] * len(motors)
     
-    # 创建线程列表
-    threads = []
-    
-    # 为每个电机创建一个线程
-    for motor, speed, direction in zip(motors, speeds, directions):
+    args_list = []
+    for speed, direction in zip(speeds, directions):
         adjusted_speed = speed * direction
-        
-        # 创建线程，但不启动
-        thread = threading.Thread(
-            target=_motor_thread,
-            args=(motor, lambda m, s: m.motor.start(s), abs(adjusted_speed))
-        )
-        threads.append(thread)
+        args_list.append((abs(adjusted_speed),))
     
-    # 同时启动所有线程
-    for thread in threads:
-        thread.start()
-    
-    # 注意：这里不等待线程完成，因为电机需要一直运行
-    # 返回线程列表，以便调用者可以在需要时停止电机
-    return threads
+    # 注意：这里不等待命令完成，因为电机需要一直运行
+    # 返回句柄，调用者可以通过 handle.futures 确认命令已下发，或调用 cancel() 停止
+    return submit_motion(motors[:len(args_list)], _start_action, args_list, continuous=True, policy=policy)
 
 def run_motors_for_distances(motors, distances, speeds=None, directions=None):
     """
-    让多个电机按照指定方向以指定速度同步运行n厘米
+    让多个电机按照指定方向以指定速度同步运行n厘米，等待全部完成
     :param motors: MotorController实例列表
     :param distances: 距离列表（厘米）
     :param speeds: 速度列表，范围 -100 到 100
     :param directions: 方向列表，1表示正向，-1表示反向
     :return: None
     """
+    run_motors_for_distances_async(motors, distances, speeds, directions).result()
+
+def run_motors_for_distances_async(motors, distances, speeds=None, directions=None, policy=None):
+    """
+    run_motors_for_distances 的非阻塞版本
+    :param policy: 队列策略，为None时排在已有命令之后，'preempt' 打断正在执行的运动
+    :return: MotionHandle
+    """
     if isinstance(distances, (int, float)):
         distances = [distances] * len(motors)
         
@@ -374,34 +852,21 @@ def run_motors_for_distances(motors, distances, speeds=None, directions=None):
     if directions is None:
         directions = [1] * len(motors)
     
-    # 创建线程列表
-    threads = []
-    
-    # 为每个电机创建一个线程
+    # 为每个电机准备参数
+    args_list = []
     for motor, distance, speed, direction in zip(motors, distances, speeds, directions):
         # 计算需要转动的圈数
         turns = distance / motor.wheel_circumference
         degrees = turns * 360
         adjusted_speed = speed * direction
-        
-        # 创建线程，但不启动
-        thread = threading.Thread(
-            target=_motor_thread,
-            args=(motor, lambda m, d, s: m.motor.run_for_degrees(d, s), degrees, abs(adjusted_speed))
-        )
-        threads.append(thread)
-    
-    # 同时启动所有线程
-    for thread in threads:
-        thread.start()
+        args_list.append((degrees, abs(adjusted_speed)))
     
-    # 等待所有线程完成
-    for thread in threads:
-        thread.join()
+    return submit_motion(motors[:len(args_list)], _run_for_degrees_action, args_list, policy=policy)
 
 def get_motors_speeds(motors, directions=None):
     """
     获取所有电机的速度
+    在调用线程中直接读取，不经过端口工作线程，不会排在正在执行的运动后面
     :param motors: MotorController实例列表
     :param directions: 方向列表，1表示正向，-1表示反向
     :return: 速度列表
@@ -413,20 +878,22 @@ def get_motors_speeds(motors, directions=None):
 def get_motors_positions(motors):
     """
     获取所有电机的位置
+    在调用线程中直接读取，不经过端口工作线程，不会排在正在执行的运动后面
     :param motors: MotorController实例列表
     :return: 位置列表（度数）
     """
     return [motor.get_position() for motor in motors]
 
 # 便捷函数，用于快速创建和控制电机
-def create_motor(port='A', wheel_circumference=17.5):
+def create_motor(port='A', wheel_circumference=17.5, backend=None):
     """
     创建一个电机控制器
     :param port: 电机端口
     :param wheel_circumference: 轮子周长（厘米）
+    :param backend: 电机后端，'buildhat' 或 'sim'，为None时读取环境变量
     :return: MotorController实例
     """
-    return MotorController(port, wheel_circumference)
+    return MotorController(port, wheel_circumference, backend)
 
 # 释放所有端口
 def release_all_ports():
@@ -773,279 +1240,475 @@ def test_multi_motor():
             pass
 
 
-def execute_motor_command(command_json):
+# JSON命令注册表（命令类型 -> (处理函数, 参数表, 端口解析方式)）
+_command_registry = {}
+
+# 端口组合缓存（端口元组 -> MotorController元组），电机创建或释放时清空
+_port_set_cache = {}
+
+# 命令监听函数，每条已注册的命令执行前调用 listener(command_type, command)
+_command_listeners = []
+
+def register_command(command_type, fields=(), target=None, default_ports=('A', 'B')):
     """
-    执行从JSON接收到的电机控制命令
+    注册JSON命令处理函数
+    :param command_type: 命令类型，对应JSON中的 'type'
+    :param fields: 参数表，(参数名, 默认值) 元组序列，按顺序作为位置参数传给处理函数
+    :param target: 端口解析方式
+                   'port'  - 解析 'port' 为单个电机，处理函数签名为 handler(port, motor, *fields)
+                   'ports' - 解析 'ports' 为电机元组，处理函数签名为 handler(ports, motors, *fields)
+                   None    - 不解析端口，处理函数签名为 handler(*fields)
+    :param default_ports: target 为 'ports' 时命令未给出 'ports' 使用的端口
+    :return: 装饰器
+    """
+    if target not in (None, 'port', 'ports'):
+        raise ValueError(f"未知的端口解析方式: {target}")
+    
+    # 参数名和默认值预先拆成两个元组，执行时用 map(command.get, names, defaults) 直接展开为参数，
+    # 不需要逐条生成参数列表
+    names = tuple(name for name, _ in fields)
+    defaults = tuple(default for _, default in fields)
+    
+    def decorator(handler):
+        _command_registry[command_type] = (handler, names, defaults, target, list(default_ports))
+        return handler
+    return decorator
+
+def add_command_listener(listener):
+    """
+    添加命令监听函数，用于录像触发、日志等旁路处理
+    监听函数在执行命令的线程中同步调用，应当尽快返回；抛出的异常只打印，不影响命令执行
+    :param listener: listener(command_type, command)，command 为命令字典
+    :return: listener，便于之后移除
+    """
+    _command_listeners.append(listener)
+    return listener
+
+def remove_command_listener(listener):
+    """
+    移除命令监听函数
+    :param listener: add_command_listener 添加的函数
+    :return: None
+    """
+    try:
+        _command_listeners.remove(listener)
+    except ValueError:
+        pass
+
+def _notify_command_listeners(command_type, command):
+    for listener in _command_listeners:
+        try:
+            listener(command_type, command)
+        except Exception as e:
+            print(f"命令监听函数出错: {e}")
+
+def _invalidate_port_cache():
+    _port_set_cache.clear()
+
+def _resolve_ports(ports):
+    """
+    将端口列表解析为电机元组，结果按端口组合缓存
+    :param ports: 端口列表
+    :return: (电机元组, None) 或 (None, 未创建的端口)
+    """
+    key = tuple(ports)
+    motors = _port_set_cache.get(key)
+    if motors is not None:
+        return motors, None
+    
+    for p in key:
+        if p not in _active_motors:
+            return None, p
+    
+    motors = tuple(_active_motors[p] for p in key)
+    _port_set_cache[key] = motors
+    return motors, None
+
+@register_command('create_motor', fields=(('port', 'A'), ('backend', None)))
+def _command_create_motor(port, backend):
+    # 检查电机是否已存在
+    if port in _active_motors:
+        return {'success': True, 'message': f'电机 {port} 已存在'}
+    
+    # 创建电机
+    motor = create_motor(port, backend=backend)
+    _active_motors[port] = motor
+    _invalidate_port_cache()
+    return {'success': True, 'message': f'电机 {port} 创建成功'}
+
+@register_command('create_multiple_motors', fields=(('ports', ['A', 'B']), ('wheel_circumferences', None), ('backend', None)))
+def _command_create_multiple_motors(ports, wheel_circumferences, backend):
+    # 检查是否所有电机都已存在
+    all_exist = all(p in _active_motors for p in ports)
+    if all_exist:
+        return {'success': True, 'message': f'电机 {ports} 已存在'}
+    
+    # 创建不存在的电机
+    created_ports = []
+    for p in ports:
+        if p not in _active_motors:
+            motor = create_motor(p, backend=backend)
+            _active_motors[p] = motor
+            created_ports.append(p)
+    _invalidate_port_cache()
+    
+    if created_ports:
+        return {'success': True, 'message': f'电机 {created_ports} 创建成功'}
+    else:
+        return {'success': True, 'message': f'所有电机 {ports} 已存在'}
+
+# 批量执行时替换命令中的 wait：运动提交后带着句柄返回，由 execute_motor_commands 在运动结束后继续该通道
+_BATCH_WAIT = object()
+
+def _motion_result(handle, wait, message):
+    # wait 为 False 时命令下发后立即返回，运动在端口工作线程中继续
+    if wait is _BATCH_WAIT:
+        return {'success': True, 'message': message, 'handle': handle}
+    if wait:
+        handle.result()
+        return {'success': True, 'message': message}
+    return {'success': True, 'message': message, 'pending': True}
+
+@register_command('run_for_turns', fields=(('turns', 1), ('speed', 50), ('direction', 1), ('wait', True), ('policy', None)), target='port')
+def _command_run_for_turns(port, motor, turns, speed, direction, wait, policy):
+    handle = run_for_turns_async(motor, turns, speed, direction, policy)
+    return _motion_result(handle, wait, f'电机 {port} 运行 {turns} 圈')
+
+@register_command('run_to_position', fields=(('position', 0), ('speed', 50), ('direction', 'shortest'), ('wait', True), ('policy', None)), target='port')
+def _command_run_to_position(port, motor, position, speed, direction, wait, policy):
+    handle = run_to_position_async(motor, position, speed, direction, policy)
+    return _motion_result(handle, wait, f'电机 {port} 运行到位置 {position}')
+
+@register_command('run_forever', fields=(('speed', 50), ('direction', 1), ('policy', None)), target='port')
+def _command_run_forever(port, motor, speed, direction, policy):
+    # 默认抢占该端口正在执行和排队中的运动；端口空闲时已经直接下发，否则等待这一次速度下发
+    future = _submit_to_port(motor, run_forever, speed, direction, policy=policy)
+    if future is not _NONE_FUTURE:
+        MotionHandle((motor,), (future,), continuous=True)
+        future.result()
+        return {'success': True, 'message': f'电机 {port} 持续运行'}
+    
+    # 已经直接下发：电机原本就在按单端口的持续运行句柄转动时沿用该句柄，取消它同样会停止电机
+    motion = motor.motion
+    if motion is None or not motion.continuous or len(motion.motors) != 1 or motion.done():
+        MotionHandle((motor,), (future,), continuous=True)
+    return {'success': True, 'message': f'电机 {port} 持续运行'}
+
+@register_command('run_for_distance', fields=(('distance', 10), ('speed', 50), ('direction', 1), ('wait', True), ('policy', None)), target='port')
+def _command_run_for_distance(port, motor, distance, speed, direction, wait, policy):
+    handle = run_for_distance_async(motor, distance, speed, direction, policy)
+    return _motion_result(handle, wait, f'电机 {port} 运行 {distance} 厘米')
+
+@register_command('stop', target='port')
+def _command_stop(port, motor):
+    # 抢占：撤销排队中的运动并打断正在执行的运动
+    future = _submit_to_port(motor, _stop_action)
+    if future is not _NONE_FUTURE:
+        future.result()
+    return {'success': True, 'message': f'电机 {port} 已停止'}
+
+@register_command('get_speed', target='port')
+def _command_get_speed(port, motor):
+    return {'success': True, 'speed': motor.get_speed()}
+
+@register_command('get_position', target='port')
+def _command_get_position(port, motor):
+    return {'success': True, 'position': motor.get_position()}
+
+@register_command('release', target='port')
+def _command_release(port, motor):
+    motor.release()
+    del _active_motors[port]
+    _invalidate_port_cache()
+    return {'success': True, 'message': f'电机 {port} 已释放'}
+
+@register_command('run_motors_for_turns', fields=(('turns', 1), ('speeds', None), ('directions', None), ('wait', True), ('policy', None)), target='ports')
+def _command_run_motors_for_turns(ports, motors, turns, speeds, directions, wait, policy):
+    handle = run_motors_for_turns_async(motors, turns, speeds, directions, policy)
+    return _motion_result(handle, wait, f'电机 {ports} 运行 {turns} 圈')
+
+@register_command('run_motors_to_positions', fields=(('positions', [0, 0]), ('speeds', None), ('direction', 'shortest'), ('wait', True), ('policy', None)), target='ports')
+def _command_run_motors_to_positions(ports, motors, positions, speeds, direction, wait, policy):
+    handle = run_motors_to_positions_async(motors, positions, speeds, direction, policy)
+    return _motion_result(handle, wait, f'电机 {ports} 运行到位置 {positions}')
+
+@register_command('stop_motors', target='ports')
+def _command_stop_motors(ports, motors):
+    stop_motors(motors)
+    return {'success': True, 'message': f'电机 {ports} 已停止'}
+
+@register_command('run_motors_forever', fields=(('speeds', None), ('directions', None), ('policy', None)), target='ports')
+def _command_run_motors_forever(ports, motors, speeds, directions, policy):
+    handle = run_motors_forever(motors, speeds, directions, policy)
+    return {'success': True, 'message': f'电机 {ports} 持续运行', 'threads': len(handle.futures)}
+
+@register_command('run_motors_for_distances', fields=(('distances', [10, 10]), ('speeds', None), ('directions', None), ('wait', True), ('policy', None)), target='ports')
+def _command_run_motors_for_distances(ports, motors, distances, speeds, directions, wait, policy):
+    handle = run_motors_for_distances_async(motors, distances, speeds, directions, policy)
+    return _motion_result(handle, wait, f'电机 {ports} 运行距离 {distances}')
+
+@register_command('cancel_motion', target='ports')
+def _command_cancel_motion(ports, motors):
+    cancelled = cancel_motions(ports)
+    return {'success': True, 'message': f'电机 {cancelled} 的运动已取消', 'cancelled': cancelled}
+
+@register_command('motion_status', target='ports')
+def _command_motion_status(ports, motors):
+    # 每个端口最近一次运动是否已经结束，没有运动记录时视为已结束
+    done = [motor.motion is None or motor.motion.done() for motor in motors]
+    return {'success': True, 'done': done, 'all_done': all(done)}
+
+@register_command('get_motors_speeds', fields=(('directions', None),), target='ports')
+def _command_get_motors_speeds(ports, motors, directions):
+    return {'success': True, 'speeds': get_motors_speeds(motors, directions)}
+
+@register_command('get_motors_positions', target='ports')
+def _command_get_motors_positions(ports, motors):
+    return {'success': True, 'positions': get_motors_positions(motors)}
+
+# 默认端口与 mecanum.WHEEL_PORTS 一致，麦克纳姆轮模块依赖本模块，这里不能导入
+@register_command('mecanum_drive', fields=(('vx', 0), ('vy', 0), ('omega', 0), ('max_speed', 100), ('policy', None)),
+                  target='ports', default_ports=('A', 'B', 'C', 'D'))
+def _command_mecanum_drive(ports, motors, vx, vy, omega, max_speed, policy):
+    if len(motors) != 4:
+        return {'success': False, 'error': f'麦克纳姆轮需要4个端口（左前、右前、左后、右后），收到 {ports}'}
+    # 麦克纳姆轮模块依赖本模块，在这里延迟导入
+    from utils.lego_motor.mecanum import mix_wheel_speeds
+    speeds = mix_wheel_speeds(vx, vy, omega, max_speed=max_speed).tolist()
+    dispatch_to_motors(motors, _set_speed_action, [(speed,) for speed in speeds], policy=policy)
+    return {'success': True, 'message': f'电机 {ports} 麦克纳姆轮运动', 'speeds': speeds}
+
+@register_command('get_motor_queue_stats')
+def _command_get_motor_queue_stats():
+    return {'success': True, 'stats': get_motor_queue_stats()}
+
+@register_command('release_all_ports')
+def _command_release_all_ports():
+    for port, motor in list(_active_motors.items()):
+        motor.release()
+        del _active_motors[port]
+    _invalidate_port_cache()
+    return {'success': True, 'message': '所有端口已释放'}
+
+def execute_motor_command_dict(command):
+    """
+    执行已解析的电机控制命令，调用方已经解析过JSON时直接使用，避免再次序列化
     
     参数:
-        command_json (str): JSON格式的命令字符串
+        command (dict): 命令字典
         
     返回:
         dict: 包含执行结果的字典
     """
-    global _active_motors
-    
     try:
-        # 解析JSON命令
-        command = json.loads(command_json)
+        if not isinstance(command, dict):
+            return {'success': False, 'error': '命令必须是JSON对象'}
         
         # 检查命令类型
         command_type = command.get('type')
         if not command_type:
             return {'success': False, 'error': '缺少命令类型'}
         
-        # 获取电机端口
-        port = command.get('port', 'A')
+        # 查表获取处理函数
+        entry = _command_registry.get(command_type)
+        if entry is None:
+            return {'success': False, 'error': f'未知命令类型: {command_type}'}
+        handler, names, defaults, target, default_ports = entry
+        if _command_listeners:
+            _notify_command_listeners(command_type, command)
         
-        # 根据命令类型执行相应操作
-        if command_type == 'create_motor':
-            # 检查电机是否已存在
-            if port in _active_motors:
-                return {'success': True, 'message': f'电机 {port} 已存在'}
-            
-            # 创建电机
-            motor = create_motor(port)
-            _active_motors[port] = motor
-            return {'success': True, 'message': f'电机 {port} 创建成功'}
-            
-        elif command_type == 'create_multiple_motors':
-            # 获取端口列表
-            ports = command.get('ports', ['A', 'B'])
-            wheel_circumferences = command.get('wheel_circumferences', None)
-            
-            # 检查是否所有电机都已存在
-            all_exist = all(p in _active_motors for p in ports)
-            if all_exist:
-                return {'success': True, 'message': f'电机 {ports} 已存在'}
-            
-            # 创建不存在的电机
-            created_ports = []
-            for p in ports:
-                if p not in _active_motors:
-                    motor = create_motor(p)
-                    _active_motors[p] = motor
-                    created_ports.append(p)
-            
-            if created_ports:
-                return {'success': True, 'message': f'电机 {created_ports} 创建成功'}
-            else:
-                return {'success': True, 'message': f'所有电机 {ports} 已存在'}
-            
-        elif command_type == 'run_for_turns':
-            # 按圈数运行
+        get = command.get
+        if target == 'port':
+            port = get('port', 'A')
             motor = _active_motors.get(port)
             if not motor:
                 return {'success': False, 'error': f'电机 {port} 未创建'}
-                
-            turns = command.get('turns', 1)
-            speed = command.get('speed', 50)
-            direction = command.get('direction', 1)
-            run_for_turns(motor, turns, speed, direction)
-            return {'success': True, 'message': f'电机 {port} 运行 {turns} 圈'}
-            
-        elif command_type == 'run_to_position':
-            # 运行到指定位置
-            motor = _active_motors.get(port)
-            if not motor:
-                return {'success': False, 'error': f'电机 {port} 未创建'}
-                
-            position = command.get('position', 0)
-            speed = command.get('speed', 50)
-            direction = command.get('direction', 'shortest')
-            run_to_position(motor, position, speed, direction)
-            return {'success': True, 'message': f'电机 {port} 运行到位置 {position}'}
-            
-        elif command_type == 'run_forever':
-            # 一直运行
-            motor = _active_motors.get(port)
-            if not motor:
-                return {'success': False, 'error': f'电机 {port} 未创建'}
-                
-            speed = command.get('speed', 50)
-            direction = command.get('direction', 1)
-            run_forever(motor, speed, direction)
-            return {'success': True, 'message': f'电机 {port} 持续运行'}
-            
-        elif command_type == 'run_for_distance':
-            # 按距离运行
-            motor = _active_motors.get(port)
-            if not motor:
-                return {'success': False, 'error': f'电机 {port} 未创建'}
-                
-            distance = command.get('distance', 10)
-            speed = command.get('speed', 50)
-            direction = command.get('direction', 1)
-            run_for_distance(motor, distance, speed, direction)
-            return {'success': True, 'message': f'电机 {port} 运行 {distance} 厘米'}
-            
-        elif command_type == 'stop':
-            # 停止电机
-            motor = _active_motors.get(port)
-            if not motor:
-                return {'success': False, 'error': f'电机 {port} 未创建'}
-                
-            motor.stop()
-            return {'success': True, 'message': f'电机 {port} 已停止'}
-            
-        elif command_type == 'get_speed':
-            # 获取速度
-            motor = _active_motors.get(port)
-            if not motor:
-                return {'success': False, 'error': f'电机 {port} 未创建'}
-                
-            speed = motor.get_speed()
-            return {'success': True, 'speed': speed}
-            
-        elif command_type == 'get_position':
-            # 获取位置
-            motor = _active_motors.get(port)
-            if not motor:
-                return {'success': False, 'error': f'电机 {port} 未创建'}
-                
-            position = motor.get_position()
-            return {'success': True, 'position': position}
-            
-        elif command_type == 'release':
-            # 释放电机
-            motor = _active_motors.get(port)
-            if not motor:
-                return {'success': False, 'error': f'电机 {port} 未创建'}
-                
-            motor.release()
-            del _active_motors[port]
-            return {'success': True, 'message': f'电机 {port} 已释放'}
-            
-        elif command_type == 'run_motors_for_turns':
-            # 多电机按圈数运行
-            ports = command.get('ports', ['A', 'B'])
-            turns = command.get('turns', 1)
-            speeds = command.get('speeds', None)
-            directions = command.get('directions', None)
-            
-            # 检查所有电机是否已创建
-            motors = []
-            for p in ports:
-                motor = _active_motors.get(p)
-                if not motor:
-                    return {'success': False, 'error': f'电机 {p} 未创建'}
-                motors.append(motor)
-                
-            run_motors_for_turns(motors, turns, speeds, directions)
-            return {'success': True, 'message': f'电机 {ports} 运行 {turns} 圈'}
-            
-        elif command_type == 'run_motors_to_positions':
-            # 多电机运行到指定位置
-            ports = command.get('ports', ['A', 'B'])
-            positions = command.get('positions', [0, 0])
-            speeds = command.get('speeds', None)
-            direction = command.get('direction', 'shortest')
-            
-            # 检查所有电机是否已创建
-            motors = []
-            for p in ports:
-                motor = _active_motors.get(p)
-                if not motor:
-                    return {'success': False, 'error': f'电机 {p} 未创建'}
-                motors.append(motor)
-                
-            run_motors_to_positions(motors, positions, speeds, direction)
-            return {'success': True, 'message': f'电机 {ports} 运行到位置 {positions}'}
-            
-        elif command_type == 'stop_motors':
-            # 停止多个电机
-            ports = command.get('ports', ['A', 'B'])
-            
-            # 检查所有电机是否已创建
-            motors = []
-            for p in ports:
-                motor = _active_motors.get(p)
-                if not motor:
-                    return {'success': False, 'error': f'电机 {p} 未创建'}
-                motors.append(motor)
-                
-            stop_motors(motors)
-            return {'success': True, 'message': f'电机 {ports} 已停止'}
-            
-        elif command_type == 'run_motors_forever':
-            # 多电机持续运行
-            ports = command.get('ports', ['A', 'B'])
-            speeds = command.get('speeds', None)
-            directions = command.get('directions', None)
-            
-            # 检查所有电机是否已创建
-            motors = []
-            for p in ports:
-                motor = _active_motors.get(p)
-                if not motor:
-                    return {'success': False, 'error': f'电机 {p} 未创建'}
-                motors.append(motor)
-                
-            threads = run_motors_forever(motors, speeds, directions)
-            return {'success': True, 'message': f'电机 {ports} 持续运行', 'threads': len(threads)}
-            
-        elif command_type == 'run_motors_for_distances':
-            # 多电机按距离运行
-            ports = command.get('ports', ['A', 'B'])
-            distances = command.get('distances', [10, 10])
-            speeds = command.get('speeds', None)
-            directions = command.get('directions', None)
-            
-            # 检查所有电机是否已创建
-            motors = []
-            for p in ports:
-                motor = _active_motors.get(p)
-                if not motor:
-                    return {'success': False, 'error': f'电机 {p} 未创建'}
-                motors.append(motor)
-                
-            run_motors_for_distances(motors, distances, speeds, directions)
-            return {'success': True, 'message': f'电机 {ports} 运行距离 {distances}'}
-            
-        elif command_type == 'get_motors_speeds':
-            # 获取多个电机的速度
-            ports = command.get('ports', ['A', 'B'])
-            directions = command.get('directions', None)
-            
-            # 检查所有电机是否已创建
-            motors = []
-            for p in ports:
-                motor = _active_motors.get(p)
-                if not motor:
-                    return {'success': False, 'error': f'电机 {p} 未创建'}
-                motors.append(motor)
-                
-            speeds = get_motors_speeds(motors, directions)
-            return {'success': True, 'speeds': speeds}
-            
-        elif command_type == 'get_motors_positions':
-            # 获取多个电机的位置
-            ports = command.get('ports', ['A', 'B'])
-            
-            # 检查所有电机是否已创建
-            motors = []
-            for p in ports:
-                motor = _active_motors.get(p)
-                if not motor:
-                    return {'success': False, 'error': f'电机 {p} 未创建'}
-                motors.append(motor)
-                
-            positions = get_motors_positions(motors)
-            return {'success': True, 'positions': positions}
-            
-        elif command_type == 'release_all_ports':
-            # 释放所有端口
-            for port, motor in list(_active_motors.items()):
-                motor.release()
-                del _active_motors[port]
-            return {'success': True, 'message': '所有端口已释放'}
-            
-        else:
-            return {'success': False, 'error': f'未知命令类型: {command_type}'}
-            
-    except json.JSONDecodeError:
+            return handler(port, motor, *map(get, names, defaults))
+        
+        if target == 'ports':
+            ports = get('ports', default_ports)
+            motors, missing = _resolve_ports(ports)
+            if motors is None:
+                return {'success': False, 'error': f'电机 {missing} 未创建'}
+            return handler(ports, motors, *map(get, names, defaults))
+        
+        return handler(*map(get, names, defaults))
+    
+    except Exception as e:
+        return {'success': False, 'error': str(e)}
+
+def execute_motor_command(command_json):
+    """
+    执行从JSON接收到的电机控制命令
+    
+    参数:
+        command_json (str | dict): JSON格式的命令字符串，也可以直接传入已解析的命令字典
+        
+    返回:
+        dict: 包含执行结果的字典
+    """
+    if isinstance(command_json, dict):
+        return execute_motor_command_dict(command_json)
+    
+    try:
+        # 解析JSON命令
+        command = json_loads(command_json)
+    except JSONDecodeError:
         return {'success': False, 'error': 'JSON格式错误'}
     except Exception as e:
         return {'success': False, 'error': str(e)}
+    
+    return execute_motor_command_dict(command)
+
+def _command_ports(command):
+    """
+    获取命令涉及的端口集合
+    :param command: 命令字典
+    :return: 端口frozenset；会修改电机字典的命令（创建、释放所有端口）返回None
+    """
+    if not isinstance(command, dict):
+        return frozenset()
+    
+    entry = _command_registry.get(command.get('type'))
+    if entry is None:
+        # 未知命令不会操作电机，可以放在任意分组
+        return frozenset()
+    
+    target, default_ports = entry[3:]
+    if target == 'port':
+        return frozenset((command.get('port', 'A'),))
+    if target == 'ports':
+        try:
+            return frozenset(command.get('ports', default_ports))
+        except TypeError:
+            return frozenset()
+    return None
+
+def _plan_command_lanes(commands):
+    """
+    将批量命令划分为若干阶段，每个阶段内再按端口划分为互不相交的执行通道
+    同一端口的命令落在同一通道中并保持原有顺序，不同通道可以并发执行
+    :param commands: 命令字典列表
+    :return: 阶段列表，每个阶段是通道列表，每个通道是命令下标列表
+    """
+    stages = []
+    lanes = []  # [(端口集合, 命令下标列表)]
+    
+    for index, command in enumerate(commands):
+        ports = _command_ports(command)
+        
+        # 独占命令：结束当前阶段，单独成为一个阶段
+        if ports is None:
+            if lanes:
+                stages.append([indices for _, indices in lanes])
+                lanes = []
+            stages.append([[index]])
+            continue
+        
+        # 合并所有与该命令端口相交的通道
+        merged_ports = set(ports)
+        merged_indices = []
+        remaining = []
+        for lane_ports, indices in lanes:
+            if lane_ports & merged_ports:
+                merged_ports |= lane_ports
+                merged_indices.extend(indices)
+            else:
+                remaining.append((lane_ports, indices))
+        merged_indices.sort()
+        merged_indices.append(index)
+        remaining.append((merged_ports, merged_indices))
+        lanes = remaining
+    
+    if lanes:
+        stages.append([indices for _, indices in lanes])
+    return stages
+
+def _execute_batch_command(command):
+    """
+    执行批量命令中的一条，需要等待的运动不在这里等待
+    :param command: 命令字典
+    :return: 结果字典，需要等待运动结束时带有 'handle'
+    """
+    entry = _command_registry.get(command.get('type')) if isinstance(command, dict) else None
+    if entry is not None and 'wait' in entry[1] and command.get('wait', True):
+        command = dict(command, wait=_BATCH_WAIT)
+    return execute_motor_command_dict(command)
+
+def execute_motor_commands(batch, stop_on_error=False):
+    """
+    批量执行电机控制命令
+    涉及不同端口的命令同时在各端口工作线程中执行，同一端口的命令按顺序执行
+    
+    参数:
+        batch (str | list): JSON数组字符串，或命令字典列表
+        stop_on_error (bool): 某条命令失败后，是否跳过同一通道中后续的命令
+        
+    返回:
+        dict: 汇总结果，'results' 按输入顺序给出每条命令的结果
+    """
+    if isinstance(batch, (str, bytes, bytearray)):
+        try:
+            batch = json_loads(batch)
+        except JSONDecodeError:
+            return {'success': False, 'error': 'JSON格式错误'}
+    
+    if not isinstance(batch, list):
+        return {'success': False, 'error': '批量命令必须是JSON数组'}
+    
+    results = [None] * len(batch)
+    
+    # 阶段之间按顺序执行；阶段内的通道都在调用线程中推进，需要等待的运动提交到端口工作线程后
+    # 挂起该通道，运动结束时回调把通道放回就绪队列，不为通道创建线程
+    for lanes in _plan_command_lanes(batch):
+        ready = queue.SimpleQueue()
+        positions = [0] * len(lanes)
+        failed = [False] * len(lanes)
+        for lane_id in range(len(lanes)):
+            ready.put((lane_id, None))
+        
+        remaining = len(lanes)
+        while remaining:
+            lane_id, finished = ready.get()
+            if finished is not None:
+                index, handle = finished
+                try:
+                    # 运动已经结束，这里不会阻塞，出错时抛出第一个异常
+                    handle.result()
+                except Exception as e:
+                    results[index] = {'success': False, 'error': str(e)}
+                    failed[lane_id] = True
+                else:
+                    del results[index]['handle']
+            
+            indices = lanes[lane_id]
+            position = positions[lane_id]
+            while position < len(indices):
+                index = indices[position]
+                position += 1
+                if failed[lane_id] and stop_on_error:
+                    results[index] = {'success': False, 'error': '前序命令失败，已跳过'}
+                    continue
+                result = results[index] = _execute_batch_command(batch[index])
+                if not result.get('success'):
+                    failed[lane_id] = True
+                    continue
+                handle = result.get('handle')
+                if handle is not None:
+                    positions[lane_id] = position
+                    handle.add_done_callback(
+                        lambda handle, lane_id=lane_id, index=index: ready.put((lane_id, (index, handle))))
+                    break
+            else:
+                remaining -= 1
+    
+    failed = sum(1 for result in results if not result.get('success'))
+    return {
+        'success': failed == 0,
+        'message': f'执行 {len(results)} 条命令，失败 {failed} 条',
+        'failed': failed,
+        'results': results,
+    }
 
 # 测试JSON命令执行
 def test_json_command():
@@ -0,0 +1,101 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from utils.lego_motor.drive_state import DriveState
+
+# 电机顺序：左前(A)、右前(B)、左后(C)、右后(D)
+WHEEL_PORTS = ('A', 'B', 'C', 'D')
+
+def build_mixing_matrix(rotation_scale=1.0):
+    """
+    构造 (vx, vy, omega) -> 四轮速度 的混合矩阵
+    vx 向前为正，vy 向左为正，omega 逆时针（左转）为正；
+    左侧电机安装方向相反，符号已经包含在矩阵中，与 car_control.py 中各动作的轮速一致
+    :param rotation_scale: 旋转分量的系数，对应轮子到车体中心的距离 (lx + ly)，以速度百分比为单位时取1
+    :return: 4x3 矩阵
+    """
+    k = rotation_scale
+    return np.array([
+        [-1.0,  1.0, k],   # 左前
+        [ 1.0,  1.0, k],   # 右前
+        [-1.0, -1.0, k],   # 左后
+        [ 1.0, -1.0, k],   # 右后
+    ])
+
+MIXING_MATRIX = build_mixing_matrix()
+
+def mix_wheel_speeds(vx, vy=0.0, omega=0.0, max_speed=100, matrix=MIXING_MATRIX, integer=True):
+    """
+    计算四轮速度，超过 max_speed 时整体按比例缩小，保持运动方向不变
+    vx, vy, omega 可以是标量，也可以是等长数组（一次计算多组速度）
+    :param vx: 前进速度
+    :param vy: 左平移速度
+    :param omega: 左转速度
+    :param max_speed: 单个轮子的最大速度
+    :param matrix: 混合矩阵
+    :param integer: 是否取整（Build HAT 速度为整数百分比）
+    :return: 标量输入返回形状 (4,) 的数组，数组输入返回 (N, 4)
+    """
+    body = np.stack(np.broadcast_arrays(
+        np.asarray(vx, dtype=np.float64),
+        np.asarray(vy, dtype=np.float64),
+        np.asarray(omega, dtype=np.float64),
+    ), axis=-1)
+    wheels = body @ matrix.T
+
+    # 饱和归一化：每组速度按各自的最大轮速缩放
+    peak = np.max(np.abs(wheels), axis=-1, keepdims=True)
+    scale = np.where(peak > max_speed, max_speed / np.maximum(peak, 1e-12), 1.0)
+    wheels = wheels * scale
+
+    if integer:
+        wheels = np.rint(wheels).astype(np.int64)
+    return wheels
+
+class MecanumDrive:
+    """
+    麦克纳姆轮全向底盘
+    通过 DriveState 下发四轮速度，只下发有变化的轮子
+    """
+    def __init__(self, motors, max_speed=100, rotation_scale=1.0):
+        """
+        :param motors: 四个 MotorController 实例（或已有的 DriveState），顺序为 左前、右前、左后、右后
+        :param max_speed: 单个轮子的最大速度
+        :param rotation_scale: 见 build_mixing_matrix
+        """
+        drive_state = motors if isinstance(motors, DriveState) else DriveState(motors)
+        if len(drive_state.motors) != 4:
+            raise ValueError("麦克纳姆轮底盘需要4个电机")
+        self.drive_state = drive_state
+        self.max_speed = max_speed
+        self.matrix = build_mixing_matrix(rotation_scale)
+        self.velocity = (0.0, 0.0, 0.0)
+
+    def drive(self, vx=0.0, vy=0.0, omega=0.0, wait=False):
+        """
+        按车体速度运动
+        :param vx: 前进速度（负数为后退）
+        :param vy: 左平移速度（负数为右平移）
+        :param omega: 左转速度（负数为右转）
+        :param wait: 是否等待命令下发完成
+        :return: 下发的四轮速度列表
+        """
+        speeds = mix_wheel_speeds(vx, vy, omega, self.max_speed, self.matrix).tolist()
+        self.velocity = (vx, vy, omega)
+        self.drive_state.set_speeds(speeds, wait=wait)
+        return speeds
+
+    def stop(self, wait=True):
+        """
+        停止
+        :param wait: 是否等待命令下发完成
+        :return: None
+        """
+        self.velocity = (0.0, 0.0, 0.0)
+        self.drive_state.stop(wait=wait)
+
+    def stats(self):
+        return self.drive_state.stats()
@@ -0,0 +1,302 @@
+import os
+import sys
+import abc
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from utils.lego_motor.lego_motor_utils import get_motors_positions
+from utils.lego_motor.drive_state import DriveState
+from utils.lego_motor.mecanum import build_mixing_matrix
+from utils.lego_motor.odometry import DEFAULT_ROTATION_RADIUS
+
+class PID:
+    """
+    向量化PID控制器，每个分量对应一个电机
+    积分项限幅，避免长时间饱和后积分过大
+    """
+    def __init__(self, kp, ki=0.0, kd=0.0, size=1, integral_limit=None):
+        """
+        :param kp: 比例系数
+        :param ki: 积分系数
+        :param kd: 微分系数
+        :param size: 分量个数
+        :param integral_limit: 积分项绝对值上限（已乘以ki之后的输出单位），为None时不限幅
+        """
+        self.kp = kp
+        self.ki = ki
+        self.kd = kd
+        self.integral_limit = integral_limit
+        self._integral = np.zeros(size)
+        self._last_error = None
+
+    def reset(self):
+        self._integral[:] = 0.0
+        self._last_error = None
+
+    def update(self, error, dt):
+        """
+        :param error: 误差数组
+        :param dt: 距离上次更新的时间（秒）
+        :return: 控制量数组
+        """
+        output = self.kp * error
+        if self.ki:
+            self._integral += self.ki * error * dt
+            if self.integral_limit is not None:
+                np.clip(self._integral, -self.integral_limit, self.integral_limit, out=self._integral)
+            output = output + self._integral
+        if self.kd and self._last_error is not None and dt > 0:
+            output = output + self.kd * (error - self._last_error) / dt
+        self._last_error = error
+        return output
+
+class MotionRunner(abc.ABC):
+    """
+    后台运动执行的公共部分，MotionController 和 TrajectoryFollower 共用
+    运动按提交顺序在单个后台线程中执行，每次运动有自己的中止事件；
+    控制线程直接读取编码器，速度通过 DriveState 只下发有变化的电机
+    """
+    def __init__(self, motors, thread_name):
+        """
+        :param motors: MotorController实例列表（或已有的 DriveState）
+        :param thread_name: 后台线程名前缀
+        """
+        self.drive_state = motors if isinstance(motors, DriveState) else DriveState(motors)
+        self.motors = self.drive_state.motors
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=thread_name)
+        # 正在执行和排队中的运动各自的中止事件
+        self._aborts = set()
+        self._aborts_lock = threading.Lock()
+
+    # 运动命令 -----------------------------------------------------------
+    @abc.abstractmethod
+    def run_for_degrees(self, degrees, speed=50, **options):
+        """
+        各电机按指定角度运动（带符号，度），同时到达
+        :return: Future，结果为运动统计 dict
+        """
+
+    def run_for_turns(self, turns, speed=50, directions=None, **options):
+        """
+        与 run_motors_for_turns 参数一致
+        :param turns: 圈数（浮点数）或圈数列表
+        :param speed: 最大速度 0-100
+        :param directions: 方向列表，1表示正向，-1表示反向
+        :param options: 传给 run_for_degrees 的其它参数
+        :return: Future
+        """
+        if isinstance(turns, (int, float)):
+            turns = [turns] * len(self.motors)
+        if directions is None:
+            directions = [1] * len(self.motors)
+        degrees = [turn * 360 * direction for turn, direction in zip(turns, directions)]
+        return self.run_for_degrees(degrees, speed, **options)
+
+    def run_for_distances(self, distances, speed=50, directions=None, **options):
+        """
+        与 run_motors_for_distances 参数一致
+        :param distances: 距离（厘米，带符号）或距离列表
+        :return: Future
+        """
+        if isinstance(distances, (int, float)):
+            distances = [distances] * len(self.motors)
+        turns = [d / motor.wheel_circumference for d, motor in zip(distances, self.motors)]
+        return self.run_for_turns(turns, speed, directions, **options)
+
+    def cancel(self):
+        """
+        中止正在执行和排队中的运动并停车
+        :return: None
+        """
+        with self._aborts_lock:
+            for abort in self._aborts:
+                abort.set()
+
+    def shutdown(self, wait=True):
+        self.cancel()
+        self._executor.shutdown(wait=wait)
+
+    # 控制循环 -----------------------------------------------------------
+    def _submit(self, run, *args):
+        """
+        提交一次运动，run 的最后一个参数为这次运动的中止事件
+        每次运动有自己的中止事件，之前的 cancel() 不会被新提交的运动清除
+        :return: Future
+        """
+        abort = threading.Event()
+        with self._aborts_lock:
+            self._aborts.add(abort)
+        future = self._executor.submit(run, *args, abort)
+        future.add_done_callback(lambda _: self._discard_abort(abort))
+        return future
+
+    def _discard_abort(self, abort):
+        with self._aborts_lock:
+            self._aborts.discard(abort)
+
+    def _read_positions(self):
+        return np.array(get_motors_positions(self.motors), dtype=np.float64)
+
+    def _send(self, command):
+        self.drive_state.set_speeds(np.rint(np.clip(command, -100, 100)).astype(int).tolist(), wait=True)
+
+class MotionController(MotionRunner):
+    """
+    闭环运动控制
+    按固定频率读取编码器，每个轮子用位置PID逼近目标，同时用同步PID按各轮的完成比例互相修正速度，
+    让所有轮子同时到达，避免轮速差异导致车身偏转；运动在后台线程执行，调用立即返回Future
+    """
+    def __init__(self, motors, rate_hz=50, position_gains=(0.4, 0.0, 0.0), sync_gains=(1.5, 2.0, 0.0),
+                 min_speed=8, tolerance=3.0, rotation_radius=DEFAULT_ROTATION_RADIUS):
+        """
+        :param motors: MotorController实例列表（或已有的 DriveState）
+        :param rate_hz: 控制频率
+        :param position_gains: 位置环 (kp, ki, kd)，误差单位为度，输出为速度百分比
+        :param sync_gains: 同步环 (kp, ki, kd)，误差为相对平均完成比例落后的度数
+        :param min_speed: 未到达目标时的最小速度，克服静摩擦
+        :param tolerance: 到达判定的位置误差（度）
+        :param rotation_radius: 麦克纳姆轮底盘 (lx + ly)，厘米，drive/rotate 使用
+        """
+        super().__init__(motors, 'motion-control')
+        self.period = 1.0 / rate_hz
+        self.position_gains = position_gains
+        self.sync_gains = sync_gains
+        self.min_speed = min_speed
+        self.tolerance = tolerance
+        self.kinematics = build_mixing_matrix(rotation_radius)
+
+    # 运动命令 -----------------------------------------------------------
+    def run_for_degrees(self, degrees, speed=50, timeout=None):
+        """
+        各轮子按指定角度运动（带符号，度），所有轮子同时到达
+        :param degrees: 角度列表，与电机一一对应
+        :param speed: 最大速度 0-100，行程最长的轮子使用该速度，其它轮子按比例
+        :param timeout: 超时时间（秒），为None时不限
+        :return: Future，结果为运动统计 dict
+        """
+        targets = np.asarray(degrees, dtype=np.float64)
+        if len(targets) != len(self.motors):
+            raise ValueError("目标数量与电机数量不一致")
+        return self._submit(self._run_move, targets, abs(speed), timeout)
+
+    def move_degrees(self, degrees, speed=50, timeout=None):
+        """与 run_for_degrees 相同"""
+        return self.run_for_degrees(degrees, speed, timeout)
+
+    def move_wheels(self, distances, speed=50, timeout=None):
+        """
+        各轮子按指定距离运动（带符号，厘米），所有轮子同时到达
+        :param distances: 距离列表，与电机一一对应，负数为反转
+        :return: Future，结果为运动统计 dict
+        """
+        return self.run_for_distances(distances, speed, timeout=timeout)
+
+    def drive(self, dx=0.0, dy=0.0, speed=50, timeout=None):
+        """
+        麦克纳姆轮底盘平移，保持车头朝向不变
+        :param dx: 前进距离（厘米，负数为后退）
+        :param dy: 左平移距离（厘米，负数为右平移）
+        :return: Future
+        """
+        return self.move_wheels((self.kinematics @ (dx, dy, 0.0)).tolist(), speed, timeout)
+
+    def rotate(self, angle, speed=30, timeout=None):
+        """
+        麦克纳姆轮底盘原地旋转
+        :param angle: 旋转角度（度，逆时针为正）
+        :return: Future
+        """
+        return self.move_wheels((self.kinematics @ (0.0, 0.0, np.radians(angle))).tolist(), speed, timeout)
+
+    # 控制循环 -----------------------------------------------------------
+    def _run_move(self, targets, speed, timeout, abort):
+        n = len(targets)
+        position_pid = PID(*self.position_gains, size=n, integral_limit=20)
+        sync_pid = PID(*self.sync_gains, size=n, integral_limit=20)
+
+        span = np.abs(targets)
+        longest = span.max()
+        if longest <= self.tolerance:
+            return {'success': True, 'message': '目标距离小于误差范围', 'errors': [0.0] * n,
+                    'max_sync_error': 0.0, 'duration': 0.0, 'ticks': 0}
+
+        # 每个轮子的速度上限按行程比例分配，行程最长的轮子使用 speed
+        limits = np.maximum(speed * span / longest, self.min_speed)
+        weights = np.where(span > 0, span, 1.0)
+
+        self.drive_state.invalidate()
+        start = self._read_positions()
+        started_at = time.perf_counter()
+        next_tick = started_at
+        last_tick = started_at
+        max_sync_error = 0.0
+        ticks = 0
+        aborted = False
+        timed_out = False
+
+        try:
+            while True:
+                now = time.perf_counter()
+                dt = now - last_tick
+                last_tick = now
+
+                traveled = self._read_positions() - start
+                remaining = targets - traveled
+                if np.all(np.abs(remaining) <= self.tolerance):
+                    break
+                if abort.is_set():
+                    aborted = True
+                    break
+                if timeout is not None and now - started_at > timeout:
+                    timed_out = True
+                    break
+
+                # 同步误差：每个轮子相对平均完成比例落后的度数
+                progress = np.where(span > 0, traveled / np.where(targets != 0, targets, 1.0), 1.0)
+                sync_error = (progress.mean() - progress) * weights
+                max_sync_error = max(max_sync_error, float(np.abs(sync_error).max()))
+
+                # 位置环按速度上限限幅后再叠加同步修正，快的轮子减速、慢的轮子可以短暂超过上限追赶
+                command = np.clip(position_pid.update(remaining, dt), -limits, limits)
+                command += np.sign(targets) * sync_pid.update(sync_error, dt)
+                command = np.clip(command, -100, 100)
+
+                # 未到达的轮子保持最小速度，已到达的轮子停下
+                arrived = np.abs(remaining) <= self.tolerance
+                small = (np.abs(command) < self.min_speed) & ~arrived
+                command = np.where(small, np.sign(remaining) * self.min_speed, command)
+                command = np.where(arrived, 0.0, command)
+                self._send(command)
+                ticks += 1
+
+                next_tick += self.period
+                delay = next_tick - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_tick = time.perf_counter()
+        finally:
+            self.drive_state.stop(wait=True)
+
+        # 停车后再读一次，统计最终误差（包括刹车滑行）
+        final = self._read_positions() - start
+        errors = ((targets - final) / 360 * np.array([m.wheel_circumference for m in self.motors])).tolist()
+        result = {
+            'success': not (aborted or timed_out),
+            'errors': errors,
+            'max_sync_error': max_sync_error,
+            'duration': time.perf_counter() - started_at,
+            'ticks': ticks,
+        }
+        if aborted:
+            result['error'] = '运动被中止'
+        elif timed_out:
+            result['error'] = f'运动超时（{timeout} 秒）'
+        else:
+            result['message'] = '已到达目标'
+        return result
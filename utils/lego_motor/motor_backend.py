@@ -0,0 +1,300 @@
+import os
+import abc
+import math
+import time
+import threading
+
+# 电机后端选择：参数优先，其次环境变量，默认使用真实的Build HAT
+MOTOR_BACKEND_ENV = 'MONITOR_CAR_MOTOR_BACKEND'
+BACKEND_BUILDHAT = 'buildhat'
+BACKEND_SIMULATED = 'sim'
+
+class MotorBackend(abc.ABC):
+    """
+    电机后端接口，与 buildhat.Motor 的常用方法保持一致
+    MotorController 通过 self.motor 调用这些方法；buildhat.Motor 本身不继承这个类，按相同的方法名使用
+    """
+    @abc.abstractmethod
+    def start(self, speed=None):
+        """以指定速度持续运行"""
+
+    @abc.abstractmethod
+    def stop(self):
+        """停止"""
+
+    @abc.abstractmethod
+    def run_for_degrees(self, degrees, speed=None, blocking=True):
+        """转动指定角度"""
+
+    @abc.abstractmethod
+    def run_to_position(self, degrees, speed=None, blocking=True, direction='shortest'):
+        """转到指定的绝对位置"""
+
+    @abc.abstractmethod
+    def get_position(self):
+        """累计位置（度）"""
+
+    @abc.abstractmethod
+    def get_aposition(self):
+        """绝对位置（-180 到 180 度）"""
+
+    @abc.abstractmethod
+    def get_speed(self):
+        """当前速度"""
+
+# 模拟电机的默认参数，可通过 configure_simulated_motors 修改
+SIMULATION_DEFAULTS = {
+    'serial_latency': 0.002,   # 每条串口命令的耗时（秒），所有电机共享一条串口
+    'dps_per_speed': 10.0,     # 速度1%对应的转速（度/秒），100% 约为 1000 度/秒
+    'acceleration': 8000.0,    # 加速度（度/秒²）
+    'brake_deceleration': 40000.0,  # 停止时的减速度（度/秒²），决定到位后的过冲
+    'time_scale': 1.0,         # 模拟时间流速，大于1时模拟比真实时间快，便于快速跑基准测试
+    'gains': {},               # 端口 -> 实际转速/指令转速，模拟轮子或电机之间的差异
+}
+
+_sim_lock = threading.Lock()
+_sim_epoch = time.perf_counter()
+
+# 所有模拟电机共享一条串口总线，命令串行发送
+_serial_bus_lock = threading.Lock()
+_serial_bus_writes = 0
+
+def configure_simulated_motors(**overrides):
+    """
+    修改模拟电机参数，对之后创建的模拟电机生效（time_scale 对所有电机立即生效）
+    :param overrides: SIMULATION_DEFAULTS 中的参数
+    :return: None
+    """
+    global _sim_epoch
+    unknown = set(overrides) - set(SIMULATION_DEFAULTS)
+    if unknown:
+        raise ValueError(f"未知的模拟参数: {sorted(unknown)}")
+    with _sim_lock:
+        if 'time_scale' in overrides:
+            # 切换时间流速时保持模拟时间连续
+            now = sim_time()
+            _sim_epoch = time.perf_counter() - now / overrides['time_scale']
+        SIMULATION_DEFAULTS.update(overrides)
+
+def sim_time():
+    """
+    当前模拟时间（秒）
+    :return: 模拟时间
+    """
+    return (time.perf_counter() - _sim_epoch) * SIMULATION_DEFAULTS['time_scale']
+
+def sim_sleep(seconds):
+    """
+    按模拟时间休眠
+    :param seconds: 模拟时间（秒）
+    :return: None
+    """
+    if seconds > 0:
+        time.sleep(seconds / SIMULATION_DEFAULTS['time_scale'])
+
+def get_serial_bus_writes():
+    """
+    获取模拟串口总线累计发送的命令数
+    :return: 命令数
+    """
+    return _serial_bus_writes
+
+def reset_serial_bus_writes():
+    global _serial_bus_writes
+    _serial_bus_writes = 0
+
+class SimulatedMotor(MotorBackend):
+    """
+    模拟 buildhat.Motor
+    模拟串口命令延迟、加减速过程、位置累计和 run_for_degrees 的执行时间，
+    运动状态由分段匀加速模型描述，读取位置时按当前模拟时间计算
+    """
+    def __init__(self, port):
+        self.port = port
+        self.serial_latency = SIMULATION_DEFAULTS['serial_latency']
+        self.dps_per_speed = SIMULATION_DEFAULTS['dps_per_speed']
+        self.acceleration = SIMULATION_DEFAULTS['acceleration']
+        self.brake_deceleration = SIMULATION_DEFAULTS['brake_deceleration']
+        self.gain = SIMULATION_DEFAULTS['gains'].get(port, 1.0)
+
+        self._lock = threading.Lock()
+        # 运动分段列表，每段为 (开始时间, 开始位置, 开始速度, 加速度, 结束时间)
+        self._segments = [(sim_time(), 0.0, 0.0, 0.0, math.inf)]
+        # 每条新命令都会打断正在等待完成的 run_for_degrees
+        self._command_event = threading.Event()
+
+    # 串口 -------------------------------------------------------------
+    def _serial_write(self):
+        global _serial_bus_writes
+        with _serial_bus_lock:
+            _serial_bus_writes += 1
+            sim_sleep(self.serial_latency)
+
+    # 运动模型 ---------------------------------------------------------
+    def _state_at(self, t):
+        for start, p0, v0, a, end in self._segments:
+            if t < end:
+                dt = max(t - start, 0.0)
+                return p0 + v0 * dt + 0.5 * a * dt * dt, v0 + a * dt
+        start, p0, v0, a, end = self._segments[-1]
+        dt = end - start
+        return p0 + v0 * dt + 0.5 * a * dt * dt, 0.0
+
+    def _ramp_segments(self, t, p, v, v_target, accel):
+        """从 (p, v) 以加速度 accel 变到 v_target 并保持"""
+        segments = []
+        if v != v_target:
+            duration = abs(v_target - v) / accel
+            a = math.copysign(accel, v_target - v)
+            segments.append((t, p, v, a, t + duration))
+            p = p + v * duration + 0.5 * a * duration * duration
+            t = t + duration
+        segments.append((t, p, v_target, 0.0, math.inf))
+        return segments
+
+    @staticmethod
+    def _crossing_time(segment, target):
+        """匀加速段内到达 target 的最早时间，不会到达时返回None"""
+        start, p0, v0, a, end = segment
+        d = target - p0
+        if a == 0:
+            if v0 == 0:
+                return start if d == 0 else None
+            dt = d / v0
+            return start + dt if 0 <= dt <= end - start else None
+        disc = v0 * v0 + 2 * a * d
+        if disc < 0:
+            return None
+        root = math.sqrt(disc)
+        candidates = [dt for dt in ((-v0 + root) / a, (-v0 - root) / a) if 0 <= dt <= end - start]
+        return start + min(candidates) if candidates else None
+
+    def _brake_segments(self, t, p, v):
+        """从 (p, v) 以刹车减速度停下"""
+        if v == 0:
+            return [(t, p, 0.0, 0.0, t)]
+        duration = abs(v) / self.brake_deceleration
+        return [(t, p, v, -math.copysign(self.brake_deceleration, v), t + duration)]
+
+    def _command_speed(self, speed):
+        if speed is None:
+            speed = 50
+        speed = max(-100, min(100, speed))
+        return speed * self.dps_per_speed * self.gain
+
+    # buildhat.Motor 接口 ---------------------------------------------
+    def start(self, speed=None):
+        self._serial_write()
+        with self._lock:
+            t = sim_time()
+            p, v = self._state_at(t)
+            self._segments = self._ramp_segments(t, p, v, self._command_speed(speed), self.acceleration)
+        self._command_event.set()
+
+    def stop(self):
+        self._serial_write()
+        with self._lock:
+            t = sim_time()
+            p, v = self._state_at(t)
+            self._segments = self._brake_segments(t, p, v)
+        self._command_event.set()
+
+    def run_for_degrees(self, degrees, speed=None, blocking=True):
+        self._serial_write()
+        with self._lock:
+            t = sim_time()
+            p, v = self._state_at(t)
+            velocity = self._command_speed(speed)
+            if degrees < 0:
+                velocity = -velocity
+            target = p + abs(degrees) * (1 if velocity >= 0 else -1)
+
+            # 加速到指令转速，到达目标位置后刹车
+            segments = self._ramp_segments(t, p, v, velocity, self.acceleration)
+            planned = []
+            for segment in segments:
+                crossing = self._crossing_time(segment, target)
+                if crossing is not None:
+                    start, p0, v0, a, _ = segment
+                    planned.append((start, p0, v0, a, crossing))
+                    dt = crossing - start
+                    planned.extend(self._brake_segments(crossing, target, v0 + a * dt))
+                    break
+                planned.append(segment)
+            else:
+                # 速度为0时无法到达目标
+                planned = [(t, p, 0.0, 0.0, t)]
+            self._segments = planned
+            end_time = planned[-1][4]
+
+            self._command_event.clear()
+            event = self._command_event
+
+        if blocking:
+            # 等到运动结束，期间收到新命令（如stop）时提前返回
+            while not event.is_set():
+                remaining = end_time - sim_time()
+                if remaining <= 0:
+                    break
+                event.wait(remaining / SIMULATION_DEFAULTS['time_scale'])
+
+    def run_to_position(self, degrees, speed=None, blocking=True, direction='shortest'):
+        with self._lock:
+            p, _ = self._state_at(sim_time())
+        current = ((p + 180) % 360) - 180
+        diff = degrees - current
+        if direction == 'shortest':
+            diff = ((diff + 180) % 360) - 180
+        elif direction == 'clockwise':
+            diff = diff % 360
+        elif direction == 'anticlockwise':
+            diff = -((-diff) % 360)
+        self.run_for_degrees(diff, abs(speed) if speed is not None else None, blocking)
+
+    def get_position(self):
+        self._serial_write()
+        with self._lock:
+            p, _ = self._state_at(sim_time())
+        return int(round(p))
+
+    def get_aposition(self):
+        self._serial_write()
+        with self._lock:
+            p, _ = self._state_at(sim_time())
+        return int(round(((p + 180) % 360) - 180))
+
+    def get_speed(self):
+        self._serial_write()
+        with self._lock:
+            _, v = self._state_at(sim_time())
+        return int(round(v / self.dps_per_speed))
+
+    # 模拟专用 ---------------------------------------------------------
+    def true_position(self):
+        """不经过串口读取的精确位置（度），用于基准测试统计"""
+        with self._lock:
+            p, _ = self._state_at(sim_time())
+        return p
+
+    def is_moving(self):
+        """当前是否在运动，不经过串口"""
+        with self._lock:
+            _, v = self._state_at(sim_time())
+        return v != 0
+
+def get_motor_class(backend=None):
+    """
+    获取电机后端类
+    :param backend: 'buildhat' 或 'sim'，为None时读取环境变量 MONITOR_CAR_MOTOR_BACKEND，默认 'buildhat'
+    :return: 电机类，调用方式为 cls(port)
+    """
+    if backend is None:
+        backend = os.environ.get(MOTOR_BACKEND_ENV, BACKEND_BUILDHAT)
+
+    if backend == BACKEND_SIMULATED:
+        return SimulatedMotor
+    if backend == BACKEND_BUILDHAT:
+        # 只在使用真实硬件时导入，没有Build HAT的环境也能使用模拟后端
+        from buildhat import Motor
+        return Motor
+    raise ValueError(f"未知的电机后端: {backend}，可选 '{BACKEND_BUILDHAT}' 或 '{BACKEND_SIMULATED}'")
@@ -0,0 +1,231 @@
+import os
+import sys
+import math
+import time
+import threading
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from utils.lego_motor.lego_motor_utils import get_motors_positions
+from utils.lego_motor.mecanum import build_mixing_matrix
+
+# 轮子中心到车体中心的横向、纵向距离之和 (lx + ly)，厘米
+DEFAULT_ROTATION_RADIUS = 15.0
+
+class Pose:
+    """
+    位姿快照，创建后不再修改
+    发布新位姿时整体替换对象引用，读取方无需加锁也不会读到一半更新的数据
+    """
+    __slots__ = ('timestamp', 'x', 'y', 'theta', 'vx', 'vy', 'omega')
+
+    def __init__(self, timestamp, x, y, theta, vx=0.0, vy=0.0, omega=0.0):
+        self.timestamp = timestamp
+        self.x = x
+        self.y = y
+        self.theta = theta
+        self.vx = vx
+        self.vy = vy
+        self.omega = omega
+
+    def __repr__(self):
+        return (f"Pose(x={self.x:.2f}, y={self.y:.2f}, theta={math.degrees(self.theta):.1f}°, "
+                f"t={self.timestamp:.3f})")
+
+class OdometryService:
+    """
+    轮式里程计
+    后台线程按固定频率直接读取四个编码器（不经过端口工作线程，运动执行中也不会被阻塞），
+    用轮子周长把角度增量换算为轮子行程，再用麦克纳姆轮运动学的伪逆求出车体位移并累计为 (x, y, theta)
+    x 为初始朝向的前方，y 为左方，theta 逆时针为正（弧度）
+    """
+    def __init__(self, motors, rate_hz=50, rotation_radius=DEFAULT_ROTATION_RADIUS, history_size=2048):
+        """
+        :param motors: 四个 MotorController 实例，顺序为 左前、右前、左后、右后
+        :param rate_hz: 读取频率
+        :param rotation_radius: 轮子到车体中心的横向、纵向距离之和 (lx + ly)，厘米
+        :param history_size: 历史位姿环形缓冲区容量
+        """
+        if len(motors) != 4:
+            raise ValueError("里程计需要4个电机")
+        self.motors = list(motors)
+        self.period = 1.0 / rate_hz
+        self.cm_per_degree = np.array([motor.wheel_circumference / 360.0 for motor in self.motors])
+
+        # 轮子行程 = M @ (dx, dy, dtheta)，反解用预先计算的伪逆
+        self.kinematics = build_mixing_matrix(rotation_radius)
+        self.inverse_kinematics = np.linalg.pinv(self.kinematics)
+
+        # 历史位姿：列为 时间戳, x, y, theta
+        self.history_size = history_size
+        self._history = np.zeros((history_size, 4), dtype=np.float64)
+        self._history_count = 0
+
+        self._pose = Pose(time.time(), 0.0, 0.0, 0.0)
+        self._last_positions = None
+        self._reset_to = None
+
+        # 读取周期统计
+        self.polls = 0
+        self.poll_errors = 0
+        self.overruns = 0
+        self._intervals = np.zeros(history_size, dtype=np.float64)
+        self._latencies = np.zeros(history_size, dtype=np.float64)
+
+        self._running = threading.Event()
+        self._thread = None
+
+    # 读取 ---------------------------------------------------------------
+    @property
+    def pose(self):
+        """最新位姿（Pose 快照，无锁读取）"""
+        return self._pose
+
+    def history(self, n=None):
+        """
+        最近 n 个位姿，按时间从旧到新
+        :param n: 数量，为None时返回缓冲区中的全部
+        :return: 形状 (n, 4) 的数组副本，列为 时间戳, x, y, theta
+        """
+        count = self._history_count
+        n = min(count, self.history_size) if n is None else min(n, count, self.history_size)
+        index = np.arange(count - n, count) % self.history_size
+        return self._history[index].copy()
+
+    def jitter_stats(self):
+        """
+        读取周期统计
+        :return: dict，interval 为相邻两次读取的实际间隔，latency 为一次读取四个编码器的耗时，单位毫秒
+        """
+        n = min(self.polls - 1, self.history_size)
+        m = min(self.polls, self.history_size)
+        intervals = self._intervals[:n] if n > 0 else np.zeros(1)
+        latencies = self._latencies[:m] if m > 0 else np.zeros(1)
+        deviation = np.abs(intervals - self.period)
+        return {
+            'polls': self.polls,
+            'errors': self.poll_errors,
+            'overruns': self.overruns,
+            'period_ms': self.period * 1000,
+            'interval_mean_ms': float(intervals.mean() * 1000),
+            'interval_std_ms': float(intervals.std() * 1000),
+            'jitter_p99_ms': float(np.percentile(deviation, 99) * 1000),
+            'jitter_max_ms': float(deviation.max() * 1000),
+            'latency_mean_ms': float(latencies.mean() * 1000),
+            'latency_max_ms': float(latencies.max() * 1000),
+        }
+
+    def reset(self, x=0.0, y=0.0, theta=0.0):
+        """
+        重置位姿，在下一次读取时生效
+        :return: None
+        """
+        self._reset_to = (x, y, theta)
+
+    # 后台线程 -----------------------------------------------------------
+    def start(self):
+        """
+        读取一次初始编码器位置并启动后台线程
+        :return: self
+        """
+        if self._thread is not None:
+            return self
+        self._last_positions = np.array(get_motors_positions(self.motors), dtype=np.float64)
+        self._pose = Pose(time.time(), 0.0, 0.0, 0.0)
+        self._running.set()
+        self._thread = threading.Thread(target=self._run, name='odometry', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        停止后台线程
+        :return: None
+        """
+        self._running.clear()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def _run(self):
+        next_time = time.perf_counter()
+        last_poll = None
+        while self._running.is_set():
+            next_time += self.period
+            started = time.perf_counter()
+            try:
+                positions = get_motors_positions(self.motors)
+            except Exception as e:
+                self.poll_errors += 1
+                print(f"读取编码器时出错: {e!r}")
+                positions = None
+            finished = time.perf_counter()
+
+            if positions is not None:
+                slot = self.polls % self.history_size
+                self._latencies[slot] = finished - started
+                if last_poll is not None:
+                    self._intervals[(self.polls - 1) % self.history_size] = started - last_poll
+                last_poll = started
+                self.polls += 1
+                self._integrate(np.array(positions, dtype=np.float64), time.time())
+
+            delay = next_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # 读取跟不上设定频率，从当前时间重新计时
+                self.overruns += 1
+                next_time = time.perf_counter()
+
+    def update(self, positions, timestamp=None):
+        """
+        用一组编码器读数更新位姿（后台线程之外手动驱动时使用）
+        :param positions: 四个电机的位置（度）
+        :param timestamp: 读数时间，为None时使用 time.time()
+        :return: 新的 Pose
+        """
+        positions = np.asarray(positions, dtype=np.float64)
+        if self._last_positions is None:
+            self._last_positions = positions
+            return self._pose
+        return self._integrate(positions, time.time() if timestamp is None else timestamp)
+
+    def _integrate(self, positions, timestamp):
+        wheel_travel = (positions - self._last_positions) * self.cm_per_degree
+        self._last_positions = positions
+        dx, dy, dtheta = self.inverse_kinematics @ wheel_travel
+
+        previous = self._pose
+        if self._reset_to is not None:
+            x, y, theta = self._reset_to
+            self._reset_to = None
+        else:
+            x, y, theta = previous.x, previous.y, previous.theta
+
+        # 车体坐标系位移按本周期的平均朝向旋转到世界坐标系
+        heading = theta + dtheta / 2
+        cos_h = math.cos(heading)
+        sin_h = math.sin(heading)
+        x += dx * cos_h - dy * sin_h
+        y += dx * sin_h + dy * cos_h
+        theta = math.atan2(math.sin(theta + dtheta), math.cos(theta + dtheta))
+
+        dt = timestamp - previous.timestamp
+        if dt > 0:
+            pose = Pose(timestamp, x, y, theta, dx / dt, dy / dt, dtheta / dt)
+        else:
+            pose = Pose(timestamp, x, y, theta)
+
+        # 先写历史再发布计数和快照
+        self._history[self._history_count % self.history_size] = (timestamp, x, y, theta)
+        self._history_count += 1
+        self._pose = pose
+        return pose
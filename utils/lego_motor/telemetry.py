@@ -0,0 +1,337 @@
+import os
+import sys
+import glob
+import time
+import threading
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from utils.lego_motor.lego_motor_utils import _active_motors
+from utils.lego_motor.drive_state import DriveState
+
+# 每条记录为一个电机在一次采样中的读数，按列分别存放
+COLUMN_DTYPES = {
+    'timestamp': np.float64,  # time.time()
+    'port': np.uint8,         # 端口字符的编码，ord('A')
+    'speed': np.int16,        # get_speed() 读数
+    'position': np.int32,     # get_position() 读数（度）
+    'command': np.int16,      # 采样时的指令速度，未知时为 NO_COMMAND
+}
+NO_COMMAND = np.iinfo(np.int16).min
+
+def load_telemetry(directory):
+    """
+    读取 flush 写出的全部数据块，按时间顺序拼接
+    :param directory: TelemetrySampler 的 flush_dir
+    :return: dict，列名 -> 数组
+    """
+    chunks = sorted(glob.glob(os.path.join(directory, 'telemetry_*.npz')))
+    columns = {name: [] for name in COLUMN_DTYPES}
+    for chunk in chunks:
+        with np.load(chunk) as data:
+            for name in COLUMN_DTYPES:
+                columns[name].append(data[name])
+    return {name: np.concatenate(arrays) if arrays else np.zeros(0, dtype=COLUMN_DTYPES[name])
+            for name, arrays in columns.items()}
+
+class TelemetrySampler:
+    """
+    电机遥测采样
+    后台线程按固定频率直接读取所有电机的速度和位置（不经过端口工作线程，不会排在运动命令后面），
+    写入预先分配的按列存放的环形缓冲区；支持按时间窗口统计、堵转检测，以及定期把新数据写成按列的 .npz 文件。
+    采样占用串口的时间按比例限制，超出预算时把采样频率逐步降到预算允许的最高频率
+    """
+    def __init__(self, motors=None, rate_hz=10, capacity=8192, command_source=None,
+                 flush_dir=None, flush_interval=10.0, max_duty=0.3):
+        """
+        :param motors: MotorController实例列表，为None时每次采样读取所有通过JSON命令创建的电机
+        :param rate_hz: 采样频率
+        :param capacity: 环形缓冲区容量（记录条数，每个电机每次采样一条）
+        :param command_source: 指令速度来源，DriveState 或返回 {端口: 速度} 的函数，用于堵转和滞后分析
+        :param flush_dir: 定期写出的目录，为None时不写文件
+        :param flush_interval: 写出间隔（秒）
+        :param max_duty: 一次采样的耗时占采样周期的比例上限，超出时按采样耗时降低采样频率
+        """
+        self.motors = None if motors is None else list(motors)
+        self.base_period = 1.0 / rate_hz
+        self.period = self.base_period
+        self.capacity = capacity
+        self.command_source = command_source
+        self.flush_dir = flush_dir
+        self.flush_interval = flush_interval
+        self.max_duty = max_duty
+
+        self._columns = {name: np.zeros(capacity, dtype=dtype) for name, dtype in COLUMN_DTYPES.items()}
+        # 累计写入的记录数，写入位置为 count % capacity
+        self._count = 0
+        self._flushed = 0
+        self._flush_seq = 0
+        self._lock = threading.Lock()
+
+        # 开销统计
+        self.samples = 0
+        self.sample_errors = 0
+        self.overruns = 0
+        self.throttles = 0
+        self.dropped = 0
+        self.flushes = 0
+        self._busy_time = 0.0
+        self._cpu_time = 0.0
+        self._flush_time = 0.0
+        self._max_sample_time = 0.0
+        self._busy_ewma = None
+        self._throttled = False
+        self._started_at = None
+
+        self._running = threading.Event()
+        self._thread = None
+
+    # 采样 ---------------------------------------------------------------
+    def _current_motors(self):
+        if self.motors is not None:
+            return self.motors
+        return list(_active_motors.values())
+
+    def _current_commands(self, ports):
+        source = self.command_source
+        if source is None:
+            return [NO_COMMAND] * len(ports)
+        if isinstance(source, DriveState):
+            commands = {motor.port: speed for motor, speed in zip(source.motors, source.speeds)}
+        else:
+            commands = source()
+        return [NO_COMMAND if commands.get(port) is None else commands[port] for port in ports]
+
+    def sample_once(self):
+        """
+        立即采样一次所有电机并写入缓冲区（后台线程之外手动驱动时使用）
+        :return: 本次写入的记录数
+        """
+        motors = self._current_motors()
+        if not motors:
+            return 0
+        # 同一电机的速度和位置连续读取
+        states = [(motor.get_speed(), motor.get_position()) for motor in motors]
+        timestamp = time.time()
+        ports = [motor.port for motor in motors]
+        commands = self._current_commands(ports)
+
+        n = len(motors)
+        with self._lock:
+            index = np.arange(self._count, self._count + n) % self.capacity
+            columns = self._columns
+            columns['timestamp'][index] = timestamp
+            columns['port'][index] = [ord(port) for port in ports]
+            columns['speed'][index] = [speed for speed, _ in states]
+            columns['position'][index] = [position for _, position in states]
+            columns['command'][index] = commands
+            self._count += n
+            # 还没写出就被覆盖的记录
+            unflushed = self._count - self._flushed
+            if self.flush_dir is not None and unflushed > self.capacity:
+                self.dropped += unflushed - self.capacity
+                self._flushed = self._count - self.capacity
+        return n
+
+    # 查询 ---------------------------------------------------------------
+    def window(self, seconds=None, port=None):
+        """
+        最近一段时间的记录
+        :param seconds: 时间窗口（秒），为None时返回缓冲区中的全部
+        :param port: 端口，为None时返回所有端口
+        :return: dict，列名 -> 数组副本，按时间从旧到新
+        """
+        with self._lock:
+            n = min(self._count, self.capacity)
+            index = np.arange(self._count - n, self._count) % self.capacity
+            data = {name: column[index] for name, column in self._columns.items()}
+        mask = np.ones(n, dtype=bool)
+        if seconds is not None and n:
+            mask &= data['timestamp'] >= data['timestamp'][-1] - seconds
+        if port is not None:
+            mask &= data['port'] == ord(port)
+        return {name: column[mask] for name, column in data.items()}
+
+    def stats(self, seconds=None):
+        """
+        按端口统计时间窗口内的读数
+        :param seconds: 时间窗口（秒），为None时统计缓冲区中的全部
+        :return: dict，端口 -> 统计 dict；lag 为指令速度与实测速度之差的平均值（没有指令来源时为None）
+        """
+        data = self.window(seconds)
+        result = {}
+        for code in np.unique(data['port']):
+            mask = data['port'] == code
+            speed = data['speed'][mask].astype(np.float64)
+            position = data['position'][mask]
+            command = data['command'][mask]
+            known = command != NO_COMMAND
+            timestamps = data['timestamp'][mask]
+            result[chr(code)] = {
+                'samples': int(mask.sum()),
+                'duration': float(timestamps[-1] - timestamps[0]),
+                'speed_mean': float(speed.mean()),
+                'speed_max': float(np.abs(speed).max()),
+                'position_delta': int(position[-1] - position[0]),
+                'lag': float((command[known] - speed[known]).mean()) if known.any() else None,
+            }
+        return result
+
+    def detect_stalls(self, seconds=2.0, min_command=10, max_ratio=0.2, min_duration=0.5):
+        """
+        堵转检测：指令速度不小于 min_command，实测速度却持续低于指令的 max_ratio
+        需要设置 command_source
+        :param seconds: 检查的时间窗口（秒）
+        :param min_command: 视为要求转动的最小指令速度
+        :param max_ratio: 实测/指令速度低于该比例视为没有转起来
+        :param min_duration: 持续时间（秒）达到该值才报告
+        :return: 堵转列表，每项为 {'port', 'since', 'duration', 'command', 'speed'}，
+                 since 为持续堵转的开始时间戳
+        """
+        data = self.window(seconds)
+        stalls = []
+        for code in np.unique(data['port']):
+            mask = data['port'] == code
+            timestamps = data['timestamp'][mask]
+            command = data['command'][mask].astype(np.float64)
+            speed = data['speed'][mask].astype(np.float64)
+            stalled = ((data['command'][mask] != NO_COMMAND) & (np.abs(command) >= min_command)
+                       & (np.abs(speed) < max_ratio * np.abs(command)))
+            if not stalled[-1]:
+                continue
+            # 末尾连续堵转的起点
+            moving = np.flatnonzero(~stalled)
+            first = moving[-1] + 1 if moving.size else 0
+            duration = timestamps[-1] - timestamps[first]
+            if duration >= min_duration:
+                stalls.append({
+                    'port': chr(code),
+                    'since': float(timestamps[first]),
+                    'duration': float(duration),
+                    'command': int(command[-1]),
+                    'speed': int(speed[-1]),
+                })
+        return stalls
+
+    def overhead(self):
+        """
+        采样开销
+        :return: dict，duty 为采样耗时占运行时间的比例（反映串口占用），
+                 cpu 为采样线程的CPU时间占比，单位毫秒的为单次采样耗时
+        """
+        elapsed = time.perf_counter() - self._started_at if self._started_at is not None else 0.0
+        samples = max(self.samples, 1)
+        return {
+            'samples': self.samples,
+            'errors': self.sample_errors,
+            'overruns': self.overruns,
+            'throttles': self.throttles,
+            'rate_hz': 1.0 / self.period,
+            'duty': self._busy_time / elapsed if elapsed else 0.0,
+            'cpu': self._cpu_time / elapsed if elapsed else 0.0,
+            'sample_mean_ms': self._busy_time / samples * 1000,
+            'sample_max_ms': self._max_sample_time * 1000,
+            'flushes': self.flushes,
+            'flush_ms': self._flush_time * 1000,
+            'dropped': self.dropped,
+        }
+
+    # 写出 ---------------------------------------------------------------
+    def flush(self):
+        """
+        把上次写出之后的新记录写成一个 .npz 数据块
+        :return: 写出的文件路径，没有新记录或未设置 flush_dir 时返回None
+        """
+        if self.flush_dir is None:
+            return None
+        with self._lock:
+            start, end = self._flushed, self._count
+            if end == start:
+                return None
+            index = np.arange(start, end) % self.capacity
+            data = {name: column[index] for name, column in self._columns.items()}
+            self._flushed = end
+
+        started = time.perf_counter()
+        os.makedirs(self.flush_dir, exist_ok=True)
+        path = os.path.join(self.flush_dir, f'telemetry_{self._flush_seq:06d}.npz')
+        np.savez(path, **data)
+        self._flush_seq += 1
+        self.flushes += 1
+        self._flush_time += time.perf_counter() - started
+        return path
+
+    # 后台线程 -----------------------------------------------------------
+    def start(self):
+        """
+        启动后台采样线程
+        :return: self
+        """
+        if self._thread is not None:
+            return self
+        self._started_at = time.perf_counter()
+        self._running.set()
+        self._thread = threading.Thread(target=self._run, name='telemetry', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        停止后台线程，并写出剩余的记录
+        :return: None
+        """
+        self._running.clear()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def _run(self):
+        next_time = time.perf_counter()
+        next_flush = next_time + self.flush_interval
+        while self._running.is_set():
+            next_time += self.period
+            started = time.perf_counter()
+            cpu_started = time.thread_time()
+            try:
+                self.sample_once()
+                self.samples += 1
+            except Exception as e:
+                self.sample_errors += 1
+                print(f"遥测采样时出错: {e!r}")
+            busy = time.perf_counter() - started
+            self._busy_time += busy
+            self._cpu_time += time.thread_time() - cpu_started
+            self._max_sample_time = max(self._max_sample_time, busy)
+
+            # 按平滑后的采样耗时算出预算允许的最短周期，采样周期逐步靠近它，
+            # 负载下降后同样逐步回到设定频率
+            if self._busy_ewma is None:
+                self._busy_ewma = busy
+            else:
+                self._busy_ewma += 0.1 * (busy - self._busy_ewma)
+            target = max(self.base_period, self._busy_ewma / self.max_duty)
+            self.period += 0.2 * (target - self.period)
+            throttled = self.period > self.base_period * 1.05
+            if throttled and not self._throttled:
+                self.throttles += 1
+            self._throttled = throttled
+
+            if self.flush_dir is not None and time.perf_counter() >= next_flush:
+                self.flush()
+                next_flush = time.perf_counter() + self.flush_interval
+
+            delay = next_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # 采样跟不上设定频率，从当前时间重新计时
+                self.overruns += 1
+                next_time = time.perf_counter()
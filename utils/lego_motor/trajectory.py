@@ -0,0 +1,246 @@
+import os
+import sys
+import math
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from utils.lego_motor.motion_control import MotionRunner
+
+# 速度百分比与转速的换算，Build HAT 上速度100%约为1000度/秒
+DEGREES_PER_SECOND_PER_SPEED = 10.0
+
+PROFILE_TRAPEZOID = 'trapezoid'  # 匀加速、匀速、匀减速
+PROFILE_S_CURVE = 's_curve'      # 加速度按正弦变化，起步和到达时加速度为0，没有冲击
+_PROFILES = (PROFILE_TRAPEZOID, PROFILE_S_CURVE)
+
+def _accel_shape(profile, t, ta, peak):
+    """
+    加速段 [0, ta] 内的位置和速度
+    :return: (位置数组, 速度数组)
+    """
+    if profile == PROFILE_TRAPEZOID:
+        return 0.5 * peak / ta * t * t, peak * t / ta
+    phase = np.pi * t / ta
+    return 0.5 * peak * (t - ta / np.pi * np.sin(phase)), 0.5 * peak * (1 - np.cos(phase))
+
+def velocity_profile(distance, max_velocity, acceleration, profile=PROFILE_S_CURVE, rate_hz=50):
+    """
+    为一段非负位移生成按固定频率采样的速度曲线
+    行程太短达不到最大速度时退化为三角形（只有加速段和减速段）
+    :param distance: 位移（度），不小于0
+    :param max_velocity: 最大转速（度/秒）
+    :param acceleration: 最大加速度（度/秒²）
+    :param profile: 'trapezoid' 或 's_curve'
+    :param rate_hz: 采样频率
+    :return: (时间数组, 位置数组, 速度数组)，最后一个采样点恰好在终点
+    """
+    if profile not in _PROFILES:
+        raise ValueError(f"未知的速度曲线: {profile}，可选 {_PROFILES}")
+    if distance <= 0 or max_velocity <= 0 or acceleration <= 0:
+        zero = np.zeros(1)
+        return zero, zero.copy(), zero.copy()
+
+    # 两种曲线加速段的位移都是 peak * ta / 2，S曲线峰值加速度相同时加速时间长 pi/2 倍
+    factor = 1.0 if profile == PROFILE_TRAPEZOID else np.pi / 2
+    peak = min(max_velocity, math.sqrt(acceleration * distance / factor))
+    ta = factor * peak / acceleration
+    tc = (distance - peak * ta) / peak
+    duration = 2 * ta + tc
+
+    times = np.arange(0.0, duration, 1.0 / rate_hz)
+    times = np.append(times, duration)
+
+    # 减速段与加速段对称：p(t) = distance - p_acc(duration - t)
+    accel_t = np.minimum(times, ta)
+    decel_t = np.minimum(duration - times, ta)
+    accel_p, accel_v = _accel_shape(profile, accel_t, ta, peak)
+    decel_p, decel_v = _accel_shape(profile, decel_t, ta, peak)
+    cruise_p = 0.5 * peak * ta + peak * (times - ta)
+
+    positions = np.where(times < ta, accel_p,
+                         np.where(times > ta + tc, distance - decel_p, cruise_p))
+    velocities = np.where(times < ta, accel_v,
+                          np.where(times > ta + tc, decel_v, peak))
+    return times, positions, velocities
+
+class Trajectory:
+    """
+    多电机轨迹：按固定频率采样的位置和速度设定点
+    positions、velocities 的形状为 (采样点数, 电机数)，位置相对起点，单位为度
+    """
+    def __init__(self, times, positions, velocities, rate_hz, profile):
+        self.times = times
+        self.positions = positions
+        self.velocities = velocities
+        self.rate_hz = rate_hz
+        self.profile = profile
+
+    def __len__(self):
+        return len(self.times)
+
+    @property
+    def duration(self):
+        return float(self.times[-1])
+
+    @property
+    def targets(self):
+        """各电机的终点位移（度）"""
+        return self.positions[-1]
+
+    def sample(self, t):
+        """
+        按时间在设定点之间线性插值，超出时间范围时取起点或终点
+        :param t: 相对轨迹开始的时间（秒）
+        :return: 各电机的位置设定点数组
+        """
+        if t <= 0 or len(self.times) == 1:
+            return self.positions[0]
+        if t >= self.times[-1]:
+            return self.positions[-1]
+        i = int(np.searchsorted(self.times, t, side='right')) - 1
+        frac = (t - self.times[i]) / (self.times[i + 1] - self.times[i])
+        return self.positions[i] + (self.positions[i + 1] - self.positions[i]) * frac
+
+def plan_trajectory(degrees, max_speed=50, acceleration=2000.0, profile=PROFILE_S_CURVE, rate_hz=50):
+    """
+    为多个电机规划同时起步、同时到达的轨迹
+    行程最长的电机使用给定的最大速度和加速度，其它电机按行程比例缩放同一条曲线
+    :param degrees: 各电机的位移列表（度，带符号）
+    :param max_speed: 最大速度 0-100
+    :param acceleration: 最大加速度（度/秒²）
+    :param profile: 'trapezoid' 或 's_curve'
+    :param rate_hz: 设定点频率
+    :return: Trajectory
+    """
+    degrees = np.asarray(degrees, dtype=np.float64)
+    longest = float(np.abs(degrees).max()) if degrees.size else 0.0
+    times, unit_p, unit_v = velocity_profile(longest, abs(max_speed) * DEGREES_PER_SECOND_PER_SPEED,
+                                             acceleration, profile, rate_hz)
+    ratio = degrees / longest if longest > 0 else np.zeros_like(degrees)
+    return Trajectory(times, np.outer(unit_p, ratio), np.outer(unit_v, ratio), rate_hz, profile)
+
+class TrajectoryFollower(MotionRunner):
+    """
+    轨迹跟随
+    按轨迹的设定点频率下发速度：速度曲线作为前馈，加上位置误差的比例修正；
+    轨迹结束后继续用位置修正收敛到终点再停车。运动在后台线程执行，调用立即返回Future
+    """
+    def __init__(self, motors, kp=0.5, tolerance=2.0, settle_time=0.5):
+        """
+        :param motors: MotorController实例列表（或已有的 DriveState）
+        :param kp: 位置误差（度）到速度百分比的比例系数
+        :param tolerance: 到达判定的位置误差（度）
+        :param settle_time: 轨迹结束后收敛到终点的最长时间（秒）
+        """
+        super().__init__(motors, 'trajectory')
+        self.kp = kp
+        self.tolerance = tolerance
+        self.settle_time = settle_time
+
+    # 运动命令 -----------------------------------------------------------
+    def follow(self, trajectory):
+        """
+        执行已规划的轨迹
+        :param trajectory: Trajectory，电机数与跟随器一致
+        :return: Future，结果为运动统计 dict
+        """
+        if trajectory.positions.shape[1] != len(self.motors):
+            raise ValueError("轨迹的电机数量与电机数量不一致")
+        return self._submit(self._run, trajectory)
+
+    def run_for_degrees(self, degrees, speed=50, acceleration=2000.0, profile=PROFILE_S_CURVE, rate_hz=50):
+        """
+        各电机按指定角度运动（带符号，度），同时起步、同时到达
+        run_for_turns、run_for_distances 的 acceleration、profile、rate_hz 参数传到这里
+        :param acceleration: 最大加速度（度/秒²）
+        :param profile: 'trapezoid' 或 's_curve'
+        :param rate_hz: 设定点频率
+        :return: Future
+        """
+        return self.follow(plan_trajectory(degrees, speed, acceleration, profile, rate_hz))
+
+    # 控制循环 -----------------------------------------------------------
+    def _run(self, trajectory, abort):
+        targets = trajectory.targets
+        period = 1.0 / trajectory.rate_hz
+        duration = trajectory.duration
+        # 位移（度）换算成节拍内的速度百分比
+        speed_scale = trajectory.rate_hz / DEGREES_PER_SECOND_PER_SPEED
+
+        self.drive_state.invalidate()
+        start = self._read_positions()
+        started_at = time.perf_counter()
+        next_tick = started_at
+        max_tracking_error = 0.0
+        ticks = 0
+        aborted = False
+        settled = False
+
+        try:
+            # 按设定点频率流式下发，设定点按实际时间取，节拍偶尔超时不会让轨迹整体滞后
+            while True:
+                if abort.is_set():
+                    aborted = True
+                    break
+                read_at = time.perf_counter()
+                traveled = self._read_positions() - start
+                now = time.perf_counter()
+                if now - started_at >= duration:
+                    break
+                # 读数对应读取过程的中点，与同一时刻的设定点比较
+                error = trajectory.sample((read_at + now) / 2 - started_at) - traveled
+                max_tracking_error = max(max_tracking_error, float(np.abs(error).max()))
+                # 前馈取本节拍内设定点的平均速度，速度在节拍内保持不变，节拍结束时正好走到下一个设定点；
+                # 速度命令下发同样要经过串口，按读取耗时估计生效延迟
+                t = now - started_at + (now - read_at)
+                feedforward = (trajectory.sample(t + period) - trajectory.sample(t)) * speed_scale
+                self._send(feedforward + self.kp * error)
+                ticks += 1
+
+                next_tick += period
+                delay = next_tick - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_tick = time.perf_counter()
+
+            # 轨迹结束后只用位置修正收敛，已到达的电机停下
+            deadline = time.perf_counter() + self.settle_time
+            while not aborted:
+                error = targets - (self._read_positions() - start)
+                arrived = np.abs(error) <= self.tolerance
+                if arrived.all():
+                    settled = True
+                    break
+                if abort.is_set():
+                    aborted = True
+                    break
+                if time.perf_counter() > deadline:
+                    break
+                command = self.kp * error
+                # 误差很小时比例输出不足1%，至少按1%修正
+                command = np.where(arrived, 0.0, np.sign(error) * np.maximum(np.abs(command), 1.0))
+                self._send(command)
+                ticks += 1
+                time.sleep(period)
+        finally:
+            self.drive_state.stop(wait=True)
+
+        final = self._read_positions() - start
+        result = {
+            'success': settled,
+            'errors': (targets - final).tolist(),
+            'max_tracking_error': max_tracking_error,
+            'duration': time.perf_counter() - started_at,
+            'planned_duration': trajectory.duration,
+            'ticks': ticks,
+        }
+        if aborted:
+            result['error'] = '运动被中止'
+        elif not settled:
+            result['error'] = f'轨迹结束后 {self.settle_time} 秒内未收敛到终点'
+        else:
+            result['message'] = '已到达目标'
+        return result
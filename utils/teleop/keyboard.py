@@ -0,0 +1,181 @@
+import os
+import sys
+import time
+import select
+import termios
+import tty
+
+# 终端没有"松开按键"事件，只能从自动重复的字符流推断：
+# 按下后系统要等一段重复延迟（通常 250-600ms）才开始重复，之后每 30-50ms 重复一次
+INITIAL_RELEASE_TIMEOUT = 0.6   # 只收到第一个字符时，等待自动重复开始的时间
+REPEAT_RELEASE_TIMEOUT = 0.12   # 已经在重复时，超过这个时间没有新字符视为松开
+
+class HeldKeyState:
+    """
+    按住按键的状态机
+    收到字符 -> 按下（或保持）；同一按键在超时时间内没有再收到字符 -> 松开；收到其它按键 -> 直接切换
+    """
+    def __init__(self, initial_timeout=INITIAL_RELEASE_TIMEOUT, repeat_timeout=REPEAT_RELEASE_TIMEOUT):
+        """
+        :param initial_timeout: 首个字符之后的松开超时（秒），需要大于系统的按键重复延迟
+        :param repeat_timeout: 自动重复开始后的松开超时（秒），需要大于重复间隔
+        """
+        self.initial_timeout = initial_timeout
+        self.repeat_timeout = repeat_timeout
+        self.key = None
+        self.pressed_at = None
+        self.last_seen = None
+        self.repeats = 0
+
+    def feed(self, key, now):
+        """
+        收到一个字符
+        :param key: 字符
+        :param now: 收到的时间（time.monotonic()）
+        :return: 是否是新按下的按键
+        """
+        if key == self.key:
+            self.last_seen = now
+            self.repeats += 1
+            return False
+        self.key = key
+        self.pressed_at = now
+        self.last_seen = now
+        self.repeats = 0
+        return True
+
+    def update(self, now):
+        """
+        检查是否已经松开
+        :param now: 当前时间（time.monotonic()）
+        :return: 当前按住的按键，没有则为None
+        """
+        if self.key is not None:
+            timeout = self.initial_timeout if self.repeats == 0 else self.repeat_timeout
+            if now - self.last_seen > timeout:
+                self.key = None
+                self.repeats = 0
+        return self.key
+
+    def release(self):
+        self.key = None
+        self.repeats = 0
+
+class KeyReader:
+    """
+    非阻塞按键读取
+    进入时只切换一次终端模式（cbreak：逐字符读取、不回显，Ctrl+C 仍然产生 KeyboardInterrupt），
+    退出时恢复；读取通过 select 等待，不会阻塞控制循环
+    """
+    def __init__(self, fd=None, initial_timeout=INITIAL_RELEASE_TIMEOUT, repeat_timeout=REPEAT_RELEASE_TIMEOUT):
+        """
+        :param fd: 输入文件描述符，默认为标准输入
+        :param initial_timeout: 见 HeldKeyState
+        :param repeat_timeout: 见 HeldKeyState
+        """
+        self.fd = sys.stdin.fileno() if fd is None else fd
+        self.state = HeldKeyState(initial_timeout, repeat_timeout)
+        self._old_settings = None
+
+    def open(self):
+        """
+        切换终端到 cbreak 模式
+        :return: self
+        """
+        if self._old_settings is None and os.isatty(self.fd):
+            self._old_settings = termios.tcgetattr(self.fd)
+            tty.setcbreak(self.fd, termios.TCSANOW)
+        return self
+
+    def close(self):
+        """
+        恢复终端设置
+        :return: None
+        """
+        if self._old_settings is not None:
+            termios.tcsetattr(self.fd, termios.TCSADRAIN, self._old_settings)
+            self._old_settings = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def read_keys(self, timeout=0.0):
+        """
+        等待最多 timeout 秒，读取当前所有可读的字符并更新按键状态
+        :param timeout: 等待时间（秒），0表示不等待
+        :return: 读到的字符串，没有输入时为空字符串；输入关闭时返回None
+        """
+        readable, _, _ = select.select([self.fd], [], [], max(timeout, 0.0))
+        if not readable:
+            return ''
+        data = os.read(self.fd, 256)
+        if not data:
+            return None
+        keys = data.decode('utf-8', errors='ignore')
+        now = time.monotonic()
+        for key in keys:
+            self.state.feed(key, now)
+        return keys
+
+    def held_key(self):
+        """
+        :return: 当前按住的按键，没有则为None
+        """
+        return self.state.update(time.monotonic())
+
+class FixedRateTicker:
+    """
+    固定频率的控制节拍
+    按绝对时间推进，处理耗时不会累积成节拍漂移；落后超过一个周期时直接跳到当前时间
+    """
+    def __init__(self, rate_hz):
+        """
+        :param rate_hz: 控制频率
+        """
+        self.period = 1.0 / rate_hz
+        self.next_tick = time.monotonic()
+        self.ticks = 0
+        self.overruns = 0
+
+    def remaining(self):
+        """
+        :return: 距离下一个节拍的时间（秒），已到期时为0
+        """
+        return max(self.next_tick - time.monotonic(), 0.0)
+
+    def due(self):
+        """
+        检查节拍是否到期，到期时推进到下一个节拍
+        :return: bool
+        """
+        now = time.monotonic()
+        if now < self.next_tick:
+            return False
+        self.next_tick += self.period
+        if now - self.next_tick > self.period:
+            self.overruns += 1
+            self.next_tick = now + self.period
+        self.ticks += 1
+        return True
+
+def run_teleop(reader, on_tick, rate_hz=20, quit_keys=('p',)):
+    """
+    遥控主循环：等待输入的同时按固定频率调用 on_tick(held_key)
+    :param reader: 已打开的 KeyReader
+    :param on_tick: 每个控制节拍调用一次，参数为当前按住的按键（或None）
+    :param rate_hz: 控制频率
+    :param quit_keys: 退出按键
+    :return: None
+    """
+    ticker = FixedRateTicker(rate_hz)
+    while True:
+        keys = reader.read_keys(ticker.remaining())
+        if keys is None:
+            return
+        if any(key in quit_keys for key in keys):
+            return
+        if ticker.due():
+            on_tick(reader.held_key())